@@ -81,7 +81,7 @@ with DAG(
         bash_command=(
             f"cd {PROJECT_DIR} && "
             f"export PYTHONPATH={PROJECT_DIR} && "
-            f"{PY_CMD} -m src.pipeline.ensemble_and_eval"
+            f"{PY_CMD} -m src.pipeline.ensemble_and_eval --stream"   # 티커 청크 단위(메모리 상한 EVAL_STREAM_MEM_MB)
         ),
         env=common_env,
         execution_timeout=timedelta(hours=2),
@@ -47,10 +47,16 @@ CREATE TABLE IF NOT EXISTS evals (
 CREATE OR REPLACE VIEW predictions_clean AS
 SELECT *
 FROM predictions
-WHERE model_name LIKE 'safe_%' AND horizon = 1;
+WHERE model_name LIKE 'safe_%';
 
+-- 모델 목록: DISTINCT 대신 인덱스를 모델 수만큼만 짚는 loose index scan
 CREATE OR REPLACE VIEW model_catalog AS
-SELECT DISTINCT model_name
-FROM predictions_clean
-ORDER BY 1;
+WITH RECURSIVE m AS (
+  (SELECT model_name FROM predictions_clean ORDER BY model_name LIMIT 1)
+  UNION ALL
+  SELECT (SELECT p.model_name FROM predictions_clean p
+          WHERE p.model_name > m.model_name ORDER BY p.model_name LIMIT 1)
+  FROM m WHERE m.model_name IS NOT NULL
+)
+SELECT model_name FROM m WHERE model_name IS NOT NULL;
 
@@ -0,0 +1,65 @@
+-- compact 프로파일 (DB_SCHEMA_PROFILE=compact)
+-- 가격/예측 값은 double precision(등락률은 real), horizon은 smallint
+-- 기존 DB 변환: python -m src.db.migrate compact
+
+-- 1) 티커 마스터
+CREATE TABLE IF NOT EXISTS tickers (
+  ticker     varchar(6) PRIMARY KEY,
+  name       text NOT NULL,
+  market     text,
+  sector     text,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- 2) 가격
+CREATE TABLE IF NOT EXISTS prices (
+  date       date        NOT NULL,
+  ticker     varchar(6)  NOT NULL,
+  open       double precision,
+  high       double precision,
+  low        double precision,
+  close      double precision,
+  adj_close  double precision,
+  volume     bigint,
+  change     real,
+  PRIMARY KEY (date, ticker),
+  FOREIGN KEY (ticker) REFERENCES tickers(ticker)
+);
+
+-- 3) 예측
+CREATE TABLE IF NOT EXISTS predictions (
+  date       date        NOT NULL,
+  ticker     varchar(6)  NOT NULL,
+  model_name text        NOT NULL,
+  horizon    smallint    NOT NULL DEFAULT 1,
+  y_pred     double precision NOT NULL,
+  PRIMARY KEY (date, ticker, model_name, horizon),
+  FOREIGN KEY (ticker) REFERENCES tickers(ticker)
+);
+
+-- 4) 평가
+CREATE TABLE IF NOT EXISTS evals (
+  model_name text        NOT NULL,
+  asof_date  date        NOT NULL,
+  metric     text        NOT NULL,
+  value      numeric     NOT NULL,
+  PRIMARY KEY (model_name, asof_date, metric)
+);
+
+-- 5) 조회용 뷰(스트림릿/리포트)
+CREATE OR REPLACE VIEW predictions_clean AS
+SELECT *
+FROM predictions
+WHERE model_name LIKE 'safe_%';
+
+-- 모델 목록: DISTINCT 대신 인덱스를 모델 수만큼만 짚는 loose index scan
+CREATE OR REPLACE VIEW model_catalog AS
+WITH RECURSIVE m AS (
+  (SELECT model_name FROM predictions_clean ORDER BY model_name LIMIT 1)
+  UNION ALL
+  SELECT (SELECT p.model_name FROM predictions_clean p
+          WHERE p.model_name > m.model_name ORDER BY p.model_name LIMIT 1)
+  FROM m WHERE m.model_name IS NOT NULL
+)
+SELECT model_name FROM m WHERE model_name IS NOT NULL;
+
@@ -1,68 +1,61 @@
 -- ==== Views Fix/Refresh (2025-09-10, idempotent) =====================
 
--- 1) last250_dates
-CREATE OR REPLACE VIEW public.last250_dates AS
-WITH distinct_days AS (
-  SELECT DISTINCT ticker, date
-  FROM public.prediction_eval
-),
-ranked AS (
-  SELECT
-    ticker,
-    date,
-    ROW_NUMBER() OVER (PARTITION BY ticker ORDER BY date DESC) AS rn
-  FROM distinct_days
-)
-SELECT ticker, date
-FROM ranked
-WHERE rn <= 250;
+-- 0) 요약 테이블 (src/db/summary.py와 동일) — eval_daily가 바뀐 날짜분만 증분 갱신
+--    처음 만든 뒤에는 `python -m src.db.summary --rebuild`로 채움
+CREATE TABLE IF NOT EXISTS public.prediction_metrics_state (
+  ticker      TEXT NOT NULL,
+  model_name  TEXT NOT NULL,
+  horizon     INT  NOT NULL,
+  n_rows      BIGINT NOT NULL DEFAULT 0,             -- 평가 행 수
+  n_err       BIGINT NOT NULL DEFAULT 0,             -- abs_err가 있는 행 수
+  sum_err     DOUBLE PRECISION NOT NULL DEFAULT 0,
+  n_dir       BIGINT NOT NULL DEFAULT 0,             -- dir_correct = true 행 수
+  n_rows_250  BIGINT NOT NULL DEFAULT 0,             -- 이하 최근 250 거래일 창
+  n_err_250   BIGINT NOT NULL DEFAULT 0,
+  sum_err_250 DOUBLE PRECISION NOT NULL DEFAULT 0,
+  n_dir_250   BIGINT NOT NULL DEFAULT 0,
+  updated_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (ticker, model_name, horizon)
+);
 
--- 2) prediction_metrics (dir_correct 표준)
+CREATE TABLE IF NOT EXISTS public.prediction_window (
+  ticker      TEXT PRIMARY KEY,
+  start_date  DATE NOT NULL,                         -- 창의 첫 거래일 (티커별 최근 250 거래일)
+  updated_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- 1) last250_dates (창 시작일 테이블 기준)
+DROP VIEW IF EXISTS public.last250_dates CASCADE;
+CREATE VIEW public.last250_dates AS
+SELECT DISTINCT e.ticker, e.date
+FROM public.prediction_eval e
+JOIN public.prediction_window w ON w.ticker = e.ticker AND e.date >= w.start_date;
+
+-- 2) prediction_metrics (dir_correct 표준, 요약 테이블에서 바로)
 DROP VIEW IF EXISTS public.prediction_metrics CASCADE;
 CREATE VIEW public.prediction_metrics AS
 SELECT
-  e.ticker,
-  e.model_name,
-  e.horizon,
-  AVG(e.abs_err)::float AS mae_all,
-  AVG(CASE WHEN e.dir_correct THEN 1 ELSE 0 END)::float AS acc_all,
-  AVG(CASE WHEN l.date IS NOT NULL THEN e.abs_err END)::float AS mae_250d,
-  AVG(
-    CASE WHEN l.date IS NOT NULL
-         THEN CASE WHEN e.dir_correct THEN 1 ELSE 0 END
-    END
-  )::float AS acc_250d
-FROM public.prediction_eval e
-LEFT JOIN public.last250_dates l
-  ON l.ticker = e.ticker AND l.date = e.date
-GROUP BY e.ticker, e.model_name, e.horizon;
+  ticker,
+  model_name,
+  horizon,
+  sum_err / NULLIF(n_err, 0)                 AS mae_all,
+  n_dir::float / NULLIF(n_rows, 0)           AS acc_all,
+  sum_err_250 / NULLIF(n_err_250, 0)         AS mae_250d,
+  n_dir_250::float / NULLIF(n_rows_250, 0)   AS acc_250d
+FROM public.prediction_metrics_state
+WHERE n_rows > 0;
 
--- 3) prediction_leaderboard (dir_correct 표준)
+-- 3) prediction_leaderboard (dir_correct 표준, 티커×모델 행만 집계)
 DROP VIEW IF EXISTS public.prediction_leaderboard CASCADE;
 CREATE VIEW public.prediction_leaderboard AS
-WITH base AS (
-  SELECT
-    e.model_name,
-    e.horizon,
-    e.abs_err,
-    e.dir_correct,
-    (CASE WHEN l.date IS NOT NULL THEN 1 ELSE 0 END) AS in_250
-  FROM public.prediction_eval e
-  LEFT JOIN public.last250_dates l
-    ON l.ticker = e.ticker AND l.date = e.date
-)
 SELECT
   model_name,
   horizon,
-  AVG(abs_err)::float AS mae_all,
-  AVG(CASE WHEN dir_correct THEN 1 ELSE 0 END)::float AS acc_all,
-  AVG(CASE WHEN in_250 = 1 THEN abs_err END)::float AS mae_250d,
-  AVG(
-    CASE WHEN in_250 = 1
-         THEN CASE WHEN dir_correct THEN 1 ELSE 0 END
-    END
-  )::float AS acc_250d
-FROM base
+  SUM(sum_err) / NULLIF(SUM(n_err), 0)                AS mae_all,
+  SUM(n_dir)::float / NULLIF(SUM(n_rows), 0)          AS acc_all,
+  SUM(sum_err_250) / NULLIF(SUM(n_err_250), 0)        AS mae_250d,
+  SUM(n_dir_250)::float / NULLIF(SUM(n_rows_250), 0)  AS acc_250d
+FROM public.prediction_metrics_state
 GROUP BY model_name, horizon;
 
 -- 4) signals_view (조인 버전)
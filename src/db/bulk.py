@@ -0,0 +1,142 @@
+# src/db/bulk.py
+"""
+COPY 기반 대량 UPSERT 엔진
+- DataFrame → CSV 스트림 → COPY FROM STDIN → 임시 스테이징 테이블
+- INSERT ... SELECT ... ON CONFLICT 한 문장으로 본 테이블에 병합
+- to_dict('records') / executemany / 다중 VALUES 없이 수백만 행도 COPY 속도로 적재
+- 같은 키가 여러 번 들어오면 마지막 행이 이김
+"""
+from __future__ import annotations
+import io
+from typing import Iterable
+import pandas as pd
+from sqlalchemy import text
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:   # pyarrow 없으면 pandas.to_csv로 직렬화
+    pa = None
+
+from .conn import get_engine, get_table
+
+CHUNK_ROWS = 100_000   # CSV 직렬화 단위(메모리 상한)
+_INT_TYPES = {"smallint", "integer", "bigint"}
+_EMPTY = "\x00"   # pandas 경로에서 빈 문자열 자리표시 (Postgres 텍스트엔 NUL이 올 수 없음)
+
+def _to_csv(part: pd.DataFrame) -> bytes:
+    """CSV 직렬화. pyarrow(C++ writer)가 있으면 사용, 없거나 변환 실패 시 pandas."""
+    if pa is not None:
+        try:
+            buf = io.BytesIO()
+            pa_csv.write_csv(pa.Table.from_pandas(part, preserve_index=False), buf,
+                             pa_csv.WriteOptions(include_header=False))
+            return buf.getvalue()
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            pass
+    # pandas는 빈 문자열도 따옴표 없이 쓰므로 COPY가 NULL로 읽음 → pyarrow처럼 "" 로 인용
+    part = part.copy()
+    for c in part.columns:
+        if part[c].dtype == object or isinstance(part[c].dtype, pd.StringDtype):
+            part[c] = part[c].mask(part[c].eq("").fillna(False), _EMPTY)
+    out = part.to_csv(index=False, header=False, na_rep="").encode("utf-8")
+    return out.replace(_EMPTY.encode(), b'""')
+
+class _CsvStream(io.RawIOBase):
+    """DataFrame을 CHUNK_ROWS씩 CSV로 직렬화하며 읽히는 파일 객체 (copy_expert 입력용)."""
+
+    def __init__(self, df: pd.DataFrame, chunk_rows: int = CHUNK_ROWS):
+        self._df = df
+        self._chunk = chunk_rows
+        self._pos = 0
+        self._buf = b""
+        self._off = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def _fill(self) -> bool:
+        if self._pos >= len(self._df):
+            return False
+        part = self._df.iloc[self._pos:self._pos + self._chunk]
+        self._pos += self._chunk
+        self._buf = self._buf[self._off:] + _to_csv(part)
+        self._off = 0
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while (size < 0 or len(self._buf) - self._off < size) and self._fill():
+            pass
+        end = len(self._buf) if size < 0 else self._off + size
+        out = self._buf[self._off:end]
+        self._off = min(end, len(self._buf))
+        return out
+
+def _column_types(table: str) -> dict[str, str]:
+    """캐시된 리플렉션에서 컬럼 → SQL 타입명."""
+    tbl = get_table(table)
+    dialect = get_engine().dialect
+    return {c.name: c.type.compile(dialect=dialect).lower() for c in tbl.columns}
+
+def copy_upsert(
+    df: pd.DataFrame,
+    table: str,
+    key_cols: Iterable[str],
+    update_cols: Iterable[str] | None = None,
+    update_exprs: dict[str, str] | None = None,
+    conn=None,
+) -> int:
+    """
+    df를 table에 UPSERT하고 입력 행 수를 반환.
+    - key_cols: ON CONFLICT 대상(PK/UNIQUE)
+    - update_cols: 충돌 시 EXCLUDED 값으로 덮을 컬럼 (기본: 키 제외 전부, 빈 목록이면 DO NOTHING)
+    - update_exprs: 컬럼별 SET 식 직접 지정 (예: {"updated_at": "now()"})
+    - conn: 기존 트랜잭션(Connection)에 합류할 때
+    """
+    if df is None or df.empty:
+        return 0
+    if conn is None:
+        with get_engine().begin() as c:
+            return copy_upsert(df, table, key_cols, update_cols, update_exprs, conn=c)
+
+    keys = list(key_cols)
+    cols = list(df.columns)
+    dup = df.duplicated(keys, keep="last")
+    if dup.any():   # ON CONFLICT는 한 문장 안의 중복 키를 허용하지 않음 → 마지막 행만
+        df = df[~dup]
+    updates = [c for c in cols if c not in keys] if update_cols is None else list(update_cols)
+    types = _column_types(table)
+    stage = f"_stage_{table}"
+    col_sql = ", ".join(cols)
+
+    # 스테이징: 대상 컬럼 타입 그대로(정수는 '1000.0' 같은 입력을 받도록 numeric으로)
+    conn.execute(text(f"DROP TABLE IF EXISTS {stage}"))
+    conn.execute(text(f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS SELECT {col_sql} FROM {table} WITH NO DATA"))
+    for c in cols:
+        if types.get(c) in _INT_TYPES:
+            conn.execute(text(f"ALTER TABLE {stage} ALTER COLUMN {c} TYPE numeric"))
+
+    raw = conn.connection.dbapi_connection
+    with raw.cursor() as cur:
+        cur.copy_expert(
+            f"COPY {stage} ({col_sql}) FROM STDIN WITH (FORMAT csv)",   # 따옴표 없는 빈 칸 = NULL
+            _CsvStream(df),
+        )
+
+    select_sql = ", ".join(
+        f"CAST({c} AS {types[c]})" if types.get(c) in _INT_TYPES else c for c in cols
+    )
+    key_sql = ", ".join(keys)
+    sets = {c: f"EXCLUDED.{c}" for c in updates}
+    sets.update(update_exprs or {})
+    if sets:
+        action = "DO UPDATE SET " + ", ".join(f"{c} = {e}" for c, e in sets.items())
+    else:
+        action = "DO NOTHING"
+    conn.execute(text(f"""
+        INSERT INTO {table} ({col_sql})
+        SELECT {select_sql} FROM {stage}
+        ON CONFLICT ({key_sql}) {action}
+    """))
+    conn.execute(text(f"DROP TABLE IF EXISTS {stage}"))
+    return len(df)
@@ -1,12 +1,79 @@
 import os
-from sqlalchemy import create_engine
+import threading
+from sqlalchemy import MetaData, Table, create_engine
 
-def get_engine():
+# 풀/타임아웃 설정 (환경변수로 조정)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))                 # 초, 오래된 커넥션 교체
+STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))    # 0 = 제한 없음
+
+_lock = threading.RLock()
+_engine = None
+_pid = None
+_metadata = MetaData()
+_tables: dict[str, Table] = {}
+
+def _url() -> str:
     user = os.getenv("DB_USER", "kospi")
     pwd  = os.getenv("DB_PASS", "kospi")
     host = os.getenv("DB_HOST", "localhost")
     port = os.getenv("DB_PORT", "5432")
     name = os.getenv("DB_NAME", "stocks")
-    url  = f"postgresql+psycopg2://{user}:{pwd}@{host}:{port}/{name}"
-    # 프리핑으로 끊어진 커넥션 자동 복구
-    return create_engine(url, pool_pre_ping=True, future=True)
+    return f"postgresql+psycopg2://{user}:{pwd}@{host}:{port}/{name}"
+
+def get_engine():
+    """프로세스당 하나의 엔진(커넥션 풀 공유). fork된 자식에서는 새로 만든다."""
+    global _engine, _pid
+    if _engine is None or _pid != os.getpid():
+        with _lock:
+            if _engine is None or _pid != os.getpid():
+                if _engine is not None:
+                    _engine.dispose(close=False)   # 부모 커넥션은 건드리지 않고 버림
+                connect_args = {}
+                if STATEMENT_TIMEOUT_MS > 0:
+                    connect_args["options"] = f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"
+                # 프리핑으로 끊어진 커넥션 자동 복구
+                _engine = create_engine(
+                    _url(), pool_pre_ping=True, future=True,
+                    pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_recycle=POOL_RECYCLE,
+                    connect_args=connect_args,
+                )
+                _pid = os.getpid()
+    return _engine
+
+def get_table(name: str) -> Table:
+    """리플렉션한 Table을 프로세스 내에서 캐시."""
+    tbl = _tables.get(name)
+    if tbl is None:
+        with _lock:
+            tbl = _tables.get(name)
+            if tbl is None:
+                tbl = Table(name, _metadata, autoload_with=get_engine())
+                _tables[name] = tbl
+    return tbl
+
+def reset_tables() -> None:
+    """스키마 변경(마이그레이션) 후 리플렉션 캐시 비우기."""
+    with _lock:
+        _tables.clear()
+        _metadata.clear()
+
+def pool_stats() -> dict:
+    """현재 풀 상태: 크기/대여 중/대기 중/오버플로."""
+    pool = get_engine().pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "max_overflow": MAX_OVERFLOW,
+    }
+
+def dispose_engine() -> None:
+    """풀의 모든 커넥션을 닫고 엔진을 버림 (다음 get_engine()에서 새로 생성)."""
+    global _engine, _pid
+    with _lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine, _pid = None, None
@@ -0,0 +1,100 @@
+# src/db/fast_read.py
+"""
+COPY TO 기반 고속 조회
+- COPY (query) TO STDOUT (CSV) 스트림을 파이프로 바로 pyarrow CSV 파서에 넘김
+  (행 단위 Python 객체/Decimal 생성 없음, 결과 전체를 텍스트로 들고 있지 않음)
+- 컬럼 타입은 쿼리 결과 메타데이터(OID)로 지정: numeric → float64, date → datetime64,
+  정수 → int64(결측 있으면 float64), text → 문자열 (티커 앞자리 0 보존)
+- pyarrow가 없으면 pd.read_sql로 폴백
+- SQL은 기존처럼 :name 파라미터를 그대로 사용
+
+예) read_frame("SELECT date, ticker, close FROM prices WHERE date >= :d", {"d": since})
+"""
+from __future__ import annotations
+import os
+import re
+import threading
+import pandas as pd
+from sqlalchemy import text
+
+from .conn import get_engine
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:   # pyarrow 없으면 pd.read_sql 경로
+    pa = None
+
+BLOCK_BYTES = 8 << 20   # 파서 블록 크기
+_PARAM = re.compile(r"(?<![:\w\\]):(\w+)(?!:)")
+
+def _arrow_type(oid: int):
+    if oid == 16:   return pa.bool_()
+    if oid == 20:   return pa.int64()
+    if oid == 21:   return pa.int16()
+    if oid == 23:   return pa.int32()
+    if oid == 700:  return pa.float32()
+    if oid in (701, 1700): return pa.float64()   # numeric도 float64로
+    if oid == 1082: return pa.date32()
+    return pa.string()   # text/varchar/timestamp 등은 문자열로 받아 pandas에서 변환
+
+def _pyformat(sql: str) -> str:
+    """:name → %(name)s (psycopg2 mogrify용), 리터럴 %는 이스케이프."""
+    return _PARAM.sub(r"%(\1)s", sql.replace("%", "%%"))
+
+def _read_copy(conn, sql: str, params: dict) -> pd.DataFrame:
+    raw = conn.connection.dbapi_connection
+    with raw.cursor() as cur:
+        q = cur.mogrify(_pyformat(sql), params).decode("utf-8")
+        cur.execute(f"SELECT * FROM ({q}) _q LIMIT 0")
+        names = [d.name for d in cur.description]
+        oids = [d.type_code for d in cur.description]
+        types = {n: _arrow_type(o) for n, o in zip(names, oids)}
+
+        r, w = os.pipe()
+        err: list[BaseException] = []
+
+        def _produce() -> None:
+            try:
+                with os.fdopen(w, "wb") as f:
+                    cur.copy_expert(f"COPY ({q}) TO STDOUT WITH (FORMAT csv)", f)
+            except BaseException as e:   # 파서 쪽이 먼저 닫은 경우(BrokenPipe) 포함
+                err.append(e)
+
+        th = threading.Thread(target=_produce, daemon=True)
+        th.start()
+        try:
+            with os.fdopen(r, "rb") as f:
+                tbl = pa_csv.read_csv(
+                    f,
+                    read_options=pa_csv.ReadOptions(column_names=names, block_size=BLOCK_BYTES),
+                    convert_options=pa_csv.ConvertOptions(
+                        column_types=types,
+                        true_values=["t"], false_values=["f"],
+                        strings_can_be_null=True, quoted_strings_can_be_null=False,
+                    ),
+                )
+        except pa.ArrowInvalid as e:
+            if "Empty CSV" not in str(e):
+                raise
+            tbl = pa.table({n: pa.array([], type=t) for n, t in types.items()})
+        finally:
+            th.join()
+        if err:
+            raise err[0]
+
+    df = tbl.to_pandas(date_as_object=False, split_blocks=True, self_destruct=True)
+    for n, o in zip(names, oids):
+        if o in (1114, 1184):   # timestamp / timestamptz
+            df[n] = pd.to_datetime(df[n], utc=(o == 1184), format="ISO8601")
+    return df
+
+def read_frame(sql: str, params: dict | None = None, conn=None) -> pd.DataFrame:
+    """SELECT 결과를 DataFrame으로. conn을 주면 그 커넥션(트랜잭션)에서 실행."""
+    params = params or {}
+    if conn is None:
+        with get_engine().connect() as c:
+            return read_frame(sql, params, conn=c)
+    if pa is None:
+        return pd.read_sql(text(sql), conn, params=params)
+    return _read_copy(conn, sql, params)
@@ -0,0 +1,308 @@
+# src/db/indexes.py
+"""
+조회 패턴 기반 관리 인덱스 + EXPLAIN 회귀 체크
+- apply: INDEXES 목록을 멱등하게 생성 (이름 기준, 이미 있으면 no-op)
+  일반 테이블은 CREATE INDEX CONCURRENTLY, 파티션 테이블은 부모에 ON ONLY로 만든 뒤
+  파티션마다 CONCURRENTLY로 만들어 ATTACH (쓰기 잠금 없음). 새 파티션은 부모 인덱스를 자동으로 물려받음
+  중단돼 INVALID로 남은 인덱스는 지우고 다시 만든다
+  RETIRED(대체된 예전 인덱스)는 대체 인덱스가 VALID가 된 뒤 삭제
+- check: 프로젝트의 주요 쿼리(KNOWN_QUERIES)를 EXPLAIN 해서 큰 테이블(SEQSCAN_MAX_ROWS 이상)
+  순차 스캔이 있으면 실패(exit 1)
+- 인덱스 이름은 <table>_<key>_idx → migrate.rebuild의 이름 교체 규칙과 맞음
+
+예) python -m src.db.indexes apply --dry-run
+    python -m src.db.indexes apply --tables predictions
+    python -m src.db.indexes check
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+from datetime import timedelta
+from sqlalchemy import text
+
+from .conn import get_engine
+from .migrate import table_exists
+from .partitions import is_partitioned, list_partitions
+from src.models.horizons import HORIZONS   # ensemble.truth의 LEAD 열
+
+SEQSCAN_MAX_ROWS = int(os.getenv("EXPLAIN_SEQSCAN_ROWS", "10000"))   # 이 이상(추정 행 수)이면 큰 테이블
+
+# (table, key, 정의) — 이름은 <table>_<key>_idx
+INDEXES: list[tuple[str, str, str]] = [
+    # 티커 단위 조회: 차트 예측, predict_daily의 모델별 마지막 예측일 (y_pred까지 인덱스만으로)
+    ("predictions", "ticker", "(ticker, horizon, model_name, date) INCLUDE (y_pred)"),
+    # 모델 카탈로그: horizon별 모델 목록을 loose index scan으로
+    ("predictions", "model", "(horizon, model_name)"),
+    # predictions_clean 뷰와 같은 조건의 부분 인덱스 (안전 모델, horizon 전부)
+    ("predictions", "safe", "(model_name, horizon, date) INCLUDE (ticker, y_pred) "
+                            "WHERE model_name LIKE 'safe_%'"),
+    # 티커별 마지막 종가/마지막 날짜, 티커 가격 이력 (close까지 커버)
+    ("prices", "ticker_date", "(ticker, date DESC) INCLUDE (close)"),
+    # 요약 테이블 갱신: 티커별 최근 250 거래일 창 시작일
+    ("prediction_eval", "ticker_date", "(ticker, date)"),
+]
+
+# (table, 예전 key, 대체한 key) — 대체 인덱스가 VALID면 <table>_<예전 key>_idx 삭제
+RETIRED: list[tuple[str, str, str]] = [
+    ("predictions", "safe_h1", "safe"),   # horizon = 1 전용 → safe (horizon 전부)
+]
+
+# 이름 → SQL. 실제 코드의 쿼리와 같게 유지 (파라미터는 check에서 샘플 값으로 채움)
+KNOWN_QUERIES: dict[str, str] = {
+    "predict_daily.prices": "SELECT date, close FROM prices WHERE ticker=:t ORDER BY date",
+    "predict_daily.last_map": """
+        SELECT model_name, horizon, MAX(date) AS last_date
+        FROM predictions
+        WHERE ticker=:t AND horizon = ANY(:hs)
+        GROUP BY model_name, horizon
+    """,
+    "predict_daily.last_map_bulk": """
+        SELECT t.ticker, m.model_name, h.horizon,
+               (SELECT MAX(p.date) FROM predictions p
+                WHERE p.ticker = t.ticker AND p.horizon = h.horizon AND p.model_name = m.model_name) AS last_date
+        FROM unnest(CAST(:arr AS text[])) AS t(ticker)
+        CROSS JOIN unnest(CAST(:models AS text[])) AS m(model_name)
+        CROSS JOIN unnest(CAST(:hs AS int[])) AS h(horizon)
+    """,
+    "web.prices": """
+        SELECT date, open, high, low, close, volume
+        FROM prices
+        WHERE ticker = :t
+        ORDER BY date
+    """,
+    "web.predictions": """
+        SELECT date, ticker, model_name, horizon, y_pred
+        FROM predictions_clean
+        WHERE ticker = :t AND horizon = :h AND model_name = ANY(:models)
+    """,
+    "web.model_catalog": """
+        WITH RECURSIVE m AS (
+            (SELECT model_name FROM predictions_clean WHERE horizon = :h ORDER BY model_name LIMIT 1)
+            UNION ALL
+            SELECT (SELECT p.model_name FROM predictions_clean p
+                    WHERE p.horizon = :h AND p.model_name > m.model_name
+                    ORDER BY p.model_name LIMIT 1)
+            FROM m WHERE m.model_name IS NOT NULL
+        )
+        SELECT model_name FROM m WHERE model_name IS NOT NULL
+    """,
+    "view.model_catalog": "SELECT model_name FROM model_catalog",
+    "incremental.prev_close": """
+        SELECT t.ticker, p.close
+        FROM unnest(CAST(:arr AS text[])) AS t(ticker)
+        CROSS JOIN LATERAL (
+            SELECT close FROM prices
+            WHERE ticker = t.ticker AND close IS NOT NULL AND close <> 0
+            ORDER BY date DESC LIMIT 1
+        ) p
+    """,
+    "incremental.last_date": """
+        SELECT t.ticker, (SELECT MAX(date) FROM prices p WHERE p.ticker = t.ticker) AS max_d
+        FROM tickers t
+    """,
+    "ensemble.base_predictions": """
+        SELECT date, ticker, model_name, horizon, y_pred
+        FROM predictions
+        WHERE horizon = ANY(:hs)
+          AND model_name LIKE 'safe_%'
+          AND (
+                model_name LIKE 'safe_ma_%'
+             OR model_name LIKE 'safe_ses_%'
+             OR model_name LIKE 'safe_dl_%'
+          )
+          AND date >= :since
+    """,
+    "ensemble.truth": f"""
+        SELECT ticker, date, {", ".join(f"LEAD(close, {h}) OVER w AS h{h}" for h in HORIZONS)}
+        FROM prices
+        WHERE true AND date >= :since
+        WINDOW w AS (PARTITION BY ticker ORDER BY date)
+    """,
+    "eval_daily.predictions": """
+        SELECT date, ticker, model_name, horizon, y_pred
+        FROM predictions
+        WHERE horizon = ANY(:hs)
+          AND (model_name LIKE 'safe_%' OR model_name LIKE 'safe_ens_%')
+          AND date >= :since
+    """,
+    "eval_daily.truth": "SELECT ticker, date, close FROM prices WHERE date >= :since ORDER BY ticker, date",
+    "summary.window_start": """
+        SELECT t.ticker, (SELECT MIN(x.date) FROM (
+            SELECT DISTINCT e.date FROM prediction_eval e
+            WHERE e.ticker = t.ticker ORDER BY e.date DESC LIMIT 250
+        ) x) AS w1
+        FROM unnest(CAST(:arr AS text[])) AS t(ticker)
+    """,
+    "view.prediction_metrics": "SELECT * FROM prediction_metrics WHERE ticker = :t",
+    "view.prediction_leaderboard": "SELECT * FROM prediction_leaderboard",
+}
+
+# ---------------------------------------------------------------- apply
+
+def _index_info(conn, name: str):
+    """(indisvalid,) — 인덱스가 없으면 None."""
+    return conn.execute(text("""
+        SELECT i.indisvalid FROM pg_index i WHERE i.indexrelid = to_regclass(:n)
+    """), {"n": name}).fetchone()
+
+def _attached_child(conn, parent_idx: str, part: str) -> str | None:
+    """part에 이미 parent_idx로 붙어 있는 인덱스 이름 (ATTACH 때 자동 생성된 것 포함)."""
+    return conn.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits h
+        JOIN pg_index i ON i.indexrelid = h.inhrelid
+        JOIN pg_class c ON c.oid = h.inhrelid
+        WHERE h.inhparent = to_regclass(:p) AND i.indrelid = to_regclass(:t)
+    """), {"p": parent_idx, "t": part}).scalar()
+
+def _create_concurrently(conn, name: str, table: str, body: str, dry_run: bool) -> bool:
+    info = _index_info(conn, name)
+    if info is not None and info[0]:
+        return False
+    if dry_run:
+        print(f"[indexes] would create {name} ON {table} {body}")
+        return True
+    if info is not None:   # 중단된 CONCURRENTLY 빌드의 잔재
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    conn.execute(text(f"CREATE INDEX CONCURRENTLY {name} ON {table} {body}"))
+    print(f"[indexes] created {name}")
+    return True
+
+def ensure_indexes(tables=None, into: str | None = None, dry_run: bool = False) -> int:
+    """
+    INDEXES 중 tables에 해당하는 것을 생성. 만든 개수 반환.
+    into를 주면 그 테이블(예: migrate의 섀도 테이블)에 같은 인덱스를 <into>_<key>_idx로 만든다.
+    """
+    made = 0
+    eng = get_engine().execution_options(isolation_level="AUTOCOMMIT")   # CONCURRENTLY는 트랜잭션 밖
+    with eng.connect() as c:
+        for table, key, body in INDEXES:
+            if tables is not None and table not in tables:
+                continue
+            target = into or table
+            if not table_exists(c, target):
+                continue
+            name = f"{target}_{key}_idx"
+            if not is_partitioned(c, target):
+                made += _create_concurrently(c, name, target, body, dry_run)
+                continue
+            # 파티션 테이블: 부모(ON ONLY, 빈 INVALID 인덱스) → 파티션별 CONCURRENTLY → ATTACH
+            info = _index_info(c, name)
+            if info is not None and info[0]:
+                continue
+            if dry_run:
+                print(f"[indexes] would create {name} ON {target} {body} (per partition)")
+                made += 1
+                continue
+            c.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {target} {body}"))
+            for part, _ in list_partitions(c, target):
+                if _attached_child(c, name, part):
+                    continue
+                child = f"{part}_{key}_idx"
+                _create_concurrently(c, child, part, body, dry_run)
+                c.execute(text(f"ALTER INDEX {name} ATTACH PARTITION {child}"))
+            print(f"[indexes] created {name} (valid={_index_info(c, name)[0]})")
+            made += 1
+        _drop_retired(c, tables, into, dry_run)
+    return made
+
+def _drop_retired(conn, tables, into: str | None, dry_run: bool) -> int:
+    """RETIRED 중 대체 인덱스가 VALID인 것을 삭제. 지운 개수 반환."""
+    dropped = 0
+    for table, key, by in RETIRED:
+        if tables is not None and table not in tables:
+            continue
+        target = into or table
+        if not table_exists(conn, target):
+            continue
+        repl = _index_info(conn, f"{target}_{by}_idx")
+        if repl is None or not repl[0]:
+            continue   # 대체 인덱스가 없거나 아직 INVALID면 예전 것 유지
+        name = f"{target}_{key}_idx"
+        names = [name]
+        if is_partitioned(conn, target):   # 부모에 안 붙은 파티션 인덱스(중단된 빌드 잔재)도
+            names += [f"{part}_{key}_idx" for part, _ in list_partitions(conn, target)
+                      if _attached_child(conn, name, part) != f"{part}_{key}_idx"]
+        for n in names:
+            if _index_info(conn, n) is None:
+                continue
+            if dry_run:
+                print(f"[indexes] would drop {n} (replaced by {target}_{by}_idx)")
+            elif n == name and is_partitioned(conn, target):
+                # 파티션 부모 인덱스는 CONCURRENTLY 불가 → 일반 DROP (카탈로그만, 붙은 파티션 인덱스도 함께)
+                conn.execute(text(f"DROP INDEX IF EXISTS {n}"))
+            else:
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {n}"))
+            if not dry_run:
+                print(f"[indexes] dropped {n} (replaced by {target}_{by}_idx)")
+            dropped += 1
+    return dropped
+
+# ---------------------------------------------------------------- check
+
+def _sample_params(conn) -> dict:
+    t = conn.execute(text("SELECT ticker FROM prices ORDER BY date DESC LIMIT 1")).scalar()
+    last = conn.execute(text("SELECT MAX(date) FROM prices")).scalar()
+    arr = [r[0] for r in conn.execute(text("SELECT ticker FROM tickers ORDER BY 1")).fetchall()]
+    models = [r[0] for r in conn.execute(text(
+        "SELECT model_name FROM model_catalog LIMIT 3"
+    )).fetchall()] if table_exists(conn, "model_catalog") else []
+    return {
+        "t": t or "", "h": 1, "hs": [1, 5, 20], "arr": arr, "models": models or ["safe_ma_5"],
+        "since": (last - timedelta(days=10)) if last else None,
+    }
+
+def _seq_scans(plan: dict) -> list[str]:
+    out = []
+    if plan.get("Node Type") == "Seq Scan":
+        out.append(plan["Relation Name"])
+    for sub in plan.get("Plans", []):
+        out += _seq_scans(sub)
+    return out
+
+def explain(sql: str, params: dict, conn) -> dict:
+    # psycopg2는 파라미터를 리터럴로 치환 → 실제 호출과 같은 상수 조건으로 계획
+    row = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+    return (json.loads(row) if isinstance(row, str) else row)[0]["Plan"]
+
+def check(queries: dict[str, str] = KNOWN_QUERIES, max_rows: int = SEQSCAN_MAX_ROWS) -> list[str]:
+    """큰 테이블을 순차 스캔하는 쿼리 이름 목록 (비어 있으면 통과)."""
+    bad = []
+    with get_engine().connect() as c:
+        params = _sample_params(c)
+        rows = dict(c.execute(text(
+            "SELECT relname, reltuples FROM pg_class WHERE relkind IN ('r', 'p')"
+        )).fetchall())
+        for name, sql in queries.items():
+            try:
+                plan = explain(sql, params, c)
+            except Exception as e:
+                c.rollback()
+                print(f"[indexes] {name}: skip ({type(e).__name__}: {str(e).splitlines()[0]})")
+                continue
+            big = [r for r in _seq_scans(plan) if rows.get(r, 0) >= max_rows]
+            if big:
+                bad.append(name)
+                print(f"[indexes] FAIL {name}: seq scan on {', '.join(f'{r}(~{int(rows[r])})' for r in big)}")
+            else:
+                print(f"[indexes] ok   {name}: {plan['Node Type']} cost={plan['Total Cost']:.0f}")
+    return bad
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    a = sub.add_parser("apply", help="create missing managed indexes (online)")
+    a.add_argument("--tables", type=str, default=None, help="comma separated (default: all)")
+    a.add_argument("--dry-run", action="store_true")
+    k = sub.add_parser("check", help="EXPLAIN known queries, fail on large sequential scans")
+    k.add_argument("--max-rows", type=int, default=SEQSCAN_MAX_ROWS)
+    args = ap.parse_args()
+    if args.cmd == "apply":
+        tables = [x.strip() for x in args.tables.split(",") if x.strip()] if args.tables else None
+        print(f"[indexes] created={ensure_indexes(tables, dry_run=args.dry_run)}")
+    else:
+        failed = check(max_rows=args.max_rows)
+        print(f"[indexes] {len(KNOWN_QUERIES) - len(failed)}/{len(KNOWN_QUERIES)} ok")
+        sys.exit(1 if failed else 0)
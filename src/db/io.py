@@ -1,6 +1,13 @@
 from __future__ import annotations
+import os
+import re
+import pandas as pd
 from sqlalchemy import text
+from .bulk import copy_upsert
 from .conn import get_engine
+from .partitions import ensure_partitions
+
+SCHEMA_PROFILE = os.getenv("DB_SCHEMA_PROFILE", "standard")   # standard / compact
 
 SCHEMA_SQL = """
 CREATE TABLE IF NOT EXISTS tickers (
@@ -44,69 +51,71 @@ CREATE TABLE IF NOT EXISTS evals (
   FOREIGN KEY (ticker) REFERENCES tickers(ticker)
 );
 
--- 뷰: 안전 모델만 + horizon=1
+-- 뷰: 안전 모델만 (horizon 전부, 조회 시 horizon 조건)
 CREATE OR REPLACE VIEW predictions_clean AS
 SELECT * FROM predictions
-WHERE model_name LIKE 'safe_%' AND horizon = 1;
+WHERE model_name LIKE 'safe_%';
 
+-- 모델 목록: DISTINCT 대신 인덱스를 모델 수만큼만 짚는 loose index scan
 CREATE OR REPLACE VIEW model_catalog AS
-SELECT DISTINCT model_name FROM predictions_clean ORDER BY 1;
+WITH RECURSIVE m AS (
+  (SELECT model_name FROM predictions_clean ORDER BY model_name LIMIT 1)
+  UNION ALL
+  SELECT (SELECT p.model_name FROM predictions_clean p
+          WHERE p.model_name > m.model_name ORDER BY p.model_name LIMIT 1)
+  FROM m WHERE m.model_name IS NOT NULL
+)
+SELECT model_name FROM m WHERE model_name IS NOT NULL;
 """
 
+# compact 프로파일: 값 컬럼을 double precision/real, horizon을 smallint로 (sql/schema_compact.sql과 동일)
+SCHEMA_SQL_COMPACT = (
+    SCHEMA_SQL
+    .replace("  open       NUMERIC,", "  open       DOUBLE PRECISION,")
+    .replace("  high       NUMERIC,", "  high       DOUBLE PRECISION,")
+    .replace("  low        NUMERIC,", "  low        DOUBLE PRECISION,")
+    .replace("  close      NUMERIC,", "  close      DOUBLE PRECISION,")
+    .replace("  adj_close  NUMERIC,", "  adj_close  DOUBLE PRECISION,")
+    .replace("  change     NUMERIC,", "  change     REAL,")
+    .replace("  horizon    INT  NOT NULL,", "  horizon    SMALLINT NOT NULL,")
+    .replace("  y_pred     NUMERIC NOT NULL,", "  y_pred     DOUBLE PRECISION NOT NULL,")
+    .replace("  mae        NUMERIC,", "  mae        DOUBLE PRECISION,")
+    .replace("  mape       NUMERIC,", "  mape       DOUBLE PRECISION,")
+    .replace("  rmse       NUMERIC,", "  rmse       DOUBLE PRECISION,")
+)
+# SCHEMA_SQL의 공백/정렬이 바뀌면 replace가 조용히 no-op → import 시점에 바로 드러나게
+_left = re.findall(r"^.*(?:\bNUMERIC\b|\bhorizon\s+INT\b).*$", SCHEMA_SQL_COMPACT, re.M | re.I)
+if _left:
+    raise RuntimeError(f"SCHEMA_SQL_COMPACT: replace() missed {[s.strip() for s in _left]}")
+
 def ensure_schema():
+    """DB_SCHEMA_PROFILE=compact면 compact 타입으로 생성 (이미 있는 테이블은 그대로)."""
+    sql = SCHEMA_SQL_COMPACT if SCHEMA_PROFILE == "compact" else SCHEMA_SQL
     eng = get_engine()
     with eng.begin() as conn:
-        conn.execute(text(SCHEMA_SQL))
+        conn.execute(text(sql))
+    ensure_partitions()   # 파티션 테이블이면 앞으로 쓸 구간 파티션 생성 (아니면 no-op)
 
-def upsert_tickers(rows: list[dict]):
-    if not rows: return 0
-    sql = """
-    INSERT INTO tickers (ticker, name)
-    VALUES (:ticker, :name)
-    ON CONFLICT (ticker) DO UPDATE SET name = EXCLUDED.name;
-    """
-    eng = get_engine()
-    with eng.begin() as conn:
-        conn.execute(text(sql), rows)
-    return len(rows)
+def _frame(rows, cols: list[str]) -> pd.DataFrame:
+    """list[dict] 또는 DataFrame → 대상 컬럼만 가진 DataFrame."""
+    df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+    return df.reindex(columns=cols)
 
-def upsert_prices(rows: list[dict]):
-    if not rows: return 0
-    sql = """
-    INSERT INTO prices (date,ticker,open,high,low,close,adj_close,volume,change)
-    VALUES (:date,:ticker,:open,:high,:low,:close,:adj_close,:volume,:change)
-    ON CONFLICT (date,ticker) DO UPDATE SET
-        open=EXCLUDED.open, high=EXCLUDED.high, low=EXCLUDED.low,
-        close=EXCLUDED.close, adj_close=EXCLUDED.adj_close,
-        volume=EXCLUDED.volume, change=EXCLUDED.change;
-    """
-    eng = get_engine()
-    with eng.begin() as conn:
-        conn.execute(text(sql), rows)
-    return len(rows)
+def upsert_tickers(rows):
+    if rows is None or len(rows) == 0: return 0
+    return copy_upsert(_frame(rows, ["ticker","name"]), "tickers", ["ticker"])
 
-def upsert_predictions(rows: list[dict]):
-    if not rows: return 0
-    sql = """
-    INSERT INTO predictions (date,ticker,model_name,horizon,y_pred)
-    VALUES (:date,:ticker,:model_name,:horizon,:y_pred)
-    ON CONFLICT (date,ticker,model_name,horizon)
-    DO UPDATE SET y_pred = EXCLUDED.y_pred;
-    """
-    eng = get_engine()
-    with eng.begin() as conn:
-        conn.execute(text(sql), rows)
-    return len(rows)
+def upsert_prices(rows):
+    if rows is None or len(rows) == 0: return 0
+    cols = ["date","ticker","open","high","low","close","adj_close","volume","change"]
+    return copy_upsert(_frame(rows, cols), "prices", ["date","ticker"])
 
-def upsert_evals(rows: list[dict]):
-    if not rows: return 0
-    sql = """
-    INSERT INTO evals (date,ticker,model_name,horizon,mae,mape,rmse)
-    VALUES (:date,:ticker,:model_name,:horizon,:mae,:mape,:rmse)
-    ON CONFLICT (date,ticker,model_name,horizon)
-    DO UPDATE SET mae=EXCLUDED.mae,mape=EXCLUDED.mape,rmse=EXCLUDED.rmse;
-    """
-    eng = get_engine()
-    with eng.begin() as conn:
-        conn.execute(text(sql), rows)
-    return len(rows)
+def upsert_predictions(rows, conn=None):
+    if rows is None or len(rows) == 0: return 0
+    cols = ["date","ticker","model_name","horizon","y_pred"]
+    return copy_upsert(_frame(rows, cols), "predictions", ["date","ticker","model_name","horizon"], conn=conn)
+
+def upsert_evals(rows):
+    if rows is None or len(rows) == 0: return 0
+    cols = ["date","ticker","model_name","horizon","mae","mape","rmse"]
+    return copy_upsert(_frame(rows, cols), "evals", ["date","ticker","model_name","horizon"])
@@ -1,9 +1,7 @@
-from sqlalchemy import Table, MetaData
-from sqlalchemy.dialects.postgresql import insert
 import pandas as pd
-from .conn import get_engine
+from .bulk import copy_upsert
 
-def upsert_predictions(df: pd.DataFrame, chunk = 5000):
+def upsert_predictions(df: pd.DataFrame):
     """
     df columns: ['date', 'ticker', 'model_name', 'horizon', 'y_pred']
     """
@@ -11,23 +9,7 @@ def upsert_predictions(df: pd.DataFrame, chunk = 5000):
         print("No data to upsert.")
         return
 
-    df = df.copy()
-    df['date'] = pd.to_datetime(df['date']).dt.date
+    df = df[['date', 'ticker', 'model_name', 'horizon', 'y_pred']].copy()
+    df['date'] = pd.to_datetime(df['date']).dt.normalize()
 
-    engine = get_engine()
-    md = MetaData()
-    preds = Table('predictions', md, autoload_with=engine)
-
-    with engine.begin() as conn:
-        for i in range(0, len(df), chunk):
-            part = df.iloc[i:i+chunk]
-            if part.empty:
-                continue
-            recs = part.to_dict(orient='records')
-            stmt = insert(preds).values(recs)
-            # PK와 동일한 순서로 지정: (date, ticker, model_name, horizon)
-            stmt = stmt.on_conflict_do_update(
-                index_elements=['date', 'ticker', 'model_name', 'horizon'],
-                set_={'y_pred': stmt.excluded.y_pred}
-            )
-            conn.execute(stmt)
+    copy_upsert(df, 'predictions', ['date', 'ticker', 'model_name', 'horizon'], update_cols=['y_pred'])
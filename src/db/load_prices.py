@@ -1,36 +1,22 @@
 import pandas as pd
-from sqlalchemy import Table, MetaData
-from sqlalchemy.dialects.postgresql import insert
-from .conn import get_engine
-
-def upsert_prices(df: pd.DataFrame, chunk=5000):
-    engine = get_engine()
-    md = MetaData()
-    prices = Table("prices", md, autoload_with=engine)
+from .bulk import copy_upsert
+from .conn import get_table
 
+def upsert_prices(df: pd.DataFrame):
     if "name" not in df.columns:
         try:
-            from pykrx import stock
-            name_map = {t: stock.get_market_ticker_name(t) for t in df["ticker"].dropna().unique()}
+            from src.ingest.names import names_for
+            name_map = names_for(df["ticker"].dropna().unique())
             df = df.copy()
             df["name"] = df["ticker"].map(name_map)
         except Exception:
-            # pykrx 조회 실패 등 예외 시 None으로 채우고 계속 진행
+            # 이름 조회 실패 등 예외 시 None으로 채우고 계속 진행
             df = df.copy()
             df["name"] = None
 
     cols = ["date","ticker","name","open","high","low","close","adj_close","volume","change"]
+    cols = [c for c in cols if c in get_table("prices").c]   # 스키마에 name 컬럼이 없으면 제외
     df = df[cols].copy()
-    df["date"] = pd.to_datetime(df["date"]).dt.date
+    df["date"] = pd.to_datetime(df["date"]).dt.normalize()
 
-    with engine.begin() as conn:
-        for i in range (0, len(df), chunk):
-            part = df.iloc[i:i+chunk]
-            if part.empty:
-                continue
-            recs = part.to_dict(orient="records")
-            stmt = insert(prices).values(recs)
-            stmt = stmt.on_conflict_do_update(
-                index_elements=["ticker", "date"],
-                set_={"name": stmt.excluded.name,"open": stmt.excluded.open,"high": stmt.excluded.high,"low": stmt.excluded.low,"close": stmt.excluded.close,"adj_close": stmt.excluded.adj_close,"volume": stmt.excluded.volume,"change": stmt.excluded.change,})
-            conn.execute(stmt)
\ No newline at end of file
+    copy_upsert(df, "prices", ["ticker", "date"])
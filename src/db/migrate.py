@@ -0,0 +1,355 @@
+# src/db/migrate.py
+"""
+무중단(online) 테이블 재구성 도구
+- 섀도 테이블(<table>__new)을 만들고 → 트리거로 실시간 쓰기를 미러링 → 날짜 구간 배치로 복사
+  → 짧은 잠금 한 번으로 이름 교체(swap). 기존 테이블은 <table>__old로 남김(--drop-old로 삭제)
+- 의존 뷰는 정의를 보관했다가 교체 직후 그대로 다시 만든다
+- compact: prices/predictions/prediction_eval의 numeric → double precision/real, horizon → smallint
+  (date 컬럼은 이미 4바이트 date라 정수 날짜로 바꿔도 이득이 없어 유지)
+- 실행 전/후 테이블 크기와 스캔 시간을 측정해 출력
+
+예) python -m src.db.migrate compact --dry-run
+    python -m src.db.migrate compact --tables prices,predictions --batch-days 90
+    python -m src.db.migrate report
+"""
+from __future__ import annotations
+import argparse
+import time
+from datetime import timedelta
+from sqlalchemy import text
+
+from .conn import get_engine, reset_tables
+from .fast_read import read_frame
+
+BATCH_DAYS = 60   # 복사 배치 = 날짜 구간(일)
+
+# 목표 타입 (현재 타입과 같으면 건너뜀)
+COMPACT_TYPES: dict[str, dict[str, str]] = {
+    "prices": {
+        "open": "double precision", "high": "double precision", "low": "double precision",
+        "close": "double precision", "adj_close": "double precision", "change": "real",
+    },
+    "predictions": {"y_pred": "double precision", "horizon": "smallint"},
+    "prediction_eval": {
+        "y_pred": "double precision", "y_true": "double precision",
+        "abs_err": "double precision", "horizon": "smallint",
+    },
+}
+
+# ---------------------------------------------------------------- 카탈로그 조회
+
+def table_exists(conn, table: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:t) IS NOT NULL"), {"t": table}).scalar()
+
+def column_types(conn, table: str) -> dict[str, str]:
+    rows = conn.execute(text("""
+        SELECT attname, format_type(atttypid, atttypmod)
+        FROM pg_attribute
+        WHERE attrelid = to_regclass(:t) AND attnum > 0 AND NOT attisdropped
+        ORDER BY attnum
+    """), {"t": table}).fetchall()
+    return {n: t for n, t in rows}
+
+def primary_key(conn, table: str) -> list[str]:
+    rows = conn.execute(text("""
+        SELECT a.attname
+        FROM pg_index i
+        JOIN LATERAL unnest(i.indkey) WITH ORDINALITY k(attnum, ord) ON true
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+        WHERE i.indrelid = to_regclass(:t) AND i.indisprimary
+        ORDER BY k.ord
+    """), {"t": table}).fetchall()
+    return [r[0] for r in rows]
+
+def dependent_views(conn, table: str) -> list[tuple[str, str, str]]:
+    """table에 (간접 포함) 의존하는 뷰 [(이름, relkind, 정의)], 생성 순서대로."""
+    rows = conn.execute(text("""
+        WITH RECURSIVE deps(oid, depth) AS (
+            SELECT DISTINCT r.ev_class, 1
+            FROM pg_depend d
+            JOIN pg_rewrite r ON r.oid = d.objid
+            WHERE d.classid = 'pg_rewrite'::regclass
+              AND d.refobjid = to_regclass(:t) AND r.ev_class <> d.refobjid
+            UNION ALL
+            SELECT r.ev_class, deps.depth + 1
+            FROM deps
+            JOIN pg_depend d ON d.refobjid = deps.oid AND d.classid = 'pg_rewrite'::regclass
+            JOIN pg_rewrite r ON r.oid = d.objid
+            WHERE r.ev_class <> deps.oid
+        )
+        SELECT c.oid::regclass::text, c.relkind, pg_get_viewdef(c.oid), MAX(deps.depth) AS depth
+        FROM deps JOIN pg_class c ON c.oid = deps.oid
+        WHERE c.relkind IN ('v', 'm')
+        GROUP BY c.oid, c.relkind
+        ORDER BY depth, 1
+    """), {"t": table}).fetchall()
+    return [(n, k, d) for n, k, d, _ in rows]
+
+def _drop_views(conn, views) -> None:
+    for name, kind, _ in reversed(views):
+        kw = "MATERIALIZED VIEW" if kind == "m" else "VIEW"
+        conn.execute(text(f"DROP {kw} IF EXISTS {name} CASCADE"))
+
+def _create_views(conn, views) -> None:
+    for name, kind, body in views:
+        kw = "MATERIALIZED VIEW" if kind == "m" else "VIEW"
+        conn.execute(text(f"CREATE {kw} {name} AS {body}"))
+
+# ---------------------------------------------------------------- 측정
+
+def report(tables: list[str], label: str = "") -> dict[str, dict]:
+    """테이블별 크기/행수/스캔 시간(집계 쿼리, read_frame 전체 로드)."""
+    eng = get_engine()
+    out: dict[str, dict] = {}
+    for t in tables:
+        with eng.connect() as c:
+            if not table_exists(c, t):
+                continue
+            types = column_types(c, t)
+            size = c.execute(text("SELECT pg_total_relation_size(to_regclass(:t))"), {"t": t}).scalar()
+            nums = [n for n, ty in types.items() if ty in ("numeric", "double precision", "real")]
+            agg = ", ".join(f"sum({n})" for n in nums) or "1"
+            t0 = time.perf_counter()
+            rows = c.execute(text(f"SELECT count(*), {agg} FROM {t}")).fetchone()[0]
+            t_agg = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        df = read_frame(f"SELECT * FROM {t}")
+        t_read = time.perf_counter() - t0
+        out[t] = {"bytes": size, "rows": rows, "agg_s": t_agg, "read_s": t_read,
+                  "mem": int(df.memory_usage(deep=True).sum())}
+        del df
+        print(f"[migrate]{label} {t}: rows={rows} size={size/1e6:.1f}MB "
+              f"agg_scan={t_agg:.2f}s full_read={t_read:.2f}s pandas={out[t]['mem']/1e6:.1f}MB")
+    return out
+
+def _compare(before: dict, after: dict) -> None:
+    for t, b in before.items():
+        a = after.get(t)
+        if not a:
+            continue
+        print(f"[migrate] {t}: size {b['bytes']/1e6:.1f}→{a['bytes']/1e6:.1f}MB "
+              f"({a['bytes']/max(b['bytes'], 1):.0%}), agg_scan {b['agg_s']:.2f}→{a['agg_s']:.2f}s, "
+              f"full_read {b['read_s']:.2f}→{a['read_s']:.2f}s")
+
+# ---------------------------------------------------------------- 온라인 재구성
+
+def _mirror_sql(table: str, shadow: str, cols: list[str], keys: list[str]) -> str:
+    fn = f"_mirror_{table}"
+    key_old = " AND ".join(f"{k} = OLD.{k}" for k in keys)
+    key_changed = " OR ".join(f"OLD.{k} IS DISTINCT FROM NEW.{k}" for k in keys)
+    vals = ", ".join(f"NEW.{c}" for c in cols)
+    sets = ", ".join(f"{c} = EXCLUDED.{c}" for c in cols if c not in keys)
+    action = f"DO UPDATE SET {sets}" if sets else "DO NOTHING"
+    return f"""
+        CREATE OR REPLACE FUNCTION {fn}() RETURNS trigger AS $$
+        BEGIN
+          IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND ({key_changed})) THEN
+            DELETE FROM {shadow} WHERE {key_old};
+          END IF;
+          IF TG_OP = 'DELETE' THEN
+            RETURN OLD;
+          END IF;
+          INSERT INTO {shadow} ({", ".join(cols)}) VALUES ({vals})
+          ON CONFLICT ({", ".join(keys)}) {action};
+          RETURN NEW;
+        END $$ LANGUAGE plpgsql;
+        DROP TRIGGER IF EXISTS {fn} ON {table};
+        CREATE TRIGGER {fn} AFTER INSERT OR UPDATE OR DELETE ON {table}
+        FOR EACH ROW EXECUTE FUNCTION {fn}();
+    """
+
+def _drop_mirror(conn, table: str) -> None:
+    conn.execute(text(f"DROP TRIGGER IF EXISTS _mirror_{table} ON {table}"))
+    conn.execute(text(f"DROP FUNCTION IF EXISTS _mirror_{table}()"))
+
+def copy_in_batches(table: str, shadow: str, cols: list[str], keys: list[str],
+                    batch_days: int = BATCH_DAYS, date_col: str = "date") -> int:
+    """date 구간별로 커밋하며 복사. 이미 미러링된 행은 건드리지 않음."""
+    eng = get_engine()
+    with eng.connect() as c:
+        lo, hi = c.execute(text(f"SELECT MIN({date_col}), MAX({date_col}) FROM {table}")).fetchone()
+    if lo is None:
+        return 0
+    col_sql = ", ".join(cols)
+    sql = text(f"""
+        INSERT INTO {shadow} ({col_sql})
+        SELECT {col_sql} FROM {table}
+        WHERE {date_col} >= :a AND {date_col} < :b
+        ON CONFLICT ({", ".join(keys)}) DO NOTHING
+    """)
+    total, a = 0, lo
+    while a <= hi:
+        b = a + timedelta(days=batch_days)
+        t0 = time.perf_counter()
+        with eng.begin() as c:
+            n = c.execute(sql, {"a": a, "b": b}).rowcount
+        total += n
+        print(f"[migrate] {table} {a}..{b - timedelta(days=1)} copied={n} ({time.perf_counter()-t0:.2f}s)")
+        a = b
+    return total
+
+def _reconcile(conn, table: str, shadow: str, cols: list[str], keys: list[str]) -> None:
+    """
+    (잠금 상태에서) 키 기준으로 섀도를 원본에 맞춤.
+    행 수가 같아도 빠진 키/남는 키가 짝을 이룰 수 있으므로 anti-join은 항상 실행.
+    """
+    on = " AND ".join(f"s.{k} = d.{k}" for k in keys)
+    deleted = conn.execute(text(
+        f"DELETE FROM {shadow} d WHERE NOT EXISTS (SELECT 1 FROM {table} s WHERE {on})"
+    )).rowcount
+    col_sql = ", ".join(cols)
+    inserted = conn.execute(text(f"""
+        INSERT INTO {shadow} ({col_sql})
+        SELECT {", ".join(f"s.{c}" for c in cols)} FROM {table} s
+        WHERE NOT EXISTS (SELECT 1 FROM {shadow} d WHERE {on})
+    """)).rowcount
+    if deleted or inserted:
+        print(f"[migrate] {table}: reconciled (deleted={deleted}, inserted={inserted})")
+
+def _foreign_keys(conn, table: str) -> list[tuple[str, str]]:
+    return conn.execute(text("""
+        SELECT conname, pg_get_constraintdef(oid)
+        FROM pg_constraint WHERE conrelid = to_regclass(:t) AND contype = 'f'
+    """), {"t": table}).fetchall()
+
+def _rename_prefixed(conn, table: str, prefix: str, to: str) -> None:
+    """
+    table의 인덱스(제약 포함)/외래키 이름 앞부분 prefix → to, 끝의 __new 제거.
+    파티션(하위 테이블)과 그 인덱스도 같은 규칙으로.
+    """
+    def _new(name: str) -> str:
+        if name.startswith(prefix + "_"):
+            name = to + name[len(prefix):]
+        return name.removesuffix("__new")
+    for (child,) in conn.execute(text("""
+        SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = to_regclass(:t)
+    """), {"t": table}).fetchall():
+        if _new(child) != child:
+            conn.execute(text(f"ALTER TABLE {child} RENAME TO {_new(child)}"))
+        _rename_prefixed(conn, _new(child), prefix, to)
+    for (idx,) in conn.execute(text("""
+        SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = to_regclass(:t)
+    """), {"t": table}).fetchall():
+        if _new(idx) != idx:
+            conn.execute(text(f"ALTER INDEX {idx} RENAME TO {_new(idx)}"))
+    for con, _ in _foreign_keys(conn, table):
+        if _new(con) != con:
+            conn.execute(text(f"ALTER TABLE {table} RENAME CONSTRAINT {con} TO {_new(con)}"))
+
+def rebuild(table: str, shadow_ddl: str, batch_days: int = BATCH_DAYS, drop_old: bool = False) -> None:
+    """
+    shadow_ddl로 만든 {table}__new에 데이터를 옮기고 이름을 교체.
+    shadow_ddl은 "{shadow}" 자리에 섀도 테이블 이름이 들어갈 DDL (PK 포함).
+    """
+    eng = get_engine()
+    shadow, old = f"{table}__new", f"{table}__old"
+    with eng.begin() as c:
+        incoming = c.execute(text("""
+            SELECT conrelid::regclass::text FROM pg_constraint
+            WHERE confrelid = to_regclass(:t) AND contype = 'f'
+        """), {"t": table}).fetchall()
+        if incoming:
+            raise RuntimeError(f"{table} is referenced by foreign keys from {[r[0] for r in incoming]}")
+        if table_exists(c, old):
+            raise RuntimeError(f"{old} already exists (drop it or pass --drop-old after checking)")
+        cols = list(column_types(c, table))
+        keys = primary_key(c, table)
+        if not keys:
+            raise RuntimeError(f"{table} has no primary key")
+        c.execute(text(f"DROP TABLE IF EXISTS {shadow}"))
+        c.execute(text(shadow_ddl.format(shadow=shadow)))
+        c.execute(text(_mirror_sql(table, shadow, cols, keys)))   # 이후의 쓰기는 섀도에도 반영
+
+    t0 = time.perf_counter()
+    copied = copy_in_batches(table, shadow, cols, keys, batch_days)
+    with eng.begin() as c:
+        # 외래키는 복사 후 한 번에 검증하며 추가 (파티션 테이블은 NOT VALID 외래키 불가)
+        for name, body in _foreign_keys(c, table):
+            c.execute(text(f"ALTER TABLE {shadow} ADD CONSTRAINT {name}__new {body}"))
+        c.execute(text(f"ANALYZE {shadow}"))
+    from .indexes import ensure_indexes   # indexes → partitions → migrate 순환 import 회피
+    ensure_indexes([table], into=shadow)   # 관리 인덱스도 교체 전에 섀도에 (이름은 swap 때 정리)
+    print(f"[migrate] {table}: copied={copied} in {time.perf_counter()-t0:.1f}s, swapping")
+
+    # 교체: 짧은 배타 잠금 한 번
+    with eng.begin() as c:
+        c.execute(text(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE"))
+        _reconcile(c, table, shadow, cols, keys)
+        views = dependent_views(c, table)
+        _drop_views(c, views)
+        _drop_mirror(c, table)
+        c.execute(text(f"ALTER TABLE {table} RENAME TO {old}"))
+        c.execute(text(f"ALTER TABLE {shadow} RENAME TO {table}"))
+        _rename_prefixed(c, old, table, old)       # prices_pkey → prices__old_pkey
+        _rename_prefixed(c, table, shadow, table)  # prices__new_pkey → prices_pkey
+        _create_views(c, views)
+        if drop_old:
+            c.execute(text(f"DROP TABLE {old}"))
+    reset_tables()
+    print(f"[migrate] {table}: swapped (views recreated={len(views)}, old={'dropped' if drop_old else old})")
+
+# ---------------------------------------------------------------- compact 프로파일
+
+def compact_plan(tables: list[str]) -> dict[str, dict[str, tuple[str, str]]]:
+    """{table: {col: (현재 타입, 목표 타입)}} — 바꿀 컬럼만."""
+    plan: dict[str, dict[str, tuple[str, str]]] = {}
+    with get_engine().connect() as c:
+        for t in tables:
+            if not table_exists(c, t):
+                print(f"[migrate] {t}: not found, skip")
+                continue
+            cur = column_types(c, t)
+            diff = {col: (cur[col], ty) for col, ty in COMPACT_TYPES.get(t, {}).items()
+                    if col in cur and cur[col] != ty}
+            if diff:
+                plan[t] = diff
+    return plan
+
+def _shadow_ddl(conn, table: str, changes: dict[str, tuple[str, str]]) -> str:
+    """
+    원본 구조(LIKE, 기본값/제약 포함) + PK + 컬럼 타입만 변경.
+    보조 인덱스는 rebuild의 ensure_indexes가 만듦 (INCLUDING INDEXES면 같은 인덱스가 두 벌)
+    """
+    alters = ", ".join(f"ALTER COLUMN {col} TYPE {ty}" for col, (_, ty) in changes.items())
+    return "; ".join([
+        f"CREATE TABLE {{shadow}} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+        f"ALTER TABLE {{shadow}} ADD PRIMARY KEY ({', '.join(primary_key(conn, table))})",
+        f"ALTER TABLE {{shadow}} {alters}",
+    ])
+
+def compact(tables: list[str], batch_days: int = BATCH_DAYS, dry_run: bool = False,
+            drop_old: bool = False) -> None:
+    plan = compact_plan(tables)
+    for t, diff in plan.items():
+        for col, (cur, ty) in diff.items():
+            print(f"[migrate] {t}.{col}: {cur} → {ty}")
+    if not plan:
+        print("[migrate] already compact")
+        return
+    before = report(list(plan), " before")
+    if dry_run:
+        return
+    for t, diff in plan.items():
+        with get_engine().connect() as c:
+            ddl = _shadow_ddl(c, t, diff)
+        rebuild(t, ddl, batch_days, drop_old)
+    after = report(list(plan), " after")
+    _compare(before, after)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("compact", help="numeric → double precision/real, horizon → smallint")
+    p.add_argument("--tables", type=str, default=",".join(COMPACT_TYPES))
+    p.add_argument("--batch-days", type=int, default=BATCH_DAYS)
+    p.add_argument("--dry-run", action="store_true")
+    p.add_argument("--drop-old", action="store_true", help="drop <table>__old after swap")
+    r = sub.add_parser("report", help="table size / scan time")
+    r.add_argument("--tables", type=str, default=",".join(COMPACT_TYPES))
+    args = ap.parse_args()
+    tables = [x.strip() for x in args.tables.split(",") if x.strip()]
+    if args.cmd == "compact":
+        compact(tables, args.batch_days, args.dry_run, args.drop_old)
+    else:
+        report(tables)
@@ -0,0 +1,123 @@
+# src/db/model_state.py
+"""
+baseline 모델 상태 저장소 (safe_ma_w* / safe_ses_a* 증분 예측용)
+- model_state: (ticker, model_name, horizon)별 실행 상태 + watermark(마지막으로 반영한 종가 날짜)
+  · safe_ma_w*: 최근 w개 종가 링 버퍼(buf, pos) + 합(sum)
+  · safe_ses_a*: 수준(level) + 마지막 종가(buf[1])
+- predict_daily가 watermark 이후 새 거래일만 읽어 상태를 진행하고, 새 예측과 새 상태를
+  같은 트랜잭션에서 저장 → 매일 작업량이 히스토리 길이가 아니라 새 거래일 수에 비례
+- 상태가 없는 (티커, 모델)은 전체 히스토리로 한 번 초기화
+  watermark 이전 종가가 나중에 채워진 티커(n_obs ≠ 그날까지 종가 수, backfill_gaps 등)도 다시 초기화
+- 검증/재구축: python -m src.pipeline.predict_daily --check-state / --rebuild-state
+"""
+from __future__ import annotations
+import re
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from .bulk import copy_upsert
+from .conn import get_engine, reset_tables
+from .migrate import table_exists
+
+STATE_SQL = """
+CREATE TABLE IF NOT EXISTS model_state (
+  ticker      TEXT NOT NULL,
+  model_name  TEXT NOT NULL,
+  horizon     INT  NOT NULL,
+  watermark   DATE NOT NULL,                         -- 마지막으로 반영한 종가 날짜
+  n_obs       BIGINT NOT NULL,                       -- 반영한 종가 수
+  sum         DOUBLE PRECISION,                      -- MA: 버퍼 합
+  level       DOUBLE PRECISION,                      -- SES: 현재 수준
+  buf         DOUBLE PRECISION[] NOT NULL,           -- MA: 링 버퍼 / SES: {마지막 종가}
+  pos         INT NOT NULL DEFAULT 0,                -- MA: 다음에 덮을 칸(0부터)
+  updated_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (ticker, model_name, horizon)
+);
+"""
+
+_MA = re.compile(r"^safe_ma_w(\d+)$")
+_SES = re.compile(r"^safe_ses_a([0-9.]+)$")
+
+def spec(model_name: str) -> tuple[str, float]:
+    """모델 이름 → ("ma", window) / ("ses", alpha)."""
+    m = _MA.match(model_name)
+    if m: return "ma", int(m.group(1))
+    m = _SES.match(model_name)
+    if m: return "ses", float(m.group(1))
+    raise ValueError(f"no incremental state for model: {model_name}")
+
+def ensure_state() -> bool:
+    with get_engine().begin() as c:
+        if table_exists(c, "model_state"):
+            return False
+        c.execute(text(STATE_SQL))
+    reset_tables()
+    return True
+
+def lock(conn) -> None:
+    # 동시에 두 번 돌아도 같은 상태에서 두 번 진행하지 않게 트랜잭션 단위로 직렬화
+    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('model_state'))"))
+
+def empty(model_name: str, n: int) -> dict:
+    kind, p = spec(model_name)
+    return {
+        "watermark": np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]"),
+        "n": np.zeros(n, dtype=np.int64), "sum": np.zeros(n), "level": np.zeros(n),
+        "buf": np.zeros((n, int(p) if kind == "ma" else 1)), "pos": np.zeros(n, dtype=np.int64),
+    }
+
+def load(conn, tickers: list[str], models: list[str], h: int) -> dict[str, dict]:
+    """모델별 상태 배열 (tickers 순서, 상태 없는 티커는 watermark=NaT / n=0)."""
+    df = pd.read_sql(text("""
+        SELECT ticker, model_name, watermark, n_obs, sum, level, buf, pos
+        FROM model_state
+        WHERE horizon = :h AND ticker = ANY(:t) AND model_name = ANY(:m)
+    """), conn, params={"h": h, "t": list(tickers), "m": list(models)})
+    pos = pd.Index(tickers)
+    out = {}
+    for m in models:
+        st = empty(m, len(tickers))
+        g = df[df["model_name"] == m]
+        if not g.empty:
+            ix = pos.get_indexer(g["ticker"])
+            st["watermark"][ix] = pd.to_datetime(g["watermark"]).to_numpy()
+            st["n"][ix] = g["n_obs"].to_numpy()
+            st["sum"][ix] = g["sum"].fillna(0).to_numpy()
+            st["level"][ix] = g["level"].fillna(0).to_numpy()
+            st["buf"][ix] = np.array(g["buf"].tolist(), dtype=float)
+            st["pos"][ix] = g["pos"].to_numpy()
+        out[m] = st
+    return out
+
+def _array_literal(row: np.ndarray) -> str:
+    return "{" + ",".join(repr(float(v)) for v in row) + "}"
+
+def save(conn, states: dict[str, dict], tickers: list[str], h: int, changed: dict | None = None) -> int:
+    """반영한 종가가 있는 (티커, 모델) 상태만 UPSERT. changed: 모델별 바뀐 티커 마스크."""
+    frames = []
+    for m, st in states.items():
+        ok = st["n"] > 0
+        if changed is not None:
+            ok &= changed[m]
+        if not ok.any(): continue
+        kind, _ = spec(m)
+        frames.append(pd.DataFrame({
+            "ticker": np.asarray(tickers, dtype=object)[ok], "model_name": m, "horizon": h,
+            "watermark": pd.to_datetime(st["watermark"][ok]).date,
+            "n_obs": st["n"][ok],
+            "sum": st["sum"][ok] if kind == "ma" else np.nan,
+            "level": st["level"][ok] if kind == "ses" else np.nan,
+            "buf": [_array_literal(b) for b in st["buf"][ok]],
+            "pos": st["pos"][ok],
+        }))
+    if not frames:
+        return 0
+    return copy_upsert(pd.concat(frames, ignore_index=True), "model_state",
+                       ["ticker", "model_name", "horizon"], update_exprs={"updated_at": "now()"}, conn=conn)
+
+def clear(conn, h: int, models: list[str] | None = None) -> int:
+    if models is None:
+        return conn.execute(text("DELETE FROM model_state WHERE horizon = :h"), {"h": h}).rowcount
+    return conn.execute(text("DELETE FROM model_state WHERE horizon = :h AND model_name = ANY(:m)"),
+                        {"h": h, "m": list(models)}).rowcount
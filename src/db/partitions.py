@@ -0,0 +1,189 @@
+# src/db/partitions.py
+"""
+날짜 범위 파티셔닝 (prices / predictions / evaluations / prediction_eval)
+- PARTITION_GRAIN=year(기본) → <table>_y2024, month → <table>_m202401, 범위 밖은 <table>_default
+- ensure: 앞으로 쓸 파티션을 미리 생성 (io.ensure_schema에서 매번 호출, 이미 있으면 no-op)
+  default 파티션에 해당 구간 행이 있으면 새 파티션으로 옮긴 뒤 붙임
+- migrate: 기존 일반 테이블 → 파티션 테이블 (src.db.migrate의 섀도 테이블 + 배치 복사 + swap)
+- detach: 오래된 파티션 분리(DETACH ... CONCURRENTLY), --archive면 archive 스키마로 이동
+
+예) python -m src.db.partitions migrate --tables prices,predictions
+    python -m src.db.partitions ensure --ahead 1
+    python -m src.db.partitions detach --before 2020-01-01 --archive
+    python -m src.db.partitions list
+"""
+from __future__ import annotations
+import argparse
+import os
+from datetime import date
+from sqlalchemy import text
+
+from .conn import get_engine, reset_tables
+from .migrate import BATCH_DAYS, primary_key, rebuild, table_exists
+
+PARTITIONED = ("prices", "predictions", "evaluations", "prediction_eval")
+PARTITION_KEY = "date"
+GRAIN = os.getenv("PARTITION_GRAIN", "year")   # year / month
+AHEAD = int(os.getenv("PARTITION_AHEAD", "1"))  # 현재 이후로 미리 만들 구간 수
+ARCHIVE_SCHEMA = "archive"
+
+def _floor(d: date, grain: str = GRAIN) -> date:
+    return date(d.year, 1, 1) if grain == "year" else date(d.year, d.month, 1)
+
+def _next(d: date, grain: str = GRAIN) -> date:
+    if grain == "year":
+        return date(d.year + 1, 1, 1)
+    return date(d.year + (d.month == 12), d.month % 12 + 1, 1)
+
+def _name(table: str, start: date, grain: str = GRAIN) -> str:
+    return f"{table}_y{start:%Y}" if grain == "year" else f"{table}_m{start:%Y%m}"
+
+def _ranges(first: date, last: date, grain: str = GRAIN) -> list[tuple[date, date]]:
+    out, a = [], _floor(first, grain)
+    while a <= last:
+        b = _next(a, grain)
+        out.append((a, b))
+        a = b
+    return out
+
+def _horizon_end(ahead: int = AHEAD, grain: str = GRAIN) -> date:
+    d = _floor(date.today(), grain)
+    for _ in range(ahead):
+        d = _next(d, grain)
+    return d
+
+def is_partitioned(conn, table: str) -> bool:
+    return bool(conn.execute(text("""
+        SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:t))
+    """), {"t": table}).scalar())
+
+def list_partitions(conn, table: str) -> list[tuple[str, str]]:
+    """[(파티션 이름, 범위 표현식)]"""
+    return conn.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:t)
+        ORDER BY 1
+    """), {"t": table}).fetchall()
+
+def ensure_partitions(tables=PARTITIONED, ahead: int = AHEAD) -> int:
+    """파티션 테이블마다 (기존 최소 구간 ~ 현재+ahead) 파티션이 모두 있도록. 만든 개수 반환."""
+    made = 0
+    eng = get_engine()
+    for t in tables:
+        with eng.begin() as c:
+            if not table_exists(c, t) or not is_partitioned(c, t):
+                continue
+            have = {name for name, _ in list_partitions(c, t)}
+            lo = c.execute(text(f"SELECT MIN({PARTITION_KEY}) FROM {t}")).scalar() or date.today()
+            default = f"{t}_default"
+            for a, b in _ranges(lo, _horizon_end(ahead)):
+                name = _name(t, a)
+                if name in have:
+                    continue
+                # default에 이미 들어간 행이 있으면 옮긴 뒤 ATTACH
+                c.execute(text(f"CREATE TABLE {name} (LIKE {t} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+                if default in have:
+                    c.execute(text(f"""
+                        WITH moved AS (
+                            DELETE FROM {default}
+                            WHERE {PARTITION_KEY} >= :a AND {PARTITION_KEY} < :b
+                            RETURNING *
+                        )
+                        INSERT INTO {name} SELECT * FROM moved
+                    """), {"a": a, "b": b})
+                c.execute(text(f"ALTER TABLE {t} ATTACH PARTITION {name} FOR VALUES FROM ('{a}') TO ('{b}')"))
+                print(f"[partitions] created {name} [{a}, {b})")
+                made += 1
+    return made
+
+def _partitioned_ddl(conn, table: str) -> str:
+    """migrate.rebuild용 섀도 DDL: 원본 구조 + RANGE 파티션 + PK + 구간별 파티션 + default."""
+    keys = primary_key(conn, table)
+    if PARTITION_KEY not in keys:
+        raise RuntimeError(f"{table}: primary key {keys} must include {PARTITION_KEY}")
+    lo = conn.execute(text(f"SELECT MIN({PARTITION_KEY}) FROM {table}")).scalar() or date.today()
+    parts = [
+        f"CREATE TABLE {{shadow}}_{_name(table, a)[len(table) + 1:]} PARTITION OF {{shadow}} "
+        f"FOR VALUES FROM ('{a}') TO ('{b}')"
+        for a, b in _ranges(lo, _horizon_end())
+    ]
+    return "; ".join([
+        f"CREATE TABLE {{shadow}} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        f"PARTITION BY RANGE ({PARTITION_KEY})",
+        f"ALTER TABLE {{shadow}} ADD PRIMARY KEY ({', '.join(keys)})",
+        *parts,
+        "CREATE TABLE {shadow}_default PARTITION OF {shadow} DEFAULT",
+    ])
+
+def migrate(tables=PARTITIONED, batch_days: int = BATCH_DAYS, drop_old: bool = False) -> None:
+    eng = get_engine()
+    for t in tables:
+        with eng.connect() as c:
+            if not table_exists(c, t):
+                print(f"[partitions] {t}: not found, skip")
+                continue
+            if is_partitioned(c, t):
+                print(f"[partitions] {t}: already partitioned")
+                continue
+            ddl = _partitioned_ddl(c, t)
+        rebuild(t, ddl, batch_days, drop_old)
+        with eng.connect() as c:
+            print(f"[partitions] {t}: {len(list_partitions(c, t))} partitions")
+
+def detach_before(before: date, tables=PARTITIONED, archive: bool = False) -> list[str]:
+    """상한이 before 이하인 파티션을 분리. archive면 archive 스키마로 옮겨 보관."""
+    out = []
+    eng = get_engine().execution_options(isolation_level="AUTOCOMMIT")   # CONCURRENTLY는 트랜잭션 밖
+    with eng.connect() as c:
+        if archive:
+            c.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+        for t in tables:
+            if not table_exists(c, t) or not is_partitioned(c, t):
+                continue
+            rows = c.execute(text("""
+                SELECT c.relname
+                FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = to_regclass(:t)
+                  AND NOT c.relpartbound IS NULL
+                  AND pg_get_expr(c.relpartbound, c.oid) <> 'DEFAULT'
+                  AND (regexp_match(pg_get_expr(c.relpartbound, c.oid), 'TO \\(''([0-9-]+)''\\)'))[1]::date <= :d
+                ORDER BY 1
+            """), {"t": t, "d": before}).fetchall()
+            # default 파티션이 있으면 CONCURRENTLY 불가 → 짧은 잠금의 일반 DETACH
+            mode = "" if f"{t}_default" in {n for n, _ in list_partitions(c, t)} else " CONCURRENTLY"
+            for (name,) in rows:
+                c.execute(text(f"ALTER TABLE {t} DETACH PARTITION {name}{mode}"))
+                if archive:
+                    c.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+                print(f"[partitions] detached {name}{' → ' + ARCHIVE_SCHEMA if archive else ''}")
+                out.append(name)
+    reset_tables()
+    return out
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("migrate", help="convert plain tables to range-partitioned tables")
+    p.add_argument("--tables", type=str, default=",".join(PARTITIONED))
+    p.add_argument("--batch-days", type=int, default=BATCH_DAYS)
+    p.add_argument("--drop-old", action="store_true")
+    e = sub.add_parser("ensure", help="create missing/future partitions")
+    e.add_argument("--ahead", type=int, default=AHEAD)
+    d = sub.add_parser("detach", help="detach partitions that end on/before a date")
+    d.add_argument("--before", type=str, required=True, help="YYYY-MM-DD")
+    d.add_argument("--archive", action="store_true", help=f"move detached partitions to schema {ARCHIVE_SCHEMA}")
+    sub.add_parser("list")
+    args = ap.parse_args()
+    if args.cmd == "migrate":
+        migrate([x.strip() for x in args.tables.split(",") if x.strip()], args.batch_days, args.drop_old)
+    elif args.cmd == "ensure":
+        print(f"[partitions] created={ensure_partitions(ahead=args.ahead)}")
+    elif args.cmd == "detach":
+        detach_before(date.fromisoformat(args.before), archive=args.archive)
+    else:
+        with get_engine().connect() as c:
+            for t in PARTITIONED:
+                if table_exists(c, t) and is_partitioned(c, t):
+                    for name, bound in list_partitions(c, t):
+                        print(f"{t}\t{name}\t{bound}")
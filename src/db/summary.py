@@ -0,0 +1,273 @@
+# src/db/summary.py
+"""
+평가 요약 테이블 (prediction_eval → 메트릭/리더보드)
+- prediction_metrics_state: (ticker, model_name, horizon)별 누적 합/개수 — 전체 + 최근 250 거래일 창
+- prediction_window: 티커별 250 거래일 창의 시작일 (prediction_eval의 서로 다른 날짜 기준)
+- eval 단계가 prediction_eval을 덮어쓸 때 같은 트랜잭션에서 바뀐 구간만 빼고/더함
+  (덮어쓰기 전 값 −, 새 값 +, 창에서 밀려난 날짜 −) → 조회는 히스토리가 아니라 티커×모델 크기
+- prediction_metrics / prediction_leaderboard / last250_dates 뷰는 이 테이블 위에서 정의
+  (sql/schema_views_fix.sql과 동일, 요약 테이블이 처음 생길 때 한 번 교체)
+- eval 밖에서 prediction_eval을 지우거나 고친 경우(파티션 detach 등)에는 --rebuild
+
+예) python -m src.db.summary --rebuild
+    python -m src.db.summary --check
+"""
+from __future__ import annotations
+import argparse
+import time
+from datetime import date
+from sqlalchemy import text
+
+from .conn import get_engine, reset_tables
+from .fast_read import read_frame
+from .migrate import table_exists
+
+WINDOW_DATES = 250   # 최근 창 = 티커별 마지막 250 거래일
+
+SUMMARY_SQL = """
+CREATE TABLE IF NOT EXISTS prediction_metrics_state (
+  ticker      TEXT NOT NULL,
+  model_name  TEXT NOT NULL,
+  horizon     INT  NOT NULL,
+  n_rows      BIGINT NOT NULL DEFAULT 0,             -- 평가 행 수
+  n_err       BIGINT NOT NULL DEFAULT 0,             -- abs_err가 있는 행 수
+  sum_err     DOUBLE PRECISION NOT NULL DEFAULT 0,
+  n_dir       BIGINT NOT NULL DEFAULT 0,             -- dir_correct = true 행 수
+  n_rows_250  BIGINT NOT NULL DEFAULT 0,             -- 이하 최근 250 거래일 창
+  n_err_250   BIGINT NOT NULL DEFAULT 0,
+  sum_err_250 DOUBLE PRECISION NOT NULL DEFAULT 0,
+  n_dir_250   BIGINT NOT NULL DEFAULT 0,
+  updated_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (ticker, model_name, horizon)
+);
+
+CREATE TABLE IF NOT EXISTS prediction_window (
+  ticker      TEXT PRIMARY KEY,
+  start_date  DATE NOT NULL,                         -- 창의 첫 거래일
+  updated_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+"""
+
+VIEWS_SQL = """
+DROP VIEW IF EXISTS public.last250_dates CASCADE;
+CREATE VIEW public.last250_dates AS
+SELECT DISTINCT e.ticker, e.date
+FROM public.prediction_eval e
+JOIN public.prediction_window w ON w.ticker = e.ticker AND e.date >= w.start_date;
+
+DROP VIEW IF EXISTS public.prediction_metrics CASCADE;
+CREATE VIEW public.prediction_metrics AS
+SELECT
+  ticker,
+  model_name,
+  horizon,
+  sum_err / NULLIF(n_err, 0)                 AS mae_all,
+  n_dir::float / NULLIF(n_rows, 0)           AS acc_all,
+  sum_err_250 / NULLIF(n_err_250, 0)         AS mae_250d,
+  n_dir_250::float / NULLIF(n_rows_250, 0)   AS acc_250d
+FROM public.prediction_metrics_state
+WHERE n_rows > 0;
+
+DROP VIEW IF EXISTS public.prediction_leaderboard CASCADE;
+CREATE VIEW public.prediction_leaderboard AS
+SELECT
+  model_name,
+  horizon,
+  SUM(sum_err) / NULLIF(SUM(n_err), 0)                AS mae_all,
+  SUM(n_dir)::float / NULLIF(SUM(n_rows), 0)          AS acc_all,
+  SUM(sum_err_250) / NULLIF(SUM(n_err_250), 0)        AS mae_250d,
+  SUM(n_dir_250)::float / NULLIF(SUM(n_rows_250), 0)  AS acc_250d
+FROM public.prediction_metrics_state
+GROUP BY model_name, horizon;
+"""
+
+# 창 시작일: 티커의 서로 다른 날짜 중 최근 WINDOW_DATES번째 ((ticker, date) 인덱스 역순)
+_WINDOW_START = f"""
+    (SELECT MIN(x.date) FROM (
+        SELECT DISTINCT e.date FROM prediction_eval e
+        WHERE e.ticker = t.ticker ORDER BY e.date DESC LIMIT {WINDOW_DATES}
+    ) x)
+"""
+
+_SUMS = """
+    SUM(a), SUM(a * (abs_err IS NOT NULL)::int), SUM(a * COALESCE(abs_err, 0)),
+    SUM(a * COALESCE(dir_correct, false)::int),
+    SUM(b), SUM(b * (abs_err IS NOT NULL)::int), SUM(b * COALESCE(abs_err, 0)),
+    SUM(b * COALESCE(dir_correct, false)::int)
+"""
+
+def _hs(h) -> list[int]:
+    # horizon 하나 또는 목록
+    return [int(x) for x in h] if isinstance(h, (list, tuple)) else [int(h)]
+
+_STATE_COLS = ("n_rows", "n_err", "sum_err", "n_dir", "n_rows_250", "n_err_250", "sum_err_250", "n_dir_250")
+
+def ensure_summary() -> bool:
+    """요약 테이블이 없으면 만들고 전체 계산 + 뷰 교체. 새로 만들었으면 True."""
+    with get_engine().begin() as c:
+        if table_exists(c, "prediction_metrics_state") or not table_exists(c, "prediction_eval"):
+            return False
+        c.execute(text(SUMMARY_SQL))
+    rebuild()
+    with get_engine().begin() as c:
+        c.execute(text(VIEWS_SQL))
+    reset_tables()
+    return True
+
+def _lock(conn) -> None:
+    # eval이 동시에 돌아도 누적 합이 꼬이지 않게 트랜잭션 단위로 직렬화
+    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('prediction_metrics_state'))"))
+
+def stage_old(conn, h, since: date | None) -> None:
+    """prediction_eval을 덮어쓰기 전에 바뀔 구간(horizon ∈ h, date>=since)의 옛 값을 임시 테이블로."""
+    _lock(conn)
+    conn.execute(text("""
+        CREATE TEMP TABLE _eval_old ON COMMIT DROP AS
+        SELECT ticker, model_name, horizon, date, abs_err::float8 AS abs_err, dir_correct
+        FROM prediction_eval
+        WHERE horizon = ANY(:hs) AND date >= :since
+    """), {"hs": _hs(h), "since": since or date.min})
+
+def apply_delta(conn, h, since: date | None) -> int:
+    """
+    stage_old → prediction_eval 쓰기 뒤에 호출. 바뀐 티커의 창 시작일을 다시 구하고
+    (새 값 − 옛 값) + (창 경계가 움직인 구간의 안 바뀐 행 ±)을 누적 합에 반영. 갱신된 키 수 반환.
+    """
+    p = {"hs": _hs(h), "since": since or date.min}
+    conn.execute(text(f"""
+        CREATE TEMP TABLE _win ON COMMIT DROP AS
+        SELECT t.ticker,
+               COALESCE(w.start_date, 'infinity'::date) AS w0,
+               COALESCE({_WINDOW_START}, 'infinity'::date) AS w1
+        FROM (
+            SELECT ticker FROM _eval_old
+            UNION
+            SELECT ticker FROM prediction_eval WHERE horizon = ANY(:hs) AND date >= :since
+        ) t
+        LEFT JOIN prediction_window w ON w.ticker = t.ticker
+    """), p)
+    sets = ", ".join(f"{c} = s.{c} + EXCLUDED.{c}" for c in _STATE_COLS)
+    n = conn.execute(text(f"""
+        INSERT INTO prediction_metrics_state AS s
+            (ticker, model_name, horizon, {", ".join(_STATE_COLS)})
+        SELECT ticker, model_name, horizon, {_SUMS}
+        FROM (
+            -- 바뀐 구간: 새 값 +
+            SELECT e.ticker, e.model_name, e.horizon, e.abs_err::float8 AS abs_err, e.dir_correct,
+                   1 AS a, (e.date >= w.w1)::int AS b
+            FROM prediction_eval e JOIN _win w ON w.ticker = e.ticker
+            WHERE e.horizon = ANY(:hs) AND e.date >= :since
+            UNION ALL
+            -- 바뀐 구간: 옛 값 −
+            SELECT o.ticker, o.model_name, o.horizon, o.abs_err, o.dir_correct,
+                   -1, -(o.date >= w.w0)::int
+            FROM _eval_old o JOIN _win w ON w.ticker = o.ticker
+            UNION ALL
+            -- 안 바뀐 행 중 창 경계 사이: 창이 앞으로 가면 −, 뒤로 가면 +
+            SELECT e.ticker, e.model_name, e.horizon, e.abs_err::float8, e.dir_correct,
+                   0, CASE WHEN e.date >= w.w1 THEN 1 ELSE -1 END
+            FROM prediction_eval e JOIN _win w ON w.ticker = e.ticker
+            WHERE e.date >= LEAST(w.w0, w.w1) AND e.date < GREATEST(w.w0, w.w1)
+              AND NOT (e.horizon = ANY(:hs) AND e.date >= :since)
+        ) d
+        GROUP BY ticker, model_name, horizon
+        ON CONFLICT (ticker, model_name, horizon) DO UPDATE SET {sets}, updated_at = now()
+    """), p).rowcount
+    conn.execute(text("DELETE FROM prediction_metrics_state WHERE n_rows = 0"))
+    conn.execute(text("""
+        DELETE FROM prediction_window w USING _win
+        WHERE w.ticker = _win.ticker AND _win.w1 = 'infinity'
+    """))
+    conn.execute(text("""
+        INSERT INTO prediction_window (ticker, start_date)
+        SELECT ticker, w1 FROM _win WHERE w1 <> 'infinity'
+        ON CONFLICT (ticker) DO UPDATE SET start_date = EXCLUDED.start_date, updated_at = now()
+    """))
+    return n
+
+def rebuild() -> None:
+    """prediction_eval 전체에서 다시 계산 (한 트랜잭션, DELETE라 그동안 읽기는 이전 값으로 계속 가능)."""
+    t0 = time.perf_counter()
+    with get_engine().begin() as c:
+        _lock(c)
+        c.execute(text("DELETE FROM prediction_metrics_state"))
+        c.execute(text("DELETE FROM prediction_window"))
+        c.execute(text(f"""
+            INSERT INTO prediction_window (ticker, start_date)
+            SELECT ticker, MIN(date)
+            FROM (
+                SELECT ticker, date, ROW_NUMBER() OVER (PARTITION BY ticker ORDER BY date DESC) AS rn
+                FROM (SELECT DISTINCT ticker, date FROM prediction_eval) d
+            ) r
+            WHERE rn <= {WINDOW_DATES}
+            GROUP BY ticker
+        """))
+        n = c.execute(text(f"""
+            INSERT INTO prediction_metrics_state
+                (ticker, model_name, horizon, {", ".join(_STATE_COLS)})
+            SELECT ticker, model_name, horizon, {_SUMS}
+            FROM (
+                SELECT e.ticker, e.model_name, e.horizon, e.abs_err::float8 AS abs_err, e.dir_correct,
+                       1 AS a, (e.date >= w.start_date)::int AS b
+                FROM prediction_eval e LEFT JOIN prediction_window w ON w.ticker = e.ticker
+            ) d
+            GROUP BY ticker, model_name, horizon
+        """)).rowcount
+    print(f"[summary] rebuilt keys={n} ({time.perf_counter()-t0:.1f}s)")
+
+def report(h: int = 1, like: str = "safe_dl_%"):
+    """같은 계열 모델(기본: DL) 나란히 비교: model_name, n_rows, mae, acc, mae_250d, acc_250d."""
+    with get_engine().connect() as c:
+        if not table_exists(c, "prediction_metrics_state"):
+            return []
+        return c.execute(text("""
+            SELECT model_name, SUM(n_rows) AS n_rows,
+                   SUM(sum_err) / NULLIF(SUM(n_err), 0)                AS mae,
+                   SUM(n_dir)::float / NULLIF(SUM(n_rows), 0)          AS acc,
+                   SUM(sum_err_250) / NULLIF(SUM(n_err_250), 0)        AS mae_250d,
+                   SUM(n_dir_250)::float / NULLIF(SUM(n_rows_250), 0)  AS acc_250d
+            FROM prediction_metrics_state
+            WHERE horizon = :h AND model_name LIKE :like
+            GROUP BY model_name
+            ORDER BY model_name
+        """), {"h": h, "like": like}).fetchall()
+
+def check() -> float:
+    """요약 테이블 기반 메트릭과 prediction_eval 직접 계산(원래 뷰 정의)의 최대 상대 차이."""
+    direct = read_frame(f"""
+        WITH l AS (
+            SELECT ticker, date FROM (
+                SELECT ticker, date, ROW_NUMBER() OVER (PARTITION BY ticker ORDER BY date DESC) AS rn
+                FROM (SELECT DISTINCT ticker, date FROM prediction_eval) d
+            ) r WHERE rn <= {WINDOW_DATES}
+        )
+        SELECT e.ticker, e.model_name, e.horizon,
+               AVG(e.abs_err)::float AS mae_all,
+               AVG(CASE WHEN e.dir_correct THEN 1 ELSE 0 END)::float AS acc_all,
+               AVG(CASE WHEN l.date IS NOT NULL THEN e.abs_err END)::float AS mae_250d,
+               AVG(CASE WHEN l.date IS NOT NULL THEN CASE WHEN e.dir_correct THEN 1 ELSE 0 END END)::float AS acc_250d
+        FROM prediction_eval e LEFT JOIN l ON l.ticker = e.ticker AND l.date = e.date
+        GROUP BY e.ticker, e.model_name, e.horizon
+    """)
+    keys = ["ticker", "model_name", "horizon"]
+    summ = read_frame("SELECT * FROM prediction_metrics")
+    m = direct.merge(summ, on=keys, how="outer", suffixes=("", "_s"), indicator=True)
+    cols = ("mae_all", "acc_all", "mae_250d", "acc_250d")
+    missing = int((m["_merge"] != "both").sum()) + sum(int((m[c].isna() != m[c + "_s"].isna()).sum()) for c in cols)
+    # 누적 합의 부동소수 오차는 값 크기에 비례 → 상대 오차로 비교
+    diff = max(
+        float(((m[c] - m[c + "_s"]).abs() / m[c].abs().clip(lower=1.0)).max()) if m[c].notna().any() else 0.0
+        for c in cols
+    )
+    print(f"[summary] keys={len(direct)} missing={missing} max_rel_diff={diff:.3g}")
+    return diff if missing == 0 else float("inf")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rebuild", action="store_true", help="recompute from prediction_eval")
+    ap.add_argument("--check", action="store_true", help="compare against a direct recomputation")
+    args = ap.parse_args()
+    if not ensure_summary() and args.rebuild:
+        rebuild()
+    if args.check and check() > 1e-9:
+        raise SystemExit(1)
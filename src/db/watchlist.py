@@ -47,14 +47,13 @@ def list_watchlist_df() -> pd.DataFrame:
     - prices 최신 name 하나 조인 (없는 경우 NULL)"""
     eng = get_engine()
     sql = text("""
-        WITH latest_name AS (
-            SELECT DISTINCT ON (ticker) ticker, name
-            FROM prices
-            ORDER BY ticker, date DESC)
-               
         SELECT w.ticker, ln.name, w.created_at
         FROM watchlist w
-        LEFT JOIN latest_name ln USING (ticker)
+        LEFT JOIN LATERAL (   -- 관심종목마다 최신 한 행만 (prices 전체 DISTINCT ON 없음)
+            SELECT name FROM prices p
+            WHERE p.ticker = w.ticker
+            ORDER BY date DESC LIMIT 1
+        ) ln ON true
         ORDER BY w.created_at DESC""")
     with eng.connect() as conn:
         df = pd.read_sql(sql, conn)
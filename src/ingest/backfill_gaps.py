@@ -0,0 +1,203 @@
+# src/ingest/backfill_gaps.py
+"""
+prices 결측 구간(gap) 탐지 + 최소 수집 계획 + 백필
+- 거래일 캘린더 × 티커 유니버스 대비 prices에 없는 (ticker, 거래일) 칸을 한 번의 쿼리로 찾음
+  (티커별 첫 적재일 이전은 상장 전으로 보고 제외, 적재 이력이 없으면 --since부터)
+- 같은 날 빠진 티커가 많으면 그날은 전종목 스냅샷 1회로, 나머지는 티커별 연속 구간으로 병합
+- 계획을 먼저 출력하고(--dry-run이면 여기서 종료), 수집 후 채운 구간의 change를 재계산
+
+예) python -m src.ingest.backfill_gaps --since 2023-01-01 --dry-run
+"""
+from __future__ import annotations
+import argparse
+from datetime import date
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from src.db.conn import get_engine
+from src.db.io import upsert_prices
+from src.ingest.fetcher import Fetcher
+from src.ingest.incremental_prices import BATCH_ROWS, PRICE_COLS, _fetch_prices_api
+from src.ingest.snapshot import collect_snapshots
+from src.ingest.trading_calendar import last_closed_session, sessions
+
+SNAPSHOT_MIN = 20   # 하루에 이만큼 이상 빠졌으면 스냅샷 1회로 처리
+
+def find_missing(since: date, until: date, tickers: list[str] | None = None) -> pd.DataFrame:
+    """(ticker, date) 결측 칸. 세트 기반 단일 쿼리."""
+    cal = sessions(since, until)
+    if not cal:
+        return pd.DataFrame(columns=["ticker", "date"])
+    sql = text("""
+        WITH cal AS (
+            SELECT unnest(CAST(:cal AS date[])) AS date
+        ),
+        uni AS (
+            SELECT t.ticker,
+                   GREATEST(COALESCE(f.first_d, CAST(:since AS date)), CAST(:since AS date)) AS first_d
+            FROM tickers t
+            LEFT JOIN LATERAL (
+                SELECT MIN(date) AS first_d FROM prices p WHERE p.ticker = t.ticker
+            ) f ON true
+            WHERE CAST(:tickers AS text[]) IS NULL OR t.ticker = ANY(CAST(:tickers AS text[]))
+        )
+        SELECT u.ticker, c.date
+        FROM uni u
+        JOIN cal c ON c.date >= u.first_d
+        LEFT JOIN prices p ON p.ticker = u.ticker AND p.date = c.date
+        WHERE p.ticker IS NULL
+        ORDER BY u.ticker, c.date
+    """)
+    with get_engine().connect() as c:
+        rows = c.execute(sql, {"cal": cal, "since": since, "tickers": tickers}).fetchall()
+    return pd.DataFrame(rows, columns=["ticker", "date"])
+
+def plan_backfill(missing: pd.DataFrame, cal: list[date], snapshot_min: int = SNAPSHOT_MIN,
+                  merge_gap: int = 0) -> tuple[list[date], pd.DataFrame]:
+    """
+    결측 칸 → (스냅샷 날짜 목록, 티커별 구간 DataFrame[ticker, start, end, sessions])
+    - merge_gap: 이 개수 이하의 거래일만큼 떨어진 구간은 하나로 합침(호출 수 ↓, 중복 수집 약간 ↑)
+    """
+    empty = pd.DataFrame(columns=["ticker", "start", "end", "sessions"])
+    if missing.empty:
+        return [], empty
+    per_day = missing.groupby("date")["ticker"].size()
+    snap_dates = sorted(per_day[per_day >= snapshot_min].index)
+    rest = missing[~missing["date"].isin(set(snap_dates))]
+    if rest.empty:
+        return snap_dates, empty
+
+    pos = {d: i for i, d in enumerate(cal)}
+    rest = rest.assign(i=rest["date"].map(pos)).sort_values(["ticker", "i"])
+    step = rest.groupby("ticker")["i"].diff()
+    run_id = (step.isna() | (step > merge_gap + 1)).cumsum()
+    ranges = rest.groupby(run_id).agg(
+        ticker=("ticker", "first"), start=("date", "first"), end=("date", "last"),
+        sessions=("i", lambda s: int(s.iloc[-1] - s.iloc[0] + 1)),
+    )
+    return snap_dates, ranges.reset_index(drop=True)
+
+def report(missing: pd.DataFrame, snap_dates: list[date], ranges: pd.DataFrame) -> None:
+    n_cells = len(missing)
+    n_tk = missing["ticker"].nunique() if n_cells else 0
+    calls = len(snap_dates) + len(ranges)
+    print(f"[gaps] missing cells={n_cells} tickers={n_tk}")
+    print(f"[gaps] plan: snapshot dates={len(snap_dates)} ticker ranges={len(ranges)} "
+          f"→ api calls={calls} (naive per-cell={n_cells})")
+    for d in snap_dates[:10]:
+        print(f"[gaps]   snapshot {d}")
+    for r in ranges.head(20).itertuples(index=False):
+        print(f"[gaps]   {r.ticker} {r.start}..{r.end} sessions={r.sessions}")
+    if len(ranges) > 20:
+        print(f"[gaps]   ... +{len(ranges) - 20} ranges")
+
+def _recompute_change(since_map: dict[str, date]) -> int:
+    """
+    채운 구간(과 그 다음 행)의 change를 직전 유효 종가 기준으로 다시 계산.
+    incremental_prices._with_change와 같은 규칙: 종가 0/결측 행은 기준가로 쓰지 않고 그 앞 유효 종가를 이어 씀
+    """
+    if not since_map:
+        return 0
+    sql = text("""
+        WITH s AS (
+            SELECT unnest(CAST(:tks AS text[])) AS ticker, unnest(CAST(:ds AS date[])) AS since
+        ),
+        w AS (
+            SELECT ticker, date, since,
+                   CASE WHEN prev_close IS NULL OR close IS NULL OR close = 0 THEN NULL
+                        ELSE (close - prev_close) / prev_close END AS new_change
+            FROM (
+                -- 직전 행의 '그때까지 마지막 유효 종가' = 이 행의 직전 유효 종가
+                SELECT ticker, date, close, since,
+                       LAG(carried) OVER (PARTITION BY ticker ORDER BY date) AS prev_close
+                FROM (
+                    SELECT ticker, date, close, since, MAX(v) OVER (PARTITION BY ticker, grp) AS carried
+                    FROM (
+                        SELECT p.ticker, p.date, p.close, s.since, NULLIF(p.close, 0) AS v,
+                               COUNT(NULLIF(p.close, 0)) OVER (PARTITION BY p.ticker ORDER BY p.date) AS grp
+                        FROM prices p
+                        JOIN s ON s.ticker = p.ticker
+                    ) g
+                ) c
+            ) x
+        )
+        UPDATE prices p
+        SET change = w.new_change
+        FROM w
+        WHERE p.ticker = w.ticker AND p.date = w.date AND w.date >= w.since
+          AND p.change IS DISTINCT FROM w.new_change   -- 실제로 바뀌는 행만 기록
+    """)
+    with get_engine().begin() as c:
+        res = c.execute(sql, {"tks": list(since_map), "ds": list(since_map.values())})
+    return res.rowcount
+
+def run(since: date, until: date | None = None, tickers: list[str] | None = None,
+        snapshot_min: int = SNAPSHOT_MIN, merge_gap: int = 0, dry_run: bool = False,
+        workers: int | None = None, rps: float | None = None) -> None:
+    until = until or last_closed_session()
+    cal = sessions(since, until)
+    missing = find_missing(since, until, tickers)
+    snap_dates, ranges = plan_backfill(missing, cal, snapshot_min, merge_gap)
+    report(missing, snap_dates, ranges)
+    if dry_run or missing.empty:
+        return
+
+    want = set(zip(missing["ticker"], missing["date"]))
+    fetcher = Fetcher(workers=workers, rps=rps)
+    total = 0
+    buf: list[pd.DataFrame] = []
+    n_buf = 0
+
+    def _take(df: pd.DataFrame) -> None:
+        nonlocal total, buf, n_buf
+        keep = np.fromiter(((t, d) in want for t, d in zip(df["ticker"], df["date"])), bool, len(df))
+        df = df[keep].assign(change=None)
+        buf.append(df.reindex(columns=PRICE_COLS))
+        n_buf += len(df)
+        if n_buf >= BATCH_ROWS:
+            total += upsert_prices(pd.concat(buf, ignore_index=True))
+            buf, n_buf = [], 0
+
+    # 1) 스냅샷 날짜: 하루 1회 호출
+    if snap_dates:
+        uni = missing.loc[missing["date"].isin(set(snap_dates)), "ticker"].unique()
+        for df in collect_snapshots(snap_dates, uni, None, fetcher):
+            _take(df)
+
+    # 2) 티커별 연속 구간
+    jobs = [(i, "pykrx", _fetch_prices_api, (r.ticker, r.start, r.end))
+            for i, r in enumerate(ranges.itertuples(index=False))]
+    for i, df, err in fetcher.map(jobs):
+        t = ranges.iloc[i]["ticker"]
+        if err is not None:
+            print(f"[gaps][WARN] {t} fetch failed: {err}")
+            continue
+        if df is None or df.empty:
+            continue
+        _take(df.assign(ticker=t))
+    if buf:
+        total += upsert_prices(pd.concat(buf, ignore_index=True))
+
+    since_map = missing.groupby("ticker")["date"].min().to_dict()
+    fixed = _recompute_change(since_map)
+    print(f"[gaps] upserted={total} change recomputed={fixed}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--since", type=str, required=True, help="YYYY-MM-DD")
+    ap.add_argument("--until", type=str, default=None, help="YYYY-MM-DD (default: last closed session)")
+    ap.add_argument("--tickers", type=str, default=None, help="comma separated tickers")
+    ap.add_argument("--snapshot-min", type=int, default=SNAPSHOT_MIN)
+    ap.add_argument("--merge-gap", type=int, default=0)
+    ap.add_argument("--dry-run", action="store_true")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--rps", type=float, default=None)
+    args = ap.parse_args()
+    run(
+        since=date.fromisoformat(args.since),
+        until=date.fromisoformat(args.until) if args.until else None,
+        tickers=[x.strip() for x in args.tickers.split(",")] if args.tickers else None,
+        snapshot_min=args.snapshot_min, merge_gap=args.merge_gap, dry_run=args.dry_run,
+        workers=args.workers, rps=args.rps,
+    )
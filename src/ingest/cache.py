@@ -0,0 +1,182 @@
+# src/ingest/cache.py
+"""
+API 응답 로컬 캐시 (content-addressed)
+- refs/<namespace>/<요청해시>.json → {blob, created, expires}
+- blobs/<내용해시 앞2자리>/<내용해시>.pkl   (같은 응답은 한 번만 저장)
+- TTL: 상장목록 등 변하는 데이터는 만료시간, 지난 거래일 OHLCV는 영구(None),
+  당일은 마감 후라도 SAME_DAY_TTL (늦게 확정/정정되는 당일 데이터 재조회)
+- 용량 상한 초과 시 오래 안 쓴 blob부터 삭제
+- KRX_CACHE_OFFLINE=1: 네트워크 호출 금지, 캐시에 없으면 CacheMiss (만료 무시하고 재생)
+- KRX_CACHE=0: 캐시 끄기
+"""
+from __future__ import annotations
+import functools
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from datetime import date, datetime, time as dtime
+from typing import Any, Callable
+from zoneinfo import ZoneInfo
+
+CACHE_DIR = os.getenv("KRX_CACHE_DIR", os.path.join("data", "cache", "api"))
+CACHE_MAX_BYTES = int(float(os.getenv("KRX_CACHE_MAX_MB", "2048")) * 1024 * 1024)
+CACHE_ENABLED = os.getenv("KRX_CACHE", "1") != "0"
+OFFLINE = os.getenv("KRX_CACHE_OFFLINE", "0") == "1"
+
+LISTING_TTL = float(os.getenv("KRX_CACHE_LISTING_TTL", str(12 * 3600)))   # 상장목록/구성종목/이름
+INTRADAY_TTL = float(os.getenv("KRX_CACHE_INTRADAY_TTL", str(10 * 60)))   # 장중/마감 전 OHLCV
+SAME_DAY_TTL = float(os.getenv("KRX_CACHE_SAME_DAY_TTL", str(3 * 3600)))   # 마감 후 당일 OHLCV
+KST = ZoneInfo("Asia/Seoul")
+MARKET_CLOSED_AT = dtime(16, 0)   # 15:30 장 마감 + 확정 데이터 반영 여유
+
+_lock = threading.Lock()
+_size: int | None = None   # blobs 총 용량(프로세스 내 추정치)
+
+class CacheMiss(RuntimeError):
+    """오프라인 재생 모드에서 캐시에 없는 요청."""
+
+def _as_date(d: Any) -> date:
+    if isinstance(d, datetime): return d.date()
+    if isinstance(d, date): return d
+    s = str(d).replace("-", "")
+    return datetime.strptime(s, "%Y%m%d").date()
+
+def closed_day_ttl(d: Any) -> float | None:
+    """d가 지난 거래일이면 영구 보관(None), 당일 마감 후면 SAME_DAY_TTL, 그 전이면 짧은 TTL."""
+    now = datetime.now(KST)
+    d = _as_date(d)
+    if d < now.date():
+        return None
+    if d == now.date() and now.time() >= MARKET_CLOSED_AT:
+        return SAME_DAY_TTL
+    return INTRADAY_TTL
+
+def _request_key(namespace: str, args: tuple, kwargs: dict) -> str:
+    payload = json.dumps([namespace, list(args), kwargs], sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _ref_path(namespace: str, key: str) -> str:
+    return os.path.join(CACHE_DIR, "refs", namespace, f"{key}.json")
+
+def _blob_path(digest: str) -> str:
+    return os.path.join(CACHE_DIR, "blobs", digest[:2], f"{digest}.pkl")
+
+def _atomic_write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def _blob_size_total() -> int:
+    total = 0
+    root = os.path.join(CACHE_DIR, "blobs")
+    if not os.path.isdir(root): return 0
+    for sub in os.scandir(root):
+        if sub.is_dir():
+            for f in os.scandir(sub.path):
+                if f.name.endswith(".pkl"):
+                    total += f.stat().st_size
+    return total
+
+def evict(max_bytes: int = CACHE_MAX_BYTES) -> int:
+    """용량 상한을 넘으면 mtime(마지막 사용) 오래된 blob부터 삭제. 삭제한 바이트 수 반환."""
+    global _size
+    root = os.path.join(CACHE_DIR, "blobs")
+    if not os.path.isdir(root): return 0
+    files = []
+    for sub in os.scandir(root):
+        if sub.is_dir():
+            for f in os.scandir(sub.path):
+                if f.name.endswith(".pkl"):
+                    st = f.stat()
+                    files.append((st.st_mtime, st.st_size, f.path))
+    total = sum(s for _, s, _ in files)
+    target = int(max_bytes * 0.9)
+    freed = 0
+    if total > max_bytes:
+        for _, sz, path in sorted(files):
+            if total - freed <= target: break
+            try:
+                os.remove(path)
+                freed += sz
+            except OSError:
+                pass
+    _size = total - freed
+    return freed
+
+def get(namespace: str, key: str, offline: bool = False) -> tuple[bool, Any]:
+    try:
+        with open(_ref_path(namespace, key), "r", encoding="utf-8") as f:
+            ref = json.load(f)
+    except (OSError, ValueError):
+        return False, None
+    if not offline and ref.get("expires") is not None and ref["expires"] < time.time():
+        return False, None
+    path = _blob_path(ref["blob"])
+    try:
+        with open(path, "rb") as f:
+            value = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return False, None   # 용량 정리로 blob이 지워진 경우
+    try:
+        os.utime(path)       # LRU 기준 갱신
+    except OSError:
+        pass
+    return True, value
+
+def put(namespace: str, key: str, value: Any, ttl: float | None) -> None:
+    global _size
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    digest = hashlib.sha256(data).hexdigest()
+    path = _blob_path(digest)
+    with _lock:
+        wrote = not os.path.exists(path)
+        if wrote:
+            _atomic_write(path, data)
+        if _size is None:
+            _size = _blob_size_total()
+        elif wrote:
+            _size += len(data)
+        now = time.time()
+        ref = {"blob": digest, "created": now, "expires": None if ttl is None else now + ttl}
+        _atomic_write(_ref_path(namespace, key), json.dumps(ref).encode("utf-8"))
+        if _size > CACHE_MAX_BYTES:
+            evict()
+
+def _is_empty(value: Any) -> bool:
+    if value is None: return True
+    empty = getattr(value, "empty", None)
+    if isinstance(empty, bool): return empty
+    try:
+        return len(value) == 0
+    except TypeError:
+        return False
+
+def cached(namespace: str, ttl: float | None | Callable[..., float | None] = LISTING_TTL):
+    """
+    @cached("ohlcv_by_date", ttl=lambda start, end, ticker: closed_day_ttl(end))
+    - ttl: 초 단위, None이면 영구. 함수면 호출 인자로 계산.
+    """
+    def deco(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not CACHE_ENABLED:
+                return fn(*args, **kwargs)
+            key = _request_key(namespace, args, kwargs)
+            hit, value = get(namespace, key, offline=OFFLINE)
+            if hit:
+                return value
+            if OFFLINE:
+                raise CacheMiss(f"{namespace}{args} not in cache (offline replay)")
+            value = fn(*args, **kwargs)
+            life = ttl(*args, **kwargs) if callable(ttl) else ttl
+            if life is None and _is_empty(value):
+                life = INTRADAY_TTL   # 빈 응답(미반영/장애 가능성)은 영구 보관하지 않음
+            put(namespace, key, value, life)
+            return value
+        return wrapper
+    return deco
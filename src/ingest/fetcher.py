@@ -0,0 +1,82 @@
+# src/ingest/fetcher.py
+"""
+동시 수집기 (rate-limited worker pool)
+- 스레드 풀로 API 왕복 대기를 겹쳐서 처리
+- 전역 초당 요청 수(RPS) 제한: 토큰 버킷
+- 소스별 동시 실행 상한: pykrx/FDR 각각 세마포어
+- 결과는 map()을 호출한 스레드가 완료 순서대로 받아감(단일 writer)
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Hashable, Iterable, Iterator, Tuple
+
+DEFAULT_WORKERS = int(os.getenv("INGEST_WORKERS", "8"))
+DEFAULT_RPS = float(os.getenv("INGEST_RPS", "8"))          # 0 이하면 제한 없음
+SOURCE_LIMITS = {
+    "pykrx": int(os.getenv("INGEST_PYKRX_CONCURRENCY", "4")),
+    "fdr":   int(os.getenv("INGEST_FDR_CONCURRENCY", "4")),
+}
+
+Job = Tuple[Hashable, str, Callable[..., Any], tuple]   # (key, source, fn, args)
+
+class RateLimiter:
+    """스레드 안전 토큰 버킷. burst개까지 몰아서 허용하고 이후 rps로 보충."""
+
+    def __init__(self, rps: float, burst: int | None = None):
+        self.rps = float(rps)
+        self.capacity = float(burst or max(1, int(self.rps)))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rps <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rps)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rps
+            time.sleep(wait)
+
+class Fetcher:
+    """
+    fetcher = Fetcher(workers=8, rps=5)
+    for key, result, err in fetcher.map(jobs): ...
+    - 작업 실패는 (key, None, err)로 돌려주고 나머지는 계속 진행
+    """
+
+    def __init__(self, workers: int | None = None, rps: float | None = None,
+                 source_limits: dict[str, int] | None = None):
+        self.workers = max(1, int(workers or DEFAULT_WORKERS))
+        self.limiter = RateLimiter(DEFAULT_RPS if rps is None else rps)
+        limits = {**SOURCE_LIMITS, **(source_limits or {})}
+        self._sems = {k: threading.BoundedSemaphore(max(1, int(v))) for k, v in limits.items()}
+
+    def call(self, source: str, fn: Callable[..., Any], *args) -> Any:
+        sem = self._sems.get(source)
+        if sem is not None:
+            sem.acquire()
+        try:
+            self.limiter.acquire()
+            return fn(*args)
+        finally:
+            if sem is not None:
+                sem.release()
+
+    def map(self, jobs: Iterable[Job]) -> Iterator[Tuple[Hashable, Any, Exception | None]]:
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="fetch") as ex:
+            futs = {ex.submit(self.call, src, fn, *args): key for key, src, fn, args in jobs}
+            for f in as_completed(futs):
+                key = futs[f]
+                try:
+                    yield key, f.result(), None
+                except Exception as e:
+                    yield key, None, e
@@ -9,18 +9,21 @@ from __future__ import annotations
 from datetime import date, timedelta
 from typing import List, Tuple
 import pandas as pd
+from src.ingest.names import name_map, resolve
+from src.ingest.sources import krx_index_portfolio
+from src.ingest.trading_calendar import last_closed_session, sessions
 
 def get_kospi100(today: date | None = None) -> pd.DataFrame:
     tickers: List[str] = []
-    d = today or date.today()
+    d = today or last_closed_session()
 
-    # 1) pykrx에서 티커
+    # 1) pykrx에서 티커 (기준일 이전 마지막 거래일, 실패 시 그 전 거래일)
     try:
-        from pykrx import stock
-        for i in range(5):  # 직전 영업일까지 백오프
-            ds = (d - timedelta(days=i)).strftime("%Y%m%d")
+        days = sessions(d - timedelta(days=30), d)[-2:][::-1] or [d]
+        for day in days:
+            ds = day.strftime("%Y%m%d")
             try:
-                tickers = stock.get_index_portfolio_deposit_file("1028", ds) or []
+                tickers = krx_index_portfolio("1028", ds)
                 if tickers:
                     break
             except Exception:
@@ -28,21 +31,18 @@ def get_kospi100(today: date | None = None) -> pd.DataFrame:
     except Exception:
         pass
 
-    # 2) 이름 매핑 (FDR KRX)
+    # 2) 이름 매핑 (공용 이름 서비스: KRX 상장목록 일괄 조회 + 로컬 저장)
     try:
-        import FinanceDataReader as fdr
-        krx = fdr.StockListing("KRX")[["Code", "Name", "Market"]].rename(
-            columns={"Code": "ticker", "Name": "name", "Market": "market"}
-        )
-        krx["ticker"] = krx["ticker"].astype(str).str.zfill(6)
-
         if not tickers:
             # 폴백: 전체 KRX 중 숫자 6자리만, 상위 100개 사용
+            krx = pd.DataFrame(
+                [(c, n, m) for c, (n, m) in name_map().items()],
+                columns=["ticker", "name", "market"],
+            )
             base = krx[krx["ticker"].str.fullmatch(r"\d{6}")].copy()
             return base.head(100).reset_index(drop=True)
 
-        df = pd.DataFrame({"ticker": tickers})
-        out = df.merge(krx, on="ticker", how="left")
+        out = resolve(tickers)
         # 이름 없으면 임시로 티커 사용
         out["name"] = out["name"].fillna(out["ticker"])
         out["market"] = out["market"].fillna("KRX")
@@ -1,10 +1,19 @@
 from __future__ import annotations
+import argparse, os
+from bisect import bisect_right
 from datetime import date, timedelta
 import pandas as pd
 from sqlalchemy import text
 from src.db.conn import get_engine
 from src.db.io import ensure_schema, upsert_prices
+from src.ingest.fetcher import Fetcher
+from src.ingest.snapshot import collect_snapshots
+from src.ingest.sources import krx_ohlcv_by_date
+from src.ingest.trading_calendar import last_closed_session, sessions
 
+BATCH_ROWS = 20_000   # writer가 모아서 한 번에 업서트할 행 수
+INGEST_MODE = os.getenv("INGEST_MODE", "auto")   # auto / ticker / snapshot
+PRICE_COLS = ["date","ticker","open","high","low","close","adj_close","volume","change"]
 pd.options.mode.copy_on_write = True
 
 def _all_tickers() -> list[str]:
@@ -16,16 +25,20 @@ def _all_tickers() -> list[str]:
 def _last_date_map() -> dict[str, date]:
     eng = get_engine()
     with eng.connect() as c:
-        df = pd.read_sql("SELECT ticker, MAX(date) AS max_d FROM prices GROUP BY ticker", c)
+        # 티커마다 (ticker, date) 인덱스 끝 한 칸만 (전체 GROUP BY 스캔 없음)
+        df = pd.read_sql("""
+            SELECT t.ticker, (SELECT MAX(date) FROM prices p WHERE p.ticker = t.ticker) AS max_d
+            FROM tickers t
+        """, c).dropna(subset=["max_d"])
     if df.empty: return {}
     df["max_d"] = pd.to_datetime(df["max_d"]).dt.date
     return dict(zip(df["ticker"], df["max_d"]))
 
 def _fetch_prices_api(ticker: str, start: date, end: date) -> pd.DataFrame:
     # 필요 시 FDR/pykrx로 교체 가능. 여기선 pykrx 사용(휴장 자동 처리).
-    from pykrx import stock
+    # 응답은 로컬 캐시 경유(마감된 구간은 재다운로드 없음)
     fmt = "%Y%m%d"
-    df = stock.get_market_ohlcv_by_date(start.strftime(fmt), end.strftime(fmt), ticker)
+    df = krx_ohlcv_by_date(start.strftime(fmt), end.strftime(fmt), ticker)
     if df is None or df.empty:
         return pd.DataFrame(columns=["date","open","high","low","close","volume"])
     df = df.reset_index().rename(columns={
@@ -36,59 +49,150 @@ def _fetch_prices_api(ticker: str, start: date, end: date) -> pd.DataFrame:
     df["adj_close"] = None
     return df
 
-def run(limit: int | None = None):
+def _prev_close_map(tickers: list[str]) -> dict[str, float]:
+    """티커별 마지막 종가를 한 번의 쿼리로 (티커마다 인덱스 역순 LIMIT 1)."""
+    if not tickers: return {}
+    eng = get_engine()
+    sql = text("""
+        SELECT t.ticker, p.close
+        FROM unnest(CAST(:arr AS text[])) AS t(ticker)
+        CROSS JOIN LATERAL (
+            SELECT close FROM prices
+            WHERE ticker = t.ticker AND close IS NOT NULL AND close <> 0
+            ORDER BY date DESC LIMIT 1
+        ) p
+    """)
+    with eng.connect() as c:
+        rows = c.execute(sql, {"arr": list(tickers)}).fetchall()
+    return {t: float(v) for t, v in rows}
+
+def _with_change(frames: list[pd.DataFrame], prev_close: dict[str, float]) -> pd.DataFrame:
+    """
+    여러 티커 프레임을 합쳐 change(전일 종가 대비)를 한 번에 계산.
+    - 티커별 직전 유효 종가 = 그룹 shift + ffill, 배치 첫 행은 DB 마지막 종가로
+    - 종가 0/결측은 기준가로 쓰지 않음
+    """
+    df = pd.concat(frames, ignore_index=True).sort_values(["ticker","date"], kind="stable")
+    close = pd.to_numeric(df["close"], errors="coerce").astype(float)
+    valid = close.where(close != 0)
+    g = valid.groupby(df["ticker"], sort=False)
+    prev = g.shift(1).groupby(df["ticker"], sort=False).ffill()
+    prev = prev.fillna(df["ticker"].map(prev_close))
+    chg = (valid - prev) / prev.where(prev != 0)
+    df["change"] = chg
+    return df.reset_index(drop=True)
+
+def _carry_prev_close(prev_close: dict[str, float], df: pd.DataFrame) -> None:
+    """날짜 순으로 이어지는 다음 배치용: df의 티커별 마지막 유효 종가로 prev_close 갱신."""
+    close = pd.to_numeric(df["close"], errors="coerce").astype(float)
+    last = close[close.notna() & (close != 0)].groupby(df["ticker"], sort=False).last()
+    prev_close.update(last.to_dict())
+
+def _run_by_ticker(plan: dict[str, date], until: date, last_map: dict[str, date],
+                   fetcher: Fetcher, batch_rows: int) -> int:
+    jobs = [(t, "pykrx", _fetch_prices_api, (t, start, until)) for t, start in plan.items()]
+    print(f"[ingest] mode=ticker jobs={len(jobs)} workers={fetcher.workers} rps={fetcher.limiter.rps:g}")
+    prev_close = _prev_close_map([t for t in plan if t in last_map])
+    total = 0
+    buf: list[pd.DataFrame] = []
+    n_buf = 0
+
+    def _flush() -> int:
+        return upsert_prices(_with_change(buf, prev_close)[PRICE_COLS])
+
+    for t, df, err in fetcher.map(jobs):
+        if err is not None:
+            print(f"[ingest][WARN] {t} fetch failed: {err}")
+            continue
+        if df is None or df.empty:
+            continue
+        buf.append(df.assign(ticker=t))
+        n_buf += len(df)
+        print(f"[ingest] {t} rows={len(df)}")
+        if n_buf >= batch_rows:
+            total += _flush()
+            buf, n_buf = [], 0
+    if buf:
+        total += _flush()
+    return total
+
+def _run_by_date(plan: dict[str, date], dates: list[date], last_map: dict[str, date],
+                 fetcher: Fetcher, batch_rows: int) -> int:
+    print(f"[ingest] mode=snapshot dates={len(dates)} tickers={len(plan)} workers={fetcher.workers}")
+    # change는 티커 모드와 같게 전일 유효 종가 대비 (스냅샷은 날짜 순서로 받아 배치 사이로 이어 감)
+    prev_close = _prev_close_map([t for t in plan if t in last_map])
+    total = 0
+    buf: list[pd.DataFrame] = []
+    n_buf = 0
+
+    def _flush() -> int:
+        df = _with_change(buf, prev_close)
+        _carry_prev_close(prev_close, df)
+        return upsert_prices(df[PRICE_COLS])
+
+    for df in collect_snapshots(dates, plan.keys(), last_map, fetcher, ordered=True):
+        buf.append(df)
+        n_buf += len(df)
+        print(f"[ingest] {df['date'].iloc[0]} rows={len(df)}")
+        if n_buf >= batch_rows:
+            total += _flush()
+            buf, n_buf = [], 0
+    if buf:
+        total += _flush()
+    return total
+
+def run(limit: int | None = None, workers: int | None = None, rps: float | None = None,
+        batch_rows: int = BATCH_ROWS, mode: str = INGEST_MODE):
+    """
+    mode
+    - ticker  : 종목별 기간 조회 (종목 수만큼 호출)
+    - snapshot: 날짜별 전종목 스냅샷 (일수만큼 호출)
+    - auto    : 호출 수가 적은 쪽 선택 (평소 일일 실행이면 snapshot 1회)
+    """
     ensure_schema()
     tickers = _all_tickers()
     if limit:
         tickers = tickers[:int(limit)]
 
     last_map = _last_date_map()
-    today = date.today()
-    total = 0
+    # 장 마감 데이터가 확정된 마지막 거래일까지만 (주말/휴일/장중엔 호출 자체를 안 함)
+    until = last_closed_session()
+    # 처음이면 3년 치 수집(필요 시 조정)
+    first = until - timedelta(days=365*3)
+    cal = sessions(first, until)
 
+    plan: dict[str, date] = {}
+    need: set[date] = set()
     for t in tickers:
-        start = last_map.get(t)
-        if start is None:
-            # 처음이면 3년 치 수집(필요 시 조정)
-            start = today - timedelta(days=365*3)
-        else:
-            start = start + timedelta(days=1)
-        if start > today:
+        last = last_map.get(t)
+        miss = cal[bisect_right(cal, last):] if last else cal
+        if not miss:
             continue
+        plan[t] = miss[0]
+        need.update(miss)
+    if not plan:
+        print(f"[ingest] nothing to fetch (up to date through {until})")
+        return
 
-        df = _fetch_prices_api(t, start, today)
-        if df.empty:
-            continue
+    dates = sorted(need)
+    if mode == "auto":
+        mode = "snapshot" if len(dates) < len(plan) else "ticker"
 
-        # change 계산(전일 종가 대비)
-        prev_close = None
-        if t in last_map:
-            eng = get_engine()
-            with eng.connect() as c:
-                q = text("SELECT close FROM prices WHERE ticker=:t ORDER BY date DESC LIMIT 1")
-                r = c.execute(q, {"t": t}).first()
-                if r:
-                    prev_close = float(r[0])
-
-        rows = []
-        for _, r in df.sort_values("date").iterrows():
-            close = float(r["close"]) if r["close"] is not None else None
-            chg = None
-            if prev_close and close:
-                chg = (close - prev_close) / prev_close
-            if close:
-                prev_close = close
-            rows.append({
-                "date": r["date"], "ticker": t,
-                "open": r["open"], "high": r["high"], "low": r["low"],
-                "close": r["close"], "adj_close": r["adj_close"],
-                "volume": int(r["volume"]) if pd.notna(r["volume"]) else None,
-                "change": chg,
-            })
-        total += upsert_prices(rows)
-        print(f"[ingest] {t} rows={len(rows)}")
+    # 수집은 워커 풀에서 병렬로, 적재는 이 스레드 하나가 모아서 배치로
+    fetcher = Fetcher(workers=workers, rps=rps)
+    if mode == "snapshot":
+        total = _run_by_date(plan, dates, last_map, fetcher, batch_rows)
+    else:
+        total = _run_by_ticker(plan, until, last_map, fetcher, batch_rows)
 
     print(f"[ingest] total upserted={total}")
 
 if __name__ == "__main__":
-    run()
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--limit", type=int, default=None)
+    ap.add_argument("--workers", type=int, default=None, help="fetch worker threads (env INGEST_WORKERS)")
+    ap.add_argument("--rps", type=float, default=None, help="global requests/sec cap (env INGEST_RPS)")
+    ap.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    ap.add_argument("--mode", choices=["auto","ticker","snapshot"], default=INGEST_MODE)
+    args = ap.parse_args()
+    run(limit=args.limit, workers=args.workers, rps=args.rps, batch_rows=args.batch_rows, mode=args.mode)
@@ -0,0 +1,92 @@
+# src/ingest/names.py
+"""
+티커 → (이름, 시장) 해석 서비스
+- KRX 상장목록을 한 번에(FDR StockListing) 받아 코드→이름/시장 맵 구성
+- 맵은 로컬 JSON에 저장, 오래되면(TICKER_NAMES_MAX_AGE) 다시 받음
+- refresh_tickers / load_prices / get_kospi100 모두 여기서 이름을 얻음
+- 목록에 없는 코드만 pykrx 개별 조회(캐시 경유)로 보완, 그래도 없으면 코드 그대로
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from typing import Iterable
+import pandas as pd
+
+from src.ingest.sources import fdr_listing, krx_ticker_name
+
+NAMES_PATH = os.getenv("TICKER_NAMES_PATH", os.path.join("data", "cache", "ticker_names.json"))
+NAMES_MAX_AGE = float(os.getenv("TICKER_NAMES_MAX_AGE", str(24 * 3600)))
+
+_lock = threading.Lock()
+_state: dict = {"updated_at": 0.0, "tickers": {}, "refreshed": False}
+
+def _read() -> tuple[float, dict[str, list]]:
+    try:
+        with open(NAMES_PATH, "r", encoding="utf-8") as f:
+            obj = json.load(f)
+        return float(obj.get("updated_at", 0)), dict(obj.get("tickers", {}))
+    except (OSError, ValueError):
+        return 0.0, {}
+
+def _write(updated_at: float, tickers: dict[str, list]) -> None:
+    os.makedirs(os.path.dirname(NAMES_PATH) or ".", exist_ok=True)
+    tmp = f"{NAMES_PATH}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"updated_at": updated_at, "tickers": tickers}, f, ensure_ascii=False)
+    os.replace(tmp, NAMES_PATH)
+
+def _fetch_listing() -> dict[str, list]:
+    """상장목록 1회 호출 → {code: [name, market]} (시가총액 순서 유지)."""
+    krx = fdr_listing("KRX")[["Code", "Name", "Market"]]
+    codes = krx["Code"].astype(str).str.zfill(6)
+    return {c: [n, m] for c, n, m in zip(codes, krx["Name"], krx["Market"])}
+
+def refresh() -> dict[str, list]:
+    """목록을 새로 받아 저장. 실패하면 기존 맵 유지."""
+    with _lock:
+        try:
+            tickers = _fetch_listing()
+        except Exception as e:
+            print(f"[names][WARN] listing refresh failed: {e}")
+            _state["refreshed"] = True
+            return _state["tickers"]
+        now = time.time()
+        _state.update(updated_at=now, tickers=tickers, refreshed=True)
+        _write(now, tickers)
+        return tickers
+
+def name_map(max_age: float = NAMES_MAX_AGE) -> dict[str, list]:
+    """{code: [name, market]}. 메모리 → 파일 → (오래됐으면) 재조회 순."""
+    if not _state["tickers"]:
+        with _lock:
+            if not _state["tickers"]:
+                ts, tickers = _read()
+                _state.update(updated_at=ts, tickers=tickers)
+    if time.time() - _state["updated_at"] > max_age and not _state["refreshed"]:
+        return refresh()
+    return _state["tickers"]
+
+def resolve(codes: Iterable[str]) -> pd.DataFrame:
+    """코드 목록 → DataFrame[ticker, name, market]."""
+    codes = [str(c).zfill(6) for c in codes]
+    mp = name_map()
+    if any(c not in mp for c in codes) and not _state["refreshed"]:
+        mp = refresh()   # 신규 상장 등: 목록을 한 번만 다시 받아봄
+    names, markets = [], []
+    for c in codes:
+        hit = mp.get(c)
+        if hit:
+            names.append(hit[0]); markets.append(hit[1])
+            continue
+        try:
+            names.append(krx_ticker_name(c) or c)
+        except Exception:
+            names.append(c)
+        markets.append(None)
+    return pd.DataFrame({"ticker": codes, "name": names, "market": markets})
+
+def names_for(codes: Iterable[str]) -> dict[str, str]:
+    df = resolve(codes)
+    return dict(zip(df["ticker"], df["name"]))
@@ -2,24 +2,15 @@
 from __future__ import annotations
 import time
 import pandas as pd
-from sqlalchemy import text
-from src.db.conn import get_engine
-
-# pykrx 의존
-from pykrx import stock as krx
+from src.db.bulk import copy_upsert
+from src.ingest.names import resolve
+from src.ingest.sources import krx_index_portfolio
 
 pd.options.mode.copy_on_write = True
 
 def _fetch_kospi200_codes() -> list[str]:
     # KOSPI200: 1028
-    return list(krx.get_index_portfolio_deposit_file("1028"))
-
-def _name_safe(code: str) -> str:
-    # 이름 조회 실패 시 코드로 대체
-    try:
-        return krx.get_market_ticker_name(code) or code
-    except Exception:
-        return code
+    return krx_index_portfolio("1028")
 
 def run() -> None:
     t0 = time.time()
@@ -28,34 +19,25 @@ def run() -> None:
     codes = _fetch_kospi200_codes()
     print(f"[refresh] codes={len(codes)} fetched in {time.time()-t0:.2f}s")
 
-    # 이름 조회 (개별 호출이지만 보통 수초~수십초 내 끝남)
+    # 이름 조회 (상장목록 일괄 조회 + 로컬 이름 맵, 없는 코드만 개별 조회)
     t1 = time.time()
-    names = [_name_safe(c) for c in codes]
-    print(f"[refresh] names via pykrx in {time.time()-t1:.2f}s")
+    df = resolve(codes)
+    print(f"[refresh] names resolved in {time.time()-t1:.2f}s")
 
-    df = pd.DataFrame({"ticker": codes, "name": names})
-    df["market"] = "KOSPI"
+    df["market"] = df["market"].fillna("KOSPI")
     df["sector"] = None
 
-    eng = get_engine()
-    sql = """
-    INSERT INTO tickers (ticker, name, market, sector, updated_at)
-    VALUES (:ticker, :name, :market, :sector, now())
-    ON CONFLICT (ticker) DO UPDATE
-      SET name = EXCLUDED.name,
-          market = COALESCE(EXCLUDED.market, tickers.market),
-          sector = COALESCE(EXCLUDED.sector, tickers.sector),
-          updated_at = now();
-    """
-
-    rows = df.to_dict("records")
     t2 = time.time()
-    with eng.begin() as conn:
-        # 배치 업서트
-        B = 1000
-        for i in range(0, len(rows), B):
-            conn.execute(text(sql), rows[i:i+B])
-    print(f"[refresh] upserted {len(rows)} tickers in {time.time()-t2:.2f}s")
+    n = copy_upsert(
+        df[["ticker", "name", "market", "sector"]], "tickers", ["ticker"],
+        update_cols=["name"],
+        update_exprs={
+            "market": "COALESCE(EXCLUDED.market, tickers.market)",
+            "sector": "COALESCE(EXCLUDED.sector, tickers.sector)",
+            "updated_at": "now()",
+        },
+    )
+    print(f"[refresh] upserted {n} tickers in {time.time()-t2:.2f}s")
 
     print(f"[refresh] done in {time.time()-t0:.2f}s")
 
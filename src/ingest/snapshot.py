@@ -0,0 +1,83 @@
+# src/ingest/snapshot.py
+"""
+날짜 단위 전종목 스냅샷 수집 (date-major)
+- pykrx get_market_ohlcv(날짜, market) 한 번으로 그날 전 종목 OHLCV를 받음
+- 유니버스(tickers)로 필터 → 종목 수와 무관하게 하루 1회 호출
+- 백필 비용이 (일수 × 종목수)가 아니라 일수에 비례
+- change는 비워 둠: 등락률은 거래소 기준가 대비(소수 2자리)라 전일 종가 대비와 다름
+  → 적재하는 쪽이 incremental_prices._with_change로 계산 (ordered=True면 날짜 순서대로 yield)
+"""
+from __future__ import annotations
+import os
+from datetime import date
+from typing import Iterable, Iterator
+import pandas as pd
+
+from src.ingest.fetcher import Fetcher
+from src.ingest.sources import krx_market_ohlcv
+from src.ingest.trading_calendar import sessions
+
+SNAPSHOT_MARKET = os.getenv("INGEST_SNAPSHOT_MARKET", "ALL")   # KOSPI / KOSDAQ / ALL
+COLS = ["date","ticker","open","high","low","close","adj_close","volume","change"]
+
+def fetch_market_snapshot(d: date, market: str = SNAPSHOT_MARKET) -> pd.DataFrame:
+    """하루치 전종목 OHLCV. 휴장일이면 빈 DF."""
+    raw = krx_market_ohlcv(d.strftime("%Y%m%d"), market)
+    if raw is None or raw.empty:
+        return pd.DataFrame(columns=COLS)
+    df = raw.reset_index().rename(columns={
+        "티커":"ticker","시가":"open","고가":"high","저가":"low","종가":"close",
+        "거래량":"volume","등락률":"change_pct"
+    })
+    # 휴장일/거래정지 종목은 0으로 채워져 옴 → 제외
+    df = df[df["close"] > 0]
+    if df.empty:
+        return pd.DataFrame(columns=COLS)
+    df["ticker"] = df["ticker"].astype(str).str.zfill(6)
+    df["date"] = d
+    df["adj_close"] = None
+    df["change"] = None   # 등락률(기준가 대비)은 쓰지 않음, 전일 종가 대비는 적재 측에서
+    return df[COLS].reset_index(drop=True)
+
+def snapshot_dates(start: date, end: date) -> list[date]:
+    """start..end 중 KRX 거래일만 (휴장일은 호출하지 않음)."""
+    return sessions(start, end)
+
+def collect_snapshots(
+    dates: Iterable[date],
+    universe: Iterable[str],
+    last_map: dict[str, date] | None = None,
+    fetcher: Fetcher | None = None,
+    ordered: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """
+    날짜별 스냅샷을 병렬로 받아 유니버스/이미 적재된 날짜를 걸러 yield.
+    - last_map[ticker] 이하 날짜는 이미 있으므로 제외
+    - ordered: 완료 순서 대신 날짜 순서로 (앞 날짜가 끝날 때까지 뒤 날짜는 보관) — change 계산용
+    """
+    uni = set(universe)
+    last_map = last_map or {}
+    fetcher = fetcher or Fetcher()
+    dates = sorted(dates) if ordered else list(dates)
+    jobs = [(d, "pykrx", fetch_market_snapshot, (d,)) for d in dates]
+    done: dict[date, pd.DataFrame | None] = {}
+    nxt = 0
+    for d, df, err in fetcher.map(jobs):
+        if err is not None:
+            print(f"[snapshot][WARN] {d} fetch failed: {err}")
+            df = None
+        if df is not None and not df.empty:
+            df = df[df["ticker"].isin(uni)]
+            if last_map:
+                last = df["ticker"].map(last_map).fillna(date.min)
+                df = df[df["date"] > last]
+        if not ordered:
+            if df is not None and not df.empty:
+                yield df
+            continue
+        done[d] = df
+        while nxt < len(dates) and dates[nxt] in done:
+            out = done.pop(dates[nxt])
+            nxt += 1
+            if out is not None and not out.empty:
+                yield out
@@ -0,0 +1,48 @@
+# src/ingest/sources.py
+"""
+외부 데이터 소스(pykrx / FinanceDataReader) 호출 모음
+- 모든 네트워크 호출은 여기를 거쳐 로컬 캐시(src.ingest.cache)를 탄다
+- 마감된 거래일 데이터는 영구 보관, 상장목록/구성종목/이름은 TTL
+"""
+from __future__ import annotations
+import pandas as pd
+from src.ingest.cache import cached, closed_day_ttl, LISTING_TTL
+
+@cached("krx_ohlcv_by_date", ttl=lambda start, end, ticker: closed_day_ttl(end))
+def krx_ohlcv_by_date(start: str, end: str, ticker: str) -> pd.DataFrame:
+    """종목 기간 OHLCV (start/end: YYYYMMDD)."""
+    from pykrx import stock
+    return stock.get_market_ohlcv_by_date(start, end, ticker)
+
+@cached("krx_market_ohlcv", ttl=lambda d, market="ALL": closed_day_ttl(d))
+def krx_market_ohlcv(d: str, market: str = "ALL") -> pd.DataFrame:
+    """하루치 전종목 OHLCV (d: YYYYMMDD)."""
+    from pykrx import stock
+    return stock.get_market_ohlcv(d, market=market)
+
+def _portfolio_ttl(code: str, d: str | None = None) -> float | None:
+    return LISTING_TTL if d is None else closed_day_ttl(d)
+
+@cached("krx_index_portfolio", ttl=_portfolio_ttl)
+def krx_index_portfolio(code: str, d: str | None = None) -> list[str]:
+    """지수 구성종목 (d 생략 시 최신). 과거 날짜 구성은 바뀌지 않으므로 영구."""
+    from pykrx import stock
+    if d is None:
+        return list(stock.get_index_portfolio_deposit_file(code) or [])
+    return list(stock.get_index_portfolio_deposit_file(code, d) or [])
+
+@cached("krx_ticker_name", ttl=LISTING_TTL)
+def krx_ticker_name(code: str) -> str:
+    from pykrx import stock
+    return stock.get_market_ticker_name(code)
+
+@cached("fdr_listing", ttl=LISTING_TTL)
+def fdr_listing(market: str = "KRX") -> pd.DataFrame:
+    import FinanceDataReader as fdr
+    return fdr.StockListing(market)
+
+@cached("krx_index_ohlcv", ttl=lambda start, end, code="1001": closed_day_ttl(end))
+def krx_index_ohlcv(start: str, end: str, code: str = "1001") -> pd.DataFrame:
+    """지수 일별 OHLCV (거래일 목록 추출용, 기본 KOSPI 1001)."""
+    from pykrx import stock
+    return stock.get_index_ohlcv_by_date(start, end, code)
@@ -0,0 +1,120 @@
+# src/ingest/trading_calendar.py
+"""
+KRX 거래일 캘린더
+- 과거 거래일: KOSPI 지수 일별 데이터의 날짜 = 실제 개장일 (연 단위 1회 조회, 캐시 영구 보관)
+- 아직 확정 안 된 날/조회 실패 시: 규칙 기반 (주말 + 고정 공휴일 + 연말 휴장 + KRX_EXTRA_HOLIDAYS)
+- 개장/마감 시각 변경일(연초 첫 거래일 10시 개장, 수능일 16:30 마감)을 반영해
+  "오늘 데이터가 확정됐는지" 판단
+- 수집 플래너는 sessions()/missing_sessions()로 필요한 거래일만 계산 → 빈 호출 없음
+"""
+from __future__ import annotations
+import os
+from datetime import date, datetime, time as dtime, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from src.ingest.sources import krx_index_ohlcv
+
+KST = ZoneInfo("Asia/Seoul")
+CLOSE_TIME = dtime(15, 30)
+LATE_CLOSE_TIME = dtime(16, 30)          # 수능일: 개장/마감 1시간씩 지연
+DATA_READY_DELAY = timedelta(minutes=30)  # 마감 후 확정 데이터 반영 여유
+
+# 양력 고정 공휴일 (월, 일) + 연말 휴장일(12/31)
+FIXED_HOLIDAYS = {(1, 1), (3, 1), (5, 5), (6, 6), (8, 15), (10, 3), (10, 9), (12, 25), (12, 31)}
+# 음력 공휴일·대체공휴일·임시공휴일은 KRX 실제 개장일 조회로 반영. 미래분은 환경변수로 보완
+# 예) KRX_EXTRA_HOLIDAYS="2026-02-16,2026-02-17,2026-02-18"
+EXTRA_HOLIDAYS = {
+    date.fromisoformat(x.strip())
+    for x in os.getenv("KRX_EXTRA_HOLIDAYS", "").split(",") if x.strip()
+}
+# 마감 지연일(수능). 예) KRX_LATE_CLOSE_DAYS="2026-11-19"
+LATE_CLOSE_DAYS = {
+    date.fromisoformat(x.strip())
+    for x in os.getenv("KRX_LATE_CLOSE_DAYS", "2024-11-14,2025-11-13,2026-11-19").split(",") if x.strip()
+}
+
+def now_kst() -> datetime:
+    return datetime.now(KST)
+
+def close_time(d: date) -> dtime:
+    return LATE_CLOSE_TIME if d in LATE_CLOSE_DAYS else CLOSE_TIME
+
+def _is_rule_session(d: date) -> bool:
+    return d.weekday() < 5 and (d.month, d.day) not in FIXED_HOLIDAYS and d not in EXTRA_HOLIDAYS
+
+def _data_ready(d: date, now: datetime) -> bool:
+    """d일 장 마감 데이터가 확정됐는지."""
+    if d < now.date():
+        return True
+    if d > now.date():
+        return False
+    ready = datetime.combine(d, close_time(d), KST) + DATA_READY_DELAY
+    return now >= ready
+
+@lru_cache(maxsize=None)
+def _observed_year(year: int, through: date) -> tuple[date, ...] | None:
+    """year년 1/1..through 구간의 실제 개장일. 조회 실패 시 None."""
+    start = date(year, 1, 1)
+    if through < start:
+        return ()
+    try:
+        df = krx_index_ohlcv(start.strftime("%Y%m%d"), through.strftime("%Y%m%d"), "1001")
+    except Exception as e:
+        print(f"[calendar][WARN] KRX session lookup failed for {year}: {e} (rule-based fallback)")
+        return None
+    if df is None or df.empty:
+        return None
+    return tuple(sorted(d.date() for d in df.index))
+
+def _year_sessions(year: int, now: datetime) -> list[date]:
+    first, last = date(year, 1, 1), date(year, 12, 31)
+    # 관측 가능한 마지막 날: 데이터 확정된 날까지
+    through = min(last, now.date() if _data_ready(now.date(), now) else now.date() - timedelta(days=1))
+    observed = _observed_year(year, through) if through >= first else ()
+    if observed is None:
+        observed, through = (), first - timedelta(days=1)
+    out = list(observed)
+    d = max(first, through + timedelta(days=1))
+    while d <= last:
+        if _is_rule_session(d):
+            out.append(d)
+        d += timedelta(days=1)
+    return out
+
+def sessions(start: date, end: date, now: datetime | None = None) -> list[date]:
+    """start..end(포함) 사이의 거래일."""
+    if start > end:
+        return []
+    now = now or now_kst()
+    out: list[date] = []
+    for y in range(start.year, end.year + 1):
+        out.extend(d for d in _year_sessions(y, now) if start <= d <= end)
+    return out
+
+def is_session(d: date, now: datetime | None = None) -> bool:
+    return d in sessions(d, d, now)
+
+def last_closed_session(now: datetime | None = None) -> date:
+    """마감 데이터가 확정된 가장 최근 거래일."""
+    now = now or now_kst()
+    end = now.date()
+    if not _data_ready(end, now):
+        end -= timedelta(days=1)
+    back = sessions(end - timedelta(days=30), end, now)
+    return back[-1] if back else end
+
+def previous_session(d: date, now: datetime | None = None) -> date:
+    back = sessions(d - timedelta(days=30), d - timedelta(days=1), now)
+    return back[-1] if back else d - timedelta(days=1)
+
+def missing_sessions(last_loaded: date | None, until: date | None = None,
+                     first: date | None = None, now: datetime | None = None) -> list[date]:
+    """
+    last_loaded 다음 거래일부터 until(기본: 마지막 확정 거래일)까지 수집이 필요한 거래일.
+    last_loaded가 없으면 first부터.
+    """
+    now = now or now_kst()
+    until = until or last_closed_session(now)
+    start = last_loaded + timedelta(days=1) if last_loaded else (first or until)
+    return sessions(start, until, now)
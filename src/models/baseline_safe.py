@@ -2,22 +2,171 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 
-def ma_next_day_series(y: pd.Series, window: int) -> pd.DataFrame:
+# scipy.signal.lfilter는 처음 쓸 때 import (상태 기반 증분 실행은 scipy를 읽지 않음)
+# 없으면 numpy 시간축 루프(티커/alpha 방향은 벡터화). None으로 두면 루프 강제
+lfilter = ...
+
+def _lfilter():
+    global lfilter
+    if lfilter is ...:
+        try:
+            from scipy.signal import lfilter as f
+        except ImportError:
+            f = None
+        lfilter = f
+    return lfilter
+
+def ma_next_day_series(y: pd.Series, window: int, horizon: int = 1) -> pd.DataFrame:
     y = pd.Series(y).astype(float)
     ma = y.rolling(window).mean()
-    # asof_idx: 예측 기준 인덱스(그 날의 종가로 다음날 예측)
-    asof_idx = np.arange(len(y) - 1)  # 마지막 날은 다음날 없음
+    # asof_idx: 예측 기준 인덱스(그 날의 종가로 horizon 거래일 뒤 예측, 값은 horizon과 무관한 평탄 예측)
+    asof_idx = np.arange(max(len(y) - horizon, 0))  # 마지막 horizon일은 정답일 없음
     y_pred = ma.iloc[asof_idx]
     out = pd.DataFrame({"asof_idx": asof_idx, "y_pred": y_pred.values})
     return out.dropna().reset_index(drop=True)
 
-def ses_next_day_series(y: pd.Series, alpha: float) -> pd.DataFrame:
+def ses_levels(y, alphas) -> np.ndarray:
+    """
+    SES 수준 s[t] (t일 asof 예측 = t-1일까지의 종가로 만든 값), 여러 alpha를 한 번에.
+      s[0] = y[0],  s[t] = a*y[t-1] + (1-a)*s[t-1]
+    1차 선형 필터(lfilter)로 계산하며 예전 파이썬 루프와 비트 단위로 같은 값.
+    y: (T,) 또는 (T, N) 시계열(열마다 같은 시작점). 반환: (T, K) 또는 (T, N, K), K = len(alphas)
+    """
+    y = np.asarray(y, dtype=float)
+    al = np.atleast_1d(np.asarray(alphas, dtype=float))
+    out = np.empty(y.shape + (len(al),))
+    if len(y) == 0:
+        return out
+    out[0] = y[0][..., None]
+    if len(y) == 1:
+        return out
+    if _lfilter() is not None:
+        for k, a in enumerate(al):
+            # x[t] = y[t-1], 초기 상태 (1-a)*y[0] → s[1] = a*y[0] + (1-a)*y[0]
+            zi = ((1 - a) * y[0])[None, ...]
+            out[1:, ..., k], _ = lfilter([a], [1.0, -(1 - a)], y[:-1], axis=0, zi=zi)
+        return out
+    s, b = out[0], 1 - al
+    for t in range(1, len(y)):
+        s = al * y[t - 1][..., None] + b * s
+        out[t] = s
+    return out
+
+def ses_next_day_multi(y: pd.Series, alphas, horizon: int = 1) -> pd.DataFrame:
+    """ses_next_day_series의 여러 alpha 버전: asof_idx + alpha별 y_pred 열(열 이름 = alpha)."""
     y = pd.Series(y).astype(float)
-    if y.empty: return pd.DataFrame(columns=["asof_idx","y_pred"])
-    s = [y.iloc[0]]
-    for i in range(1, len(y)):
-        s.append(alpha * y.iloc[i-1] + (1-alpha) * s[-1])
-    asof_idx = np.arange(len(y) - 1)
-    y_pred = pd.Series(s).iloc[asof_idx]
-    out = pd.DataFrame({"asof_idx": asof_idx, "y_pred": y_pred.values})
+    alphas = list(alphas)
+    if len(y) <= horizon: return pd.DataFrame(columns=["asof_idx", *alphas])
+    lv = ses_levels(y.to_numpy(), alphas)[:-horizon]   # 마지막 horizon일은 정답일 없음
+    out = pd.DataFrame(lv, columns=alphas)
+    out.insert(0, "asof_idx", np.arange(len(y) - horizon))
     return out.dropna().reset_index(drop=True)
+
+def ses_next_day_series(y: pd.Series, alpha: float, horizon: int = 1) -> pd.DataFrame:
+    res = ses_next_day_multi(y, [alpha], horizon)
+    return res.rename(columns={alpha: "y_pred"})[["asof_idx", "y_pred"]]
+
+def _panel_layout(vals: np.ndarray):
+    """열별 (유효 마스크, 값 있는 열, 첫/마지막 유효 행, 중간 결측 없는 열)."""
+    T = len(vals)
+    valid = ~np.isnan(vals)
+    has = valid.any(axis=0)
+    first = valid.argmax(axis=0)
+    last = T - 1 - valid[::-1].argmax(axis=0)
+    dense = has & (valid.sum(axis=0) == last - first + 1)
+    return valid, has, first, last, dense
+
+def steps_ahead(vals) -> np.ndarray:
+    """
+    (T, N) 칸마다 같은 열에서 그 뒤에 남은 유효값 수 (결측 칸은 -1).
+    MA/SES는 평탄 예측이라 horizon마다 값은 같고 칸만 다름 → H=h 예측 = H=1 예측 중 steps_ahead >= h
+    """
+    valid = ~np.isnan(np.asarray(vals, dtype=float))
+    out = valid[::-1].cumsum(axis=0)[::-1] - 1
+    out[~valid] = -1
+    return out
+
+def _mask_asof(out: np.ndarray, valid, has, last) -> None:
+    # 값이 없던 칸과 열마다 마지막 유효일(다음날 없음)은 예측 없음
+    out[:, ~valid] = np.nan
+    out[:, last[has], np.flatnonzero(has)] = np.nan
+
+def ma_panel(panel: pd.DataFrame, windows) -> dict[int, pd.DataFrame]:
+    """
+    (date × ticker) 종가 패널의 이동평균 asof 예측, window 전부 한 번에. 반환: window → 패널 모양.
+    티커(열)별 ma_next_day_series와 같은 칸/같은 값 (앞쪽 NaN은 rolling이 건너뜀,
+    중간 결측이 있는 열만 유효값으로 따로 rolling).
+    """
+    vals = panel.to_numpy(dtype=float)
+    windows = list(windows)
+    valid, has, first, last, dense = _panel_layout(vals)
+    out = np.full((len(windows),) + vals.shape, np.nan)
+    gaps = np.flatnonzero(has & ~dense)
+    for k, w in enumerate(windows):
+        out[k] = pd.DataFrame(vals).rolling(w).mean().to_numpy()
+        for j in gaps:
+            rows = np.flatnonzero(valid[:, j])
+            out[k, rows, j] = pd.Series(vals[rows, j]).rolling(w).mean().to_numpy()
+    _mask_asof(out, valid, has, last)
+    return {w: pd.DataFrame(out[k], index=panel.index, columns=panel.columns, copy=False)
+            for k, w in enumerate(windows)}
+
+def ses_panel(panel: pd.DataFrame, alphas) -> dict[float, pd.DataFrame]:
+    """
+    (date × ticker) 종가 패널 전체를 한 번에. 반환: alpha → 패널과 같은 모양의 asof 예측.
+    티커(열)별 ses_next_day_series와 같은 칸/같은 값: 열마다 첫 유효값부터 시작하고
+    마지막 유효일(다음날 없음)과 값이 없던 칸은 NaN. 중간 결측이 있는 열은 유효값만으로 따로 계산.
+    """
+    vals = panel.to_numpy(dtype=float)
+    alphas = list(alphas)
+    T, N = vals.shape
+    out = np.full((len(alphas), T, N), np.nan)   # alpha별로 연속 메모리 → DataFrame 복사 없음
+    valid, has, first, last, dense = _panel_layout(vals)
+    # 결측 없는 열: 시작일이 같은 열끼리 묶어 2-D로 (끝난 뒤의 NaN은 뒤로만 번지므로 무해)
+    for f in np.unique(first[dense]):
+        cols = np.flatnonzero(dense & (first == f))
+        if len(cols) == N:
+            cols = slice(None)
+        out[:, f:, cols] = np.moveaxis(ses_levels(vals[f:, cols], alphas), -1, 0)
+    for j in np.flatnonzero(has & ~dense):
+        rows = np.flatnonzero(valid[:, j])
+        out[:, rows, j] = ses_levels(vals[rows, j], alphas).T
+    _mask_asof(out, valid, has, last)
+    return {a: pd.DataFrame(out[k], index=panel.index, columns=panel.columns, copy=False)
+            for k, a in enumerate(alphas)}
+
+# ---------------------------------------------------------------- 상태 진행 (증분)
+# vals/fresh: (T, N) 종가 / 이번에 새로 반영할 칸, prev: (N,) 열마다 직전에 반영한 행(-1 = 없음)
+# 새 종가가 들어오면 직전 반영일에 '다음날'이 생기므로 그 행에 asof 예측을 채움 (전체 계산과 같은 칸)
+# 반환 (T, N) 예측, st와 prev는 제자리 갱신
+
+def ma_advance(st: dict, vals: np.ndarray, fresh: np.ndarray, prev: np.ndarray, window: int) -> np.ndarray:
+    """이동평균: st = n(반영 개수) / sum / buf(N, window) 링 버퍼 / pos(다음에 덮을 칸)."""
+    out = np.full(vals.shape, np.nan)
+    for r in np.flatnonzero(fresh.any(axis=1)):
+        j = np.flatnonzero(fresh[r])
+        full = st["n"][j] >= window
+        e = j[full & (prev[j] >= 0)]
+        out[prev[e], e] = st["sum"][e] / window
+        y, p = vals[r, j], st["pos"][j]
+        st["sum"][j] += y - np.where(full, st["buf"][j, p], 0.0)
+        st["buf"][j, p] = y
+        st["pos"][j] = (p + 1) % window
+        st["n"][j] += 1
+        prev[j] = r
+    return out
+
+def ses_advance(st: dict, vals: np.ndarray, fresh: np.ndarray, prev: np.ndarray, alpha: float) -> np.ndarray:
+    """SES: st = n / level(= 반영한 마지막 날의 asof 수준) / buf(N, 1) 마지막 종가. ses_levels와 같은 점화식."""
+    out = np.full(vals.shape, np.nan)
+    for r in np.flatnonzero(fresh.any(axis=1)):
+        j = np.flatnonzero(fresh[r])
+        has = st["n"][j] > 0
+        e = j[has & (prev[j] >= 0)]
+        out[prev[e], e] = st["level"][e]
+        y = vals[r, j]
+        st["level"][j] = np.where(has, alpha * st["buf"][j, 0] + (1 - alpha) * st["level"][j], y)
+        st["buf"][j, 0] = y
+        st["n"][j] += 1
+        prev[j] = r
+    return out
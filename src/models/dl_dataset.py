@@ -0,0 +1,183 @@
+# src/models/dl_dataset.py
+"""
+DL 학습용 윈도우 데이터셋 (윈도우를 미리 만들지 않음)
+- 여러 티커 시계열을 float32 버퍼 하나에 이어 붙이고, (윈도우 시작 위치, 티커 번호) 인덱스만 보관
+  → 메모리는 원 시계열 크기, 윈도우 텐서(N × window)는 배치 단위로만 만듦
+- windows(): 단일 시계열의 (X, Y)를 sliding_window_view로 복사 없이 (작은 미세조정용)
+- batches(): 배치마다 인덱스로 모아 (X (b, window, 1), Y (b,), ids (b,)), shuffle은 epoch마다 새 순서
+- relative=True: 윈도우마다 마지막 값 기준 수익률 (x / x_last - 1) — 공용 모델(dl_global)용
+- horizons: 윈도우 마지막 날 기준 h일 뒤 값들이 target (다중 출력 헤드), 여러 개면 Y는 (b, K)
+  트레이드오프: 모든 horizon의 target이 있는 윈도우만 쓰므로 최근 max(horizons)-1개 윈도우는
+  H=1 학습에서도 빠짐 (기본 1,5,20이면 최근 19거래일). 마스킹 손실 대신 헤드 하나·배치 하나를 택함
+- tf_dataset(): tf.data.Dataset.from_generator로 Keras fit에 스트리밍 (TF는 여기서만 import)
+- cache(): 버퍼/인덱스를 DL_DATASET_DIR에 .npy로 저장하고 memmap으로 다시 열어 반복 epoch는 디스크 페이지에서
+  (내용 해시로 디렉터리 이름 → 같은 입력이면 재사용, DL_DATASET_MAX_AGE_DAYS 넘게 안 쓴 디렉터리는 삭제)
+
+예) ds = WindowDataset.from_series({"005930": y1, "000660": y2}, window=20).cache()
+    tr, va = ds.split(0.9)
+    model.fit(tr.tf_dataset(1024, shuffle=True), validation_data=va.tf_dataset(1024))
+"""
+from __future__ import annotations
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Iterator, Optional
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+DATASET_DIR = os.getenv("DL_DATASET_DIR", os.path.join("data", "cache", "dl"))
+DATASET_MAX_AGE_DAYS = float(os.getenv("DL_DATASET_MAX_AGE_DAYS", "3"))   # 입력이 매일 바뀌므로 지난 digest는 정리
+
+def windows(y, window: int, horizons=(1,)) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (X (n, window, 1), Y (n,) 또는 (n, K)) — y가 float32 연속 배열이면 X는 y의 뷰 (복사 없음),
+    horizon이 하나면 Y도 뷰.
+    """
+    y = np.ascontiguousarray(y, dtype=np.float32)
+    hs = np.asarray(horizons, dtype=np.int64)
+    v = sliding_window_view(y, window + int(hs.max()))
+    Y = v[:, window - 1 + hs[0]] if len(hs) == 1 else v[:, window - 1 + hs]
+    return v[:, :window, None], Y
+
+class WindowDataset:
+    """buf: 이어 붙인 시계열, starts: 윈도우 시작 위치(buf 기준), ids: 윈도우의 시계열 번호."""
+
+    def __init__(self, buf: np.ndarray, starts: np.ndarray, ids: np.ndarray, window: int,
+                 keys: list | None = None, relative: bool = False, horizons=(1,)):
+        self.buf = buf
+        self.starts = starts
+        self.ids = ids
+        self.window = int(window)
+        self.keys = list(keys) if keys is not None else []
+        self.relative = relative
+        self.horizons = tuple(int(h) for h in horizons)
+
+    @classmethod
+    def from_series(cls, series, window: int, max_per_series: Optional[int] = None,
+                    relative: bool = False, horizons=(1,)) -> "WindowDataset":
+        """
+        series: {key: 1-D 배열} 또는 배열 목록. 결측은 호출 측에서 제거. 시계열마다 최근 max_per_series개 윈도우
+        (target이 전부 있는 윈도우만 = 마지막 max(horizons)-1개는 빠짐).
+        """
+        items = list(series.items()) if isinstance(series, dict) else list(enumerate(series))
+        arrs = [np.asarray(s, dtype=np.float32).reshape(-1) for _, s in items]
+        lens = np.array([len(a) for a in arrs], dtype=np.int64)
+        offs = np.concatenate([[0], np.cumsum(lens)[:-1]]) if len(arrs) else np.zeros(0, dtype=np.int64)
+        span = window + max(horizons)
+        starts, ids = [], []
+        for i, (o, n) in enumerate(zip(offs, lens)):
+            k = max(0, n - span + 1)   # start + span <= o + n
+            s = o + np.arange(k, dtype=np.int64)
+            if max_per_series:
+                s = s[-max_per_series:]
+            starts.append(s)
+            ids.append(np.full(len(s), i, dtype=np.int32))
+        buf = np.concatenate(arrs) if arrs else np.zeros(0, dtype=np.float32)
+        cat = lambda xs, dt: np.concatenate(xs) if xs else np.zeros(0, dtype=dt)
+        return cls(buf, cat(starts, np.int64), cat(ids, np.int32), window, [k for k, _ in items], relative, horizons)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def _subset(self, rows: np.ndarray) -> "WindowDataset":
+        return WindowDataset(self.buf, self.starts[rows], self.ids[rows], self.window, self.keys, self.relative,
+                             self.horizons)
+
+    def split(self, frac: float = 0.9) -> tuple["WindowDataset", "WindowDataset"]:
+        """시계열마다 앞 frac은 학습, 나머지(최근)는 검증. 검증이 비면 첫 윈도우 하나."""
+        va = np.zeros(len(self), dtype=bool)
+        for i in np.unique(self.ids):
+            rows = np.flatnonzero(self.ids == i)
+            va[rows[max(int(len(rows) * frac), 1):]] = True
+        if not va.any() and len(self):
+            return self._subset(np.flatnonzero(~va)), self._subset(np.array([0]))
+        return self._subset(np.flatnonzero(~va)), self._subset(np.flatnonzero(va))
+
+    def take(self, rows) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """rows번째 윈도우들만 모아 (X (b, window, 1), Y (b,) 또는 (b, K), ids (b,)) — 배치 크기만큼만 복사."""
+        rows = np.asarray(rows)
+        hs = np.asarray(self.horizons)
+        w = np.asarray(self.buf[self.starts[rows, None] + np.arange(self.window + hs.max())], dtype=np.float32)
+        if self.relative:
+            w = w / w[:, self.window - 1:self.window] - 1
+        Y = w[:, self.window - 1 + hs]
+        return w[:, :self.window, None], (Y[:, 0] if len(hs) == 1 else Y), self.ids[rows]
+
+    def batches(self, batch_size: int, shuffle: bool = False, seed: int = 0) -> Iterator[tuple]:
+        order = np.random.default_rng(seed).permutation(len(self)) if shuffle else np.arange(len(self))
+        for i in range(0, len(order), batch_size):
+            yield self.take(order[i:i + batch_size])
+
+    def tf_dataset(self, batch_size: int, shuffle: bool = False, seed: int = 0, with_ids: bool = False):
+        """Keras fit용 스트리밍 입력. epoch마다 generator가 다시 불리며 shuffle 순서도 새로."""
+        import tensorflow as tf
+        epoch = itertools.count()
+
+        def gen():
+            for X, Y, ids in self.batches(batch_size, shuffle, seed + next(epoch)):
+                yield ((X, ids[:, None]) if with_ids else X), Y
+
+        x_sig = tf.TensorSpec((None, self.window, 1), tf.float32)
+        if with_ids:
+            x_sig = (x_sig, tf.TensorSpec((None, 1), tf.int32))
+        y_shape = (None,) if len(self.horizons) == 1 else (None, len(self.horizons))
+        sig = (x_sig, tf.TensorSpec(y_shape, tf.float32))
+        return tf.data.Dataset.from_generator(gen, output_signature=sig).prefetch(2)
+
+    def digest(self) -> str:
+        h = hashlib.sha1()
+        for a in (self.buf, self.starts, self.ids):
+            h.update(np.ascontiguousarray(a).view(np.uint8))
+        h.update(json.dumps([self.window, self.relative, [str(k) for k in self.keys],
+                             list(self.horizons)]).encode("utf-8"))
+        return h.hexdigest()[:16]
+
+    def cache(self, root: str = DATASET_DIR) -> "WindowDataset":
+        """디스크(.npy)에 저장 후 memmap으로 다시 연 데이터셋. 같은 내용이 이미 있으면 쓰지 않고 연다."""
+        path = os.path.join(root, self.digest())
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            os.makedirs(path, exist_ok=True)
+            sfx = f".{os.getpid()}.{threading.get_ident()}.tmp"
+            for name in ("buf", "starts", "ids"):   # 다른 프로세스가 memmap 중일 수 있으므로 교체로
+                with open(os.path.join(path, f"{name}.npy{sfx}"), "wb") as f:
+                    np.save(f, getattr(self, name))
+                os.replace(os.path.join(path, f"{name}.npy{sfx}"), os.path.join(path, f"{name}.npy"))
+            with open(os.path.join(path, f"meta.json{sfx}"), "w", encoding="utf-8") as f:   # meta가 마지막 = 완성본
+                json.dump({"window": self.window, "relative": self.relative, "horizons": list(self.horizons),
+                           "keys": [str(k) for k in self.keys]}, f, ensure_ascii=False)
+            os.replace(os.path.join(path, f"meta.json{sfx}"), os.path.join(path, "meta.json"))
+        else:
+            os.utime(os.path.join(path, "meta.json"))   # 재사용 = 최근 사용
+        prune_cache(root, keep=path)
+        return open_cached(path)
+
+def prune_cache(root: str = DATASET_DIR, max_age_days: float = DATASET_MAX_AGE_DAYS, keep: Optional[str] = None) -> int:
+    """root 아래 digest 디렉터리 중 max_age_days 넘게 쓰이지 않은 것 삭제. 지운 개수 반환."""
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if path == keep or not os.path.isdir(path):
+            continue
+        meta = os.path.join(path, "meta.json")
+        try:
+            if os.path.getmtime(meta if os.path.exists(meta) else path) >= cutoff:
+                continue
+        except OSError:
+            continue
+        shutil.rmtree(path, ignore_errors=True)   # 다른 프로세스가 memmap 중이어도 열린 파일은 유지됨 (POSIX)
+        removed += 1
+    return removed
+
+def open_cached(path: str) -> WindowDataset:
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    load = lambda name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+    return WindowDataset(load("buf"), load("starts"), load("ids"), meta["window"], meta["keys"], meta["relative"],
+                         meta.get("horizons", [1]))
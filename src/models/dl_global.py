@@ -0,0 +1,99 @@
+# src/models/dl_global.py
+"""
+전 종목 공용 LSTM (safe_dl_lstm_global)
+- 티커마다 작은 LSTM을 따로 학습(그래프 생성/파이썬 오버헤드 × 티커 수)하는 대신,
+  모든 티커의 윈도우를 한 네트워크에서 큰 배치로 학습
+- 정규화: 윈도우마다 마지막 종가 기준 수익률 (x / x_last - 1) → 가격 수준이 다른 티커를 한 모델로
+  target = 다음날 종가 / x_last - 1, 예측 = x_last * (1 + ŷ)
+- horizons: h일 뒤 종가 수익률을 출력 헤드 하나로 함께 (출력 크기 = horizon 수)
+  티커마다 최근 max(horizons)-1개 윈도우는 target이 다 없어 H=1 학습에서도 빠짐 (dl_dataset 참고)
+- 선택: 티커 임베딩(embed_dim > 0) — 티커별 편향/변동성 차이
+- 예측은 전 티커의 마지막 윈도우를 predict 한 번으로
+- 학습 데이터는 dl_dataset.WindowDataset (윈도우 텐서를 만들지 않고 배치 스트리밍, DL_DATASET_CACHE=1이면 memmap 캐시, 기본 꺼짐)
+"""
+from __future__ import annotations
+import os
+import numpy as np
+
+from .dl_dataset import WindowDataset
+
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+try:
+    import tensorflow as tf
+    from tensorflow.keras import layers, callbacks, models
+except Exception as e:  # 텐서플로 미설치/미로딩 시
+    class DLNotAvailable(RuntimeError): ...
+    raise DLNotAvailable(f"TensorFlow not available: {e}")
+
+_SEED = 42
+tf.random.set_seed(_SEED)
+DATASET_CACHE = os.getenv("DL_DATASET_CACHE", "0") == "1"   # 메모리가 빠듯할 때만 (디스크에 digest별 디렉터리)
+
+
+def _build_model(window: int, n_tickers: int, embed_dim: int, n_out: int = 1) -> tf.keras.Model:
+    seq = layers.Input(shape=(window, 1))
+    x = layers.LSTM(32, return_sequences=False)(seq)
+    inputs = [seq]
+    if embed_dim > 0:
+        tid = layers.Input(shape=(1,), dtype="int32")
+        e = layers.Flatten()(layers.Embedding(n_tickers, embed_dim)(tid))
+        x = layers.Concatenate()([x, e])
+        inputs.append(tid)
+    x = layers.Dense(16, activation="relu")(x)
+    out = layers.Dense(n_out)(x)
+    model = models.Model(inputs=inputs, outputs=out)
+    model.compile(optimizer="adam", loss="mae", metrics=["mae"])
+    return model
+
+
+def predict_next_day_close_global(
+    closes: dict,
+    window: int = 20,
+    epochs: int = 8,
+    batch_size: int = 1024,
+    patience: int = 2,
+    max_per_ticker: int = 1000,
+    embed_dim: int = 4,
+    horizons=(1,),
+) -> dict:
+    """
+    {ticker: 종가 시계열} 전체로 공용 LSTM 하나를 학습하고 티커별 '다음날 종가' 예측을 반환
+    (horizons가 여러 개면 티커별 값은 horizons 순서의 배열).
+    히스토리가 window+max(horizons)+4 미만인 티커는 제외. 검증은 티커마다 마지막 10% 윈도우.
+    """
+    ys = {}
+    for t, s in closes.items():
+        y = np.asarray(s, dtype=np.float32)
+        y = y[~np.isnan(y)]
+        if len(y) >= window + max(horizons) + 4 and (y > 0).all():
+            ys[t] = y
+    if not ys:
+        return {}
+    tickers = list(ys)
+
+    ds = WindowDataset.from_series(ys, window, max_per_series=max_per_ticker, relative=True, horizons=horizons)
+    if DATASET_CACHE:
+        ds = ds.cache()   # 반복 epoch는 memmap에서
+    tr, va = ds.split(0.9)
+
+    def _inputs(x, i):
+        return [x, i[:, None]] if embed_dim > 0 else x
+
+    model = _build_model(window, len(tickers), embed_dim, len(horizons))
+    es = callbacks.EarlyStopping(monitor="val_mae", patience=patience, restore_best_weights=True, verbose=0)
+    model.fit(
+        tr.tf_dataset(batch_size, shuffle=True, seed=_SEED, with_ids=embed_dim > 0),
+        validation_data=va.tf_dataset(batch_size, with_ids=embed_dim > 0),
+        epochs=epochs,
+        callbacks=[es],
+        verbose=0,
+    )
+
+    # 전 티커 마지막 윈도우 → predict 한 번
+    last = np.stack([ys[t][-window:] / ys[t][-1] - 1 for t in tickers])[..., None].astype(np.float32)
+    r = model.predict(_inputs(last, np.arange(len(tickers), dtype=np.int32)),
+                      batch_size=batch_size, verbose=0).reshape(len(tickers), -1).astype(np.float64)
+    if r.shape[1] == 1:
+        return {t: float(ys[t][-1] * (1 + r[i, 0])) for i, t in enumerate(tickers)}
+    return {t: ys[t][-1] * (1 + r[i]) for i, t in enumerate(tickers)}
@@ -17,6 +17,9 @@ except Exception as e:  # 텐서플로 미설치/미로딩 시
 from sklearn.preprocessing import MinMaxScaler
 from typing import Tuple
 
+from . import dl_store, lstm_numpy
+from .dl_dataset import WindowDataset, windows
+
 # 재현성(완벽하진 않지만 기본 고정)
 _SEED = 42
 np.random.seed(_SEED)
@@ -28,43 +31,89 @@ class DLNotAvailable(RuntimeError):
     pass
 
 
-def _make_supervised(y: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+def _make_supervised(y: np.ndarray, window: int, horizons=(1,)) -> Tuple[np.ndarray, np.ndarray]:
     """
     1차원 시계열 y(길이 N) -> (X, y_next)
-    X: (N-window, window, 1), y_next: (N-window,)
+    X: (N-window-max(h)+1, window, 1), y_next: (같은 수,) 또는 horizon이 여러 개면 (같은 수, K)
+    — X는 y의 strided view (복사 없음)
     """
-    X, Y = [], []
-    for i in range(window, len(y)):
-        X.append(y[i - window:i])
-        Y.append(y[i])
-    X = np.asarray(X, dtype=np.float32)
-    Y = np.asarray(Y, dtype=np.float32)
-    # LSTM 입력 차원 (batch, time, features)
-    return X.reshape((-1, window, 1)), Y
+    return windows(y, window, horizons)
 
 
-def _build_model(window: int) -> tf.keras.Model:
+def _build_model(window: int, n_out: int = 1) -> tf.keras.Model:
     """
-    간단하고 빠른 LSTM 회귀 모델.
+    간단하고 빠른 LSTM 회귀 모델. n_out: 출력 헤드 크기 (horizon마다 하나, 몸통은 공유).
     """
     inp = layers.Input(shape=(window, 1))
     x = layers.LSTM(32, return_sequences=False)(inp)
     x = layers.Dense(16, activation="relu")(x)
-    out = layers.Dense(1)(x)
+    out = layers.Dense(n_out)(x)
     model = models.Model(inputs=inp, outputs=out)
     model.compile(optimizer="adam", loss="mae", metrics=["mae"])
     return model
 
 
+def _train_full(y: np.ndarray, window: int, epochs: int, batch_size: int, patience: int, horizons=(1,)):
+    """처음부터 학습: (model, scaler, y_scaled)."""
+    # 스케일링(0~1)
+    scaler = MinMaxScaler()
+    y_scaled = scaler.fit_transform(y.reshape(-1, 1)).flatten()
+
+    # 지도학습 데이터: 윈도우 텐서를 만들지 않고 배치 단위로 스트리밍
+    # 매우 긴 시계열이면 최근 2~3천 포인트로 제한해서 속도 유지(선택)
+    MAX_SAMPLES = 3000
+    ds = WindowDataset.from_series([y_scaled], window, max_per_series=MAX_SAMPLES, horizons=horizons)
+
+    # 학습/검증 분리(마지막 10% 검증)
+    tr, va = ds.split(0.9)
+
+    model = _build_model(window, len(horizons))
+    es = callbacks.EarlyStopping(monitor="val_mae", patience=patience, restore_best_weights=True, verbose=0)
+
+    model.fit(
+        tr.tf_dataset(batch_size, shuffle=True, seed=_SEED),
+        validation_data=va.tf_dataset(batch_size),
+        epochs=epochs,
+        callbacks=[es],
+        verbose=0,
+    )
+    return model, scaler, y_scaled
+
+
+def _clean(close_series, window: int, horizons=(1,)) -> np.ndarray:
+    y = np.asarray(close_series, dtype=np.float32)
+    y = y[~np.isnan(y)]
+    if len(y) < window + max(horizons) + 4:
+        raise ValueError(f"Not enough history for DL. len={len(y)}, window={window}")
+    return y
+
+
+def _out(yhat):
+    # horizon 하나면 float (이전과 같음), 여러 개면 horizon 순서의 배열
+    yhat = np.asarray(yhat, dtype=np.float64).reshape(-1)
+    return float(yhat[0]) if len(yhat) == 1 else yhat
+
+
+def _predict_last(model, y_scaled: np.ndarray, window: int, scale: float, min_: float):
+    # 다음 입력 윈도우 = 최근 window 길이, 역스케일은 MinMaxScaler.inverse_transform과 같은 식
+    last_win = np.asarray(y_scaled[-window:], dtype=np.float32).reshape(1, window, 1)
+    yhat_scaled = np.asarray(model.predict(last_win, verbose=0), dtype=np.float64).reshape(-1)
+    return _out((yhat_scaled - min_) / scale)
+
+
 def predict_next_day_close(
     close_series: np.ndarray | pd.Series,
     window: int = 20,
     epochs: int = 12,
     batch_size: int = 32,
     patience: int = 3,
-) -> float:
+    horizons=(1,),
+):
     """
     종가 시계열로 LSTM을 학습한 뒤, 마지막 구간을 사용해 '다음날 종가' 1-step 예측을 반환.
+    horizons가 여러 개면 출력 헤드 하나로 horizon별 종가를 함께 예측해 배열로 반환.
+    이때 학습 윈도우는 모든 horizon의 target이 있는 것만이라 최근 max(horizons)-1개는
+    H=1에도 쓰이지 않음 (horizons=(1,)만 주면 마지막 날까지 학습).
 
     Parameters
     ----------
@@ -73,50 +122,84 @@ def predict_next_day_close(
     window : int
         LSTM 입력 시퀀스 길이.
     epochs, batch_size, patience : 학습 하이퍼파라미터.
+    horizons : 예측할 거래일 수들 (기본 (1,) = 다음날).
 
     Returns
     -------
-    float : 예측 종가(원 스케일)
+    float : 예측 종가(원 스케일), horizon이 여러 개면 np.ndarray (horizons 순서)
     """
-    # 입력 정리
-    y = np.asarray(close_series, dtype=np.float32)
-    y = y[~np.isnan(y)]
-    if len(y) < window + 5:
-        raise ValueError(f"Not enough history for DL. len={len(y)}, window={window}")
-
-    # 스케일링(0~1)
-    scaler = MinMaxScaler()
-    y_scaled = scaler.fit_transform(y.reshape(-1, 1)).flatten()
+    y = _clean(close_series, window, horizons)
+    model, scaler, y_scaled = _train_full(y, window, epochs, batch_size, patience, horizons)
+    return _predict_last(model, y_scaled, window, float(scaler.scale_[0]), float(scaler.min_[0]))
 
-    # 지도학습 데이터
-    X, Y = _make_supervised(y_scaled, window)
-    # 매우 긴 시계열이면 최근 2~3천 포인트로 제한해서 속도 유지(선택)
-    MAX_SAMPLES = 3000
-    if len(X) > MAX_SAMPLES:
-        X = X[-MAX_SAMPLES:]
-        Y = Y[-MAX_SAMPLES:]
-
-    # 학습/검증 분리(마지막 10% 검증)
-    n = len(X)
-    split = max(int(n * 0.9), 1)
-    X_tr, Y_tr = X[:split], Y[:split]
-    X_va, Y_va = X[split:], Y[split:] if split < n else (X[:1], Y[:1])  # 최소 보장
 
-    model = _build_model(window)
-    es = callbacks.EarlyStopping(monitor="val_mae", patience=patience, restore_best_weights=True, verbose=0)
-
-    model.fit(
-        X_tr, Y_tr,
-        validation_data=(X_va, Y_va),
-        epochs=epochs,
-        batch_size=batch_size,
-        callbacks=[es],
-        verbose=0,
-    )
-
-    # 다음날 입력 윈도우 = 최근 window 길이
-    last_win = y_scaled[-window:].reshape(1, window, 1)
-    yhat_scaled = float(model.predict(last_win, verbose=0).squeeze())
-    # 역스케일
-    yhat = scaler.inverse_transform([[yhat_scaled]])[0, 0]
-    return float(yhat)
+def predict_next_day_close_warm(
+    ticker: str,
+    dates,
+    close_series: np.ndarray | pd.Series,
+    window: int = 20,
+    epochs: int = 12,
+    batch_size: int = 32,
+    patience: int = 3,
+    version: str = "v1",
+    finetune_epochs: int = dl_store.FINETUNE_EPOCHS,
+    retrain_every: int = dl_store.RETRAIN_EVERY,
+    horizons=(1,),
+):
+    """
+    predict_next_day_close의 warm start 버전 (dl_store에 티커/버전/window별로 저장).
+    - 저장된 모델이 있으면 watermark 이후 새 날짜가 target인 윈도우만으로 finetune_epochs 미세조정
+      (스케일러는 마지막 전체 학습 때 값 유지)
+    - 저장된 모델이 없거나, 미세조정이 retrain_every번 쌓였거나, watermark까지의 히스토리가
+      저장 당시와 다르면(행 추가/삭제), horizons가 저장 당시와 다르면 전체 재학습
+    - 새 날짜가 없으면 학습 없이 예측만
+    dates: close_series와 같은 길이의 날짜 (결측 종가 행은 함께 제외)
+    """
+    d = pd.to_datetime(pd.Series(dates)).to_numpy()
+    y = np.asarray(close_series, dtype=np.float32)
+    d = d[~np.isnan(y)]
+    y = _clean(y, window, horizons)
+    last = str(pd.Timestamp(d[-1]).date())
+    hs = [int(h) for h in horizons]
+
+    meta = dl_store.load_meta(ticker, version, window)
+    k = -1
+    if meta is not None and meta["finetunes"] < retrain_every and meta.get("horizons", [1]) == hs:
+        wm = np.datetime64(meta["watermark"])
+        k = int(np.searchsorted(d, wm))
+        if k >= len(d) or d[k] != wm or k + 1 != meta["n_obs"]:
+            k = -1   # 히스토리가 바뀜 → 전체 재학습
+
+    if k < 0:
+        model, scaler, y_scaled = _train_full(y, window, epochs, batch_size, patience, horizons)
+        scale, min_ = float(scaler.scale_[0]), float(scaler.min_[0])
+        meta = {
+            "ticker": ticker, "version": version, "window": window, "horizons": hs,
+            "data_min": float(scaler.data_min_[0]), "data_max": float(scaler.data_max_[0]),
+            "scale": scale, "min": min_, "full_at": last, "finetunes": 0,
+        }
+        trained = True
+    else:
+        scale, min_ = meta["scale"], meta["min"]
+        npz = dl_store.npz_path(ticker, version, window)
+        if k == len(y) - 1 and os.path.exists(npz):
+            # 새 날짜 없음 → 학습 없이 NumPy 추론 (Keras 모델 로드 생략)
+            return _out(lstm_numpy.predict_next_close(lstm_numpy.load_npz(npz), y[None, -window:])[0])
+        model = models.load_model(dl_store.model_path(ticker, version, window))
+        y_scaled = (y * np.float32(scale) + np.float32(min_)).astype(np.float32)
+        trained = k < len(y) - 1
+        if trained:
+            # 가장 먼 target 인덱스가 k+1..끝인 윈도우만
+            X, Y = _make_supervised(y_scaled[max(0, k + 2 - window - max(hs)):], window, hs)
+            model.fit(X, Y, epochs=finetune_epochs, batch_size=batch_size, shuffle=True, verbose=0)
+            meta["finetunes"] += 1
+
+    if trained:
+        tmp = dl_store.tmp_model_path(ticker, version, window)
+        os.makedirs(os.path.dirname(tmp), exist_ok=True)
+        model.save(tmp)
+        dl_store.commit_model(ticker, version, window, tmp)
+        lstm_numpy.save_npz(dl_store.npz_path(ticker, version, window), lstm_numpy.from_keras(model, scale, min_))
+        meta.update({"watermark": last, "n_obs": int(len(y)), "trained_at": pd.Timestamp.now().isoformat()})
+        dl_store.save_meta(ticker, version, window, meta)
+    return _predict_last(model, y_scaled, window, scale, min_)
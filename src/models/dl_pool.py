@@ -0,0 +1,121 @@
+# src/models/dl_pool.py
+"""
+DL 병렬 실행기 (프로세스 풀)
+- 티커를 프로세스 풀에 나눠 학습/예측 (작은 LSTM 하나는 TF 기본 스레딩으로 코어를 못 채움)
+- 스레드 예산: 워커마다 intra-op = 코어 수 // 워커 수, inter-op = 1 → 전체 합이 코어 수
+  OMP/MKL/OPENBLAS 스레드 수는 spawn 자식이 메인 모듈(numpy import)을 다시 실행하기 전에 정해져야 하므로
+  풀을 만들기 전에 부모 os.environ에 넣어 물려주고 끝나면 되돌림. TF 스레드 설정은 워커 initializer에서
+- 워커 수 기본 = min(코어 수, DL_MAX_WORKERS=4): 워커마다 TF 런타임 + 모델이 떠서 (수백 MB씩) 코어 수만큼 띄우면 메모리가 먼저 참
+- spawn 컨텍스트 (fork된 자식에서 TF 런타임은 불안정), 호출 측 프로세스는 TF를 import하지 않음
+  (실행할 함수는 "모듈:이름" 문자열로 넘김)
+- 티커 단위 실패 격리: 예외는 (ticker, None, err)로 돌려주고 나머지는 계속
+  (워커 프로세스가 죽어도 남은 티커는 err로 보고)
+- 결과는 완료 순서대로 메인 프로세스로 → 호출 측이 모아서 한 번에 UPSERT
+
+예) for t, yhat, err in dl_map("src.models.dl_lstm:predict_next_day_close", jobs): ...
+"""
+from __future__ import annotations
+import importlib
+import multiprocessing as mp
+import os
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Hashable, Iterable, Iterator, Tuple
+
+DL_WORKERS = int(os.getenv("DL_WORKERS", "0"))                 # 0 = 자동 (코어 수 // 워커당 스레드, DL_MAX_WORKERS 이하)
+DL_MAX_WORKERS = int(os.getenv("DL_MAX_WORKERS", "4"))           # 자동일 때 상한 (워커당 TF 프로세스 메모리)
+DL_THREADS_PER_WORKER = int(os.getenv("DL_THREADS_PER_WORKER", "1"))
+DL_TASKS_PER_CHILD = int(os.getenv("DL_TASKS_PER_CHILD", "50"))  # 워커 재시작 주기 (Keras 메모리 누적 방지)
+
+Job = Tuple[Hashable, tuple, dict]   # (key, args, kwargs)
+
+_fn = None
+
+def cpu_budget() -> int:
+    """이 프로세스가 쓸 수 있는 코어 수 (affinity/컨테이너 cpuset 반영)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def plan(workers: int | None = None) -> tuple[int, int]:
+    """(워커 수, 워커당 TF intra-op 스레드) — 워커 × 스레드 ≤ 코어 수."""
+    cores = cpu_budget()
+    w = workers or DL_WORKERS or min(max(1, cores // max(1, DL_THREADS_PER_WORKER)), max(1, DL_MAX_WORKERS))
+    w = max(1, min(int(w), cores))
+    return w, max(1, cores // w)
+
+def _resolve(path: str):
+    mod, name = path.split(":")
+    return getattr(importlib.import_module(mod), name)
+
+_THREAD_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+@contextmanager
+def _child_env(threads: int):
+    """spawn 자식이 물려받을 환경: BLAS 스레드 수 (numpy import 전에 있어야 적용). 끝나면 부모 값 복원."""
+    saved = {k: os.environ.get(k) for k in (*_THREAD_VARS, "TF_CPP_MIN_LOG_LEVEL")}
+    os.environ.update({k: str(threads) for k in _THREAD_VARS})
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+    try:
+        yield
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+def _init(fn_path: str, threads: int) -> None:
+    global _fn
+    try:
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    except Exception:
+        pass   # TF가 없으면 _resolve에서 DLNotAvailable로 드러남
+    _fn = _resolve(fn_path)
+
+def _work(key, args: tuple, kwargs: dict):
+    try:
+        return _fn(*args, **kwargs)
+    finally:
+        try:   # 작업마다 Keras 전역 그래프 정리
+            import tensorflow as tf
+            tf.keras.backend.clear_session()
+        except Exception:
+            pass
+
+def dl_map(fn_path: str, jobs: Iterable[Job], workers: int | None = None) -> Iterator[Tuple[Hashable, Any, Exception | None]]:
+    """
+    jobs의 (key, args, kwargs)마다 fn(*args, **kwargs)를 워커에서 실행, 완료 순서대로 (key, 결과, 예외).
+    워커가 1이면 풀 없이 현재 프로세스에서 순서대로.
+    """
+    w, threads = plan(workers)
+    jobs = list(jobs)
+    if w == 1 or len(jobs) <= 1:
+        try:
+            fn = _resolve(fn_path)
+        except Exception as e:   # 백엔드 import 실패(DLNotAvailable 등)도 티커별 err로 (풀 경로와 같게)
+            for key, _, _ in jobs:
+                yield key, None, e
+            return
+        for key, args, kwargs in jobs:
+            try:
+                yield key, fn(*args, **kwargs), None
+            except Exception as e:
+                yield key, None, e
+        return
+    w = min(w, len(jobs))
+    threads = max(1, cpu_budget() // w)
+    print(f"[dl_pool] workers={w} threads/worker={threads} jobs={len(jobs)}")
+    with _child_env(threads), ProcessPoolExecutor(max_workers=w, mp_context=mp.get_context("spawn"),
+                                                  initializer=_init, initargs=(fn_path, threads),
+                                                  max_tasks_per_child=DL_TASKS_PER_CHILD or None) as ex:
+        futs = {ex.submit(_work, key, args, kwargs): key for key, args, kwargs in jobs}
+        for f in as_completed(futs):
+            key = futs[f]
+            try:
+                yield key, f.result(), None
+            except Exception as e:   # 작업 예외 / 워커 비정상 종료(BrokenProcessPool)
+                yield key, None, e
@@ -0,0 +1,93 @@
+# src/models/dl_store.py
+"""
+DL 모델 로컬 저장소 (티커별 LSTM 가중치 + 스케일러 + 학습 데이터 watermark)
+- <DL_MODEL_DIR>/<version>/w<window>/<ticker>/model.keras, model.npz(NumPy 추론용), meta.json
+- meta: 스케일러 min/max, watermark(마지막으로 학습에 쓴 날짜), n_obs, 마지막 전체 학습일, 미세조정 횟수
+- 일일 실행은 저장된 모델을 불러 새로 들어온 윈도우만으로 몇 epoch 미세조정,
+  DL_RETRAIN_EVERY번마다(또는 히스토리가 바뀌면) 전체 재학습 — 판단은 dl_lstm.predict_next_day_close_warm
+- 이 모듈은 TensorFlow를 import하지 않음 (목록/정리는 TF 없이)
+
+예) python -m src.models.dl_store list
+    python -m src.models.dl_store purge --version v1
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import shutil
+import threading
+from typing import Optional
+
+MODEL_DIR = os.getenv("DL_MODEL_DIR", os.path.join("data", "models", "dl"))
+RETRAIN_EVERY = int(os.getenv("DL_RETRAIN_EVERY", "20"))   # 미세조정 N번마다 전체 재학습
+FINETUNE_EPOCHS = int(os.getenv("DL_FINETUNE_EPOCHS", "2"))
+
+def key_dir(ticker: str, version: str, window: int) -> str:
+    return os.path.join(MODEL_DIR, version, f"w{window}", ticker)
+
+def model_path(ticker: str, version: str, window: int) -> str:
+    return os.path.join(key_dir(ticker, version, window), "model.keras")
+
+def npz_path(ticker: str, version: str, window: int) -> str:
+    return os.path.join(key_dir(ticker, version, window), "model.npz")
+
+def tmp_model_path(ticker: str, version: str, window: int) -> str:
+    # keras는 확장자로 형식을 정하므로 .keras로 끝나야 함
+    return os.path.join(key_dir(ticker, version, window), f"model.{os.getpid()}.{threading.get_ident()}.tmp.keras")
+
+def _meta_path(ticker: str, version: str, window: int) -> str:
+    return os.path.join(key_dir(ticker, version, window), "meta.json")
+
+def load_meta(ticker: str, version: str, window: int) -> Optional[dict]:
+    """저장된 meta (모델 파일까지 있어야 유효), 없으면 None."""
+    p = _meta_path(ticker, version, window)
+    if not (os.path.exists(p) and os.path.exists(model_path(ticker, version, window))):
+        return None
+    try:
+        with open(p, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_meta(ticker: str, version: str, window: int, meta: dict) -> None:
+    p = _meta_path(ticker, version, window)
+    os.makedirs(os.path.dirname(p), exist_ok=True)
+    tmp = f"{p}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp, p)
+
+def commit_model(ticker: str, version: str, window: int, tmp: str) -> None:
+    """tmp_model_path에 저장한 파일을 원자적으로 교체 (meta보다 먼저)."""
+    os.replace(tmp, model_path(ticker, version, window))
+
+def entries(version: Optional[str] = None) -> list[dict]:
+    out = []
+    if not os.path.isdir(MODEL_DIR): return out
+    for v in sorted(os.listdir(MODEL_DIR)):
+        if version and v != version: continue
+        vdir = os.path.join(MODEL_DIR, v)
+        for w in sorted(os.listdir(vdir)) if os.path.isdir(vdir) else []:
+            for t in sorted(os.listdir(os.path.join(vdir, w))):
+                meta = load_meta(t, v, int(w[1:]))
+                if meta: out.append(meta)
+    return out
+
+def purge(version: str) -> None:
+    shutil.rmtree(os.path.join(MODEL_DIR, version), ignore_errors=True)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    l = sub.add_parser("list")
+    l.add_argument("--version", type=str, default=None)
+    p = sub.add_parser("purge", help="remove all stored models of a version")
+    p.add_argument("--version", type=str, required=True)
+    args = ap.parse_args()
+    if args.cmd == "list":
+        for m in entries(args.version):
+            print(f"{m['version']}\tw{m['window']}\t{m['ticker']}\twatermark={m['watermark']}\t"
+                  f"full={m['full_at']}\tfinetunes={m['finetunes']}")
+    else:
+        purge(args.version)
+        print(f"[dl_store] purged {args.version}")
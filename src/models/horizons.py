@@ -0,0 +1,12 @@
+# src/models/horizons.py
+"""
+예측/평가 horizon(거래일) — env HORIZONS를 읽는 곳은 여기 한 군데
+- predict_daily / predict_baseline_safe / ensemble_and_eval / eval_daily / db.indexes / web이 같은 값을 import
+- 순서 = DL 다중 출력 헤드의 출력 순서 (저장된 모델의 horizons와 다르면 전체 재학습)
+
+예) HORIZONS=1,5 python -m src.pipeline.predict_daily
+"""
+from __future__ import annotations
+import os
+
+HORIZONS: tuple[int, ...] = tuple(int(h) for h in os.getenv("HORIZONS", "1,5,20").split(","))
@@ -0,0 +1,157 @@
+# src/models/lstm_numpy.py
+"""
+학습된 LSTM(dl_lstm 구조: LSTM(32) → Dense(16, relu) → Dense(K), K = horizon 수)의 NumPy 추론 런타임
+- export: Keras 모델의 LSTM/Dense 가중치 + 스케일러(scale, min)를 .npz 하나로 (dl_store의 model.npz)
+- forward: Keras LSTM과 같은 식 (게이트 순서 i, f, c, o / sigmoid, tanh), float32
+  가중치를 티커별로 쌓으면 전 티커의 윈도우를 한 번에 (einsum) → 일일 추론에 TensorFlow 불필요
+- check: 저장된 Keras 모델의 predict와 NumPy 결과 비교 (TF 필요, 허용 오차 PARITY_ATOL)
+
+예) python -m src.models.lstm_numpy export --version v1
+    python -m src.models.lstm_numpy check --version v1
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import threading
+import numpy as np
+
+from . import dl_store
+
+PARITY_ATOL = float(os.getenv("DL_PARITY_ATOL", "1e-5"))   # 스케일된 출력 기준 허용 오차
+_KEYS = ("lstm_kernel", "lstm_recurrent", "lstm_bias", "dense1_kernel", "dense1_bias",
+         "dense2_kernel", "dense2_bias", "scale", "min")
+
+def from_keras(model, scale: float, min_: float) -> dict:
+    """Keras 모델(dl_lstm._build_model 구조) → 파라미터 dict. TF를 import하지 않음(객체 메서드만 사용)."""
+    lstm = [l for l in model.layers if type(l).__name__ == "LSTM"]
+    dense = [l for l in model.layers if type(l).__name__ == "Dense"]
+    if len(lstm) != 1 or len(dense) != 2:
+        raise ValueError("unsupported model: expected LSTM → Dense → Dense")
+    cfg = lstm[0].get_config()
+    if cfg.get("recurrent_activation") != "sigmoid" or cfg.get("activation") != "tanh":
+        raise ValueError(f"unsupported LSTM activations: {cfg.get('activation')}/{cfg.get('recurrent_activation')}")
+    if dense[0].get_config().get("activation") != "relu":
+        raise ValueError("unsupported Dense activation")
+    k, r, b = lstm[0].get_weights()
+    d1k, d1b = dense[0].get_weights()
+    d2k, d2b = dense[1].get_weights()
+    return {
+        "lstm_kernel": k, "lstm_recurrent": r, "lstm_bias": b,
+        "dense1_kernel": d1k, "dense1_bias": d1b, "dense2_kernel": d2k, "dense2_bias": d2b,
+        "scale": np.float64(scale), "min": np.float64(min_),
+    }
+
+def save_npz(path: str, params: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+    np.savez(tmp, **{k: np.asarray(params[k]) for k in _KEYS})
+    os.replace(tmp, path)
+
+def load_npz(path: str) -> dict:
+    with np.load(path) as z:
+        return {k: z[k] for k in _KEYS}
+
+def stack(params: list[dict]) -> dict:
+    """티커별 파라미터를 첫 축으로 쌓음 (모양이 같아야 함 = 같은 window/구조/출력 수)."""
+    return {k: np.stack([p[k] for p in params]) for k in _KEYS}
+
+def n_outputs(p: dict) -> int:
+    """출력 헤드 크기 (= 학습한 horizon 수)."""
+    return int(p["dense2_kernel"].shape[-1])
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-z))
+
+def _mm(x, w):
+    # 가중치가 샘플별로 쌓여 있으면(3차원) 샘플마다 자기 가중치로
+    return np.einsum("bi,bik->bk", x, w) if w.ndim == 3 else x @ w
+
+def forward(p: dict, X) -> np.ndarray:
+    """
+    스케일된 입력 윈도우 X: (B, T) 또는 (B, T, 1) → 스케일된 출력 (B,), 출력 헤드가 K > 1이면 (B, K).
+    p는 단일 또는 stack()된 B개.
+    """
+    X = np.asarray(X, dtype=np.float32)
+    B, T = X.shape[:2]
+    X = X.reshape(B, T, -1)
+    W, U = p["lstm_kernel"].astype(np.float32), p["lstm_recurrent"].astype(np.float32)
+    b = p["lstm_bias"].astype(np.float32)
+    u = U.shape[-2]
+    h = np.zeros((B, u), dtype=np.float32)
+    c = np.zeros((B, u), dtype=np.float32)
+    for t in range(T):
+        z = _mm(X[:, t], W) + _mm(h, U) + b
+        i = _sigmoid(z[:, :u])
+        f = _sigmoid(z[:, u:2 * u])
+        g = np.tanh(z[:, 2 * u:3 * u])
+        o = _sigmoid(z[:, 3 * u:])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+    d = np.maximum(_mm(h, p["dense1_kernel"].astype(np.float32)) + p["dense1_bias"].astype(np.float32), 0)
+    out = _mm(d, p["dense2_kernel"].astype(np.float32)) + p["dense2_bias"].astype(np.float32)
+    return out[:, 0] if out.shape[1] == 1 else out
+
+def scale_windows(p: dict, closes) -> np.ndarray:
+    """원 종가 윈도우 (B, T) → dl_lstm과 같은 float32 스케일 (y * scale + min)."""
+    s = np.asarray(p["scale"], dtype=np.float32).reshape(-1, 1)
+    m = np.asarray(p["min"], dtype=np.float32).reshape(-1, 1)
+    return (np.asarray(closes, dtype=np.float32) * s + m).astype(np.float32)
+
+def predict_next_close(p: dict, closes) -> np.ndarray:
+    """원 종가 윈도우 (B, T) → horizon별 종가 (B,) 또는 (B, K). 역스케일은 MinMaxScaler.inverse_transform과 같은 식."""
+    y = forward(p, scale_windows(p, closes)).astype(np.float64)
+    m = np.asarray(p["min"], dtype=np.float64)
+    s = np.asarray(p["scale"], dtype=np.float64)
+    if y.ndim == 2:
+        m, s = m[..., None], s[..., None]
+    return (y - m) / s
+
+def export_all(version: str) -> int:
+    """저장된 model.keras 전부 → model.npz (023 이전에 학습된 모델용). TF 필요."""
+    from tensorflow.keras import models
+    n = 0
+    for meta in dl_store.entries(version):
+        t, w = meta["ticker"], meta["window"]
+        model = models.load_model(dl_store.model_path(t, version, w))
+        save_npz(dl_store.npz_path(t, version, w), from_keras(model, meta["scale"], meta["min"]))
+        n += 1
+    return n
+
+def check(version: str, n_windows: int = 64, atol: float = PARITY_ATOL) -> list[str]:
+    """티커마다 무작위 스케일 윈도우 n_windows개로 Keras predict vs NumPy forward. 초과한 티커 목록."""
+    from tensorflow.keras import models
+    rng = np.random.default_rng(0)
+    bad, worst = [], 0.0
+    for meta in dl_store.entries(version):
+        t, w = meta["ticker"], meta["window"]
+        path = dl_store.npz_path(t, version, w)
+        if not os.path.exists(path):
+            bad.append(f"{t} (no npz)")
+            continue
+        model = models.load_model(dl_store.model_path(t, version, w))
+        X = rng.uniform(-0.1, 1.1, size=(n_windows, w)).astype(np.float32)
+        got = forward(load_npz(path), X)
+        ref = model.predict(X.reshape(n_windows, w, 1), verbose=0).reshape(got.shape)
+        d = float(np.abs(ref - got).max())
+        worst = max(worst, d)
+        if d > atol:
+            bad.append(f"{t} ({d:.2e})")
+    print(f"[lstm_numpy] parity max abs diff={worst:.2e} (atol={atol:g}), failed={len(bad)}")
+    for b in bad[:20]:
+        print(f"[lstm_numpy] mismatch {b}")
+    return bad
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    e = sub.add_parser("export", help="write model.npz for every stored model.keras")
+    e.add_argument("--version", type=str, default="v1")
+    c = sub.add_parser("check", help="compare Keras predict vs NumPy forward")
+    c.add_argument("--version", type=str, default="v1")
+    c.add_argument("--atol", type=float, default=PARITY_ATOL)
+    args = ap.parse_args()
+    if args.cmd == "export":
+        print(f"[lstm_numpy] exported={export_all(args.version)}")
+    else:
+        sys.exit(1 if check(args.version, atol=args.atol) else 0)
@@ -0,0 +1,99 @@
+# src/models/registry.py
+"""
+모델 플러그인 레지스트리 (모델 이름 → 계열 → 구현 모듈)
+- 계열은 이름 패턴으로 찾음: safe_ma_w5 → safe_ma, safe_dl_lstm_v1 → safe_dl_lstm, ...
+- 목록/분류/설치 여부(families, family_of, is_dl, available)는 모듈을 import하지 않음
+  (available은 importlib.util.find_spec으로 백엔드 패키지 존재만 확인)
+  → 베이스라인만 돌리거나 대시보드를 띄울 때 TensorFlow를 읽지 않음
+- 구현 모듈은 load/resolve로 처음 쓸 때 import (이후 캐시)
+- 새 계열은 register(이름, 패턴, "모듈 경로", 백엔드, 종류)로 추가
+
+예) python -m src.models.registry
+    python -m src.models.registry safe_ma_w20 safe_dl_lstm_v1
+"""
+from __future__ import annotations
+import argparse
+import importlib
+import importlib.util
+import re
+from types import ModuleType
+from typing import Optional
+
+_FAMILIES: dict[str, dict] = {}
+_LOADED: dict[str, ModuleType] = {}
+
+def register(name: str, pattern: str, module: str, backends: tuple[str, ...] = (), kind: str = "ml") -> None:
+    """kind: ml(통계/베이스라인) / dl / ensemble. backends: 필요한 최상위 패키지 (설치 여부 확인용)."""
+    _FAMILIES[name] = {"name": name, "pattern": re.compile(pattern), "module": module,
+                       "backends": tuple(backends), "kind": kind}
+
+register("safe_ma", r"^safe_ma_w\d+$", "src.models.baseline_safe", ("numpy", "pandas"))
+register("safe_ses", r"^safe_ses_a[0-9.]+$", "src.models.baseline_safe", ("numpy", "pandas"))
+register("safe_dl_lstm", r"^safe_dl_lstm_v\d+$", "src.models.dl_lstm", ("tensorflow", "sklearn"), kind="dl")
+register("safe_dl_lstm_global", r"^safe_dl_lstm_global$", "src.models.dl_global", ("tensorflow",), kind="dl")
+register("safe_ens", r"^safe_ens_\w+$", "src.pipeline.ensemble_and_eval", ("numpy", "pandas"), kind="ensemble")
+
+def families() -> list[dict]:
+    return list(_FAMILIES.values())
+
+def family_of(model_name: str) -> Optional[str]:
+    if model_name in _FAMILIES:
+        return model_name
+    for f in _FAMILIES.values():
+        if f["pattern"].match(model_name):
+            return f["name"]
+    return None
+
+def is_dl(model_name: str) -> bool:
+    f = family_of(model_name)
+    if f is not None:
+        return _FAMILIES[f]["kind"] == "dl"
+    return model_name.startswith("safe_dl_") or model_name.startswith("dl_")   # 등록 안 된 옛 이름
+
+def is_ml(model_name: str) -> bool:
+    f = family_of(model_name)
+    if f is not None:
+        return _FAMILIES[f]["kind"] != "dl"
+    return (model_name.startswith("safe_") and not is_dl(model_name)) or \
+        any(model_name.startswith(p) for p in ("ma_", "ses_", "ens_"))
+
+def available(name: str) -> bool:
+    """계열(또는 모델 이름)의 백엔드 패키지가 설치돼 있는지 — import 없이."""
+    f = _FAMILIES.get(family_of(name) or "")
+    if f is None:
+        return False
+    return all(importlib.util.find_spec(b) is not None for b in f["backends"])
+
+def load(name: str) -> ModuleType:
+    """계열(또는 모델 이름)의 구현 모듈 — 여기서 처음 import."""
+    fam = family_of(name)
+    if fam is None:
+        raise KeyError(f"unknown model family: {name}")
+    mod = _FAMILIES[fam]["module"]
+    if mod not in _LOADED:
+        _LOADED[mod] = importlib.import_module(mod)
+    return _LOADED[mod]
+
+def resolve(name: str, attr: str):
+    return getattr(load(name), attr)
+
+def entry(name: str, attr: str) -> str:
+    """다른 프로세스에서 import할 "모듈:이름" (dl_pool용, 여기서는 import하지 않음)."""
+    fam = family_of(name)
+    if fam is None:
+        raise KeyError(f"unknown model family: {name}")
+    return f"{_FAMILIES[fam]['module']}:{attr}"
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("models", nargs="*", help="model names to classify")
+    args = ap.parse_args()
+    if args.models:
+        for m in args.models:
+            f = family_of(m)
+            print(f"{m}\t{f or '-'}\t{'dl' if is_dl(m) else 'ml' if is_ml(m) else '-'}\t"
+                  f"{'available' if f and available(f) else 'missing'}")
+    else:
+        for f in families():
+            print(f"{f['name']}\t{f['kind']}\t{f['module']}\t{','.join(f['backends'])}\t"
+                  f"{'available' if available(f['name']) else 'missing'}")
@@ -1,129 +1,197 @@
 # src/pipeline/ensemble_and_eval.py
+"""
+안전 계열 예측으로 앙상블(평균/중앙값) 생성 → h 영업일 뒤 종가로 평가 → evaluations 저장
+- horizon(HORIZONS)은 한 번에: 예측은 horizon 열과 함께 읽고, 정답은 LEAD(close, h) 열을 horizon마다 하나씩
+- 기본: 증분(마지막 평가일 - EVAL_OVERLAP_DAYS 이후)을 한 번에 메모리로 처리
+- --stream: 서버 측 커서로 티커 순서대로 읽어 티커 단위 청크마다 앙상블/평가/저장 후 다음 청크
+  (청크 크기는 EVAL_STREAM_MEM_MB 상한에 맞춰 자동, 일자×모델 평균은 청크별 합/개수를 누적)
+  → 이력 길이와 무관하게 작은 워커에서도 메모리 일정
+- 앙상블 재료는 SAFE_BASE_PREFIXES 중 ENSEMBLE_EXCLUDE(공용 LSTM 등 비교용)를 뺀 모델
+- 끝에 DL 모델(티커별/공용) 정확도를 나란히 출력 (DAG의 eval 단계 로그에서 비교)
+
+예) python -m src.pipeline.ensemble_and_eval
+    python -m src.pipeline.ensemble_and_eval --full --stream --mem-mb 128
+"""
 from __future__ import annotations
+import argparse
+import os
 import numpy as np
 import pandas as pd
 from sqlalchemy import text
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from src.db.bulk import copy_upsert
 from src.db.conn import get_engine
+from src.db.fast_read import read_frame
+from src.models.horizons import HORIZONS
 
 pd.options.mode.copy_on_write = True
 
-HORIZON = 1
-BATCH_SIZE = 50_000
+EVAL_OVERLAP_DAYS = int(os.getenv("EVAL_OVERLAP_DAYS", "10"))   # 증분 평가 시 마지막 평가일 이전 여유
 
 SAFE_BASE_PREFIXES = ("safe_ma_", "safe_ses_", "safe_dl_")  # 앙상블 입력에 사용할 안전 계열
+ENSEMBLE_EXCLUDE = ("safe_dl_lstm_global",)   # 평가/비교만 하고 앙상블에는 넣지 않는 모델 (DL_GLOBAL 실험용)
 
-def _fetch_base_predictions(eng) -> pd.DataFrame:
-    """앙상블의 재료가 될 안전 계열 예측만 가져온다."""
-    sql = """
-        SELECT date, ticker, model_name, y_pred
-        FROM predictions
-        WHERE horizon = :h
+STREAM = os.getenv("EVAL_STREAM", "0") == "1"                     # 기본 모드를 스트리밍으로
+STREAM_MEM_MB = int(os.getenv("EVAL_STREAM_MEM_MB", "256"))       # 스트리밍 청크 처리 메모리 상한(인터프리터/라이브러리 기본 사용량 제외)
+STREAM_FETCH_ROWS = int(os.getenv("EVAL_STREAM_FETCH_ROWS", "20000"))   # 서버 커서에서 한 번에 받을 행 수
+_WORK_FACTOR = 12  # 청크 원본(컬럼형) 대비 처리 중 최대 배수(앙상블 + 조인 + 메트릭 + COPY 버퍼, 실측)
+
+_BASE_FILTER = """
+        WHERE horizon = ANY(:hs)
+          AND model_name LIKE 'safe_%'   -- 부분 인덱스(safe) 조건과 일치
           AND (
                 model_name LIKE 'safe_ma_%'
              OR model_name LIKE 'safe_ses_%'
              OR model_name LIKE 'safe_dl_%'
           )
+"""
+
+def _since_clause(since: date | None, col: str = "date") -> str:
+    # 날짜 하한(파티션 프루닝) — 없으면 전체 기간
+    return f" AND {col} >= :since" if since else ""
+
+def first_unevaluated(eng, table: str, since: date, hs) -> date | None:
+    """
+    since 이후 예측은 있는데 table(evaluations / prediction_eval)에 평가가 하나도 없는 티커
+    (state 모드가 전체 히스토리를 낸 새 티커 등)의 첫 예측일 중 가장 이른 날. 없으면 None.
     """
     with eng.connect() as c:
-        df = pd.read_sql(text(sql), c, params={"h": HORIZON})
+        return c.execute(text(f"""
+            WITH p AS (
+                SELECT DISTINCT ticker FROM predictions
+                WHERE horizon = ANY(:hs) AND model_name LIKE 'safe_%' AND date >= :since
+            ), e AS (
+                SELECT DISTINCT ticker FROM {table} WHERE horizon = ANY(:hs) AND date >= :since
+            )
+            SELECT MIN(f.d)
+            FROM (SELECT ticker FROM p EXCEPT SELECT ticker FROM e) n
+            CROSS JOIN LATERAL (
+                SELECT MIN(x.date) AS d FROM predictions x
+                WHERE x.ticker = n.ticker AND x.horizon = ANY(:hs) AND x.model_name LIKE 'safe_%'
+            ) f
+        """), {"hs": list(hs), "since": since}).scalar()
+
+def _eval_since(eng) -> date | None:
+    """
+    horizon별 마지막 평가일 중 가장 이른 날 - EVAL_OVERLAP_DAYS. 평가 이력이 없는 horizon이 있으면 None(전체).
+    평가가 없는 새 티커가 있으면 그 티커의 첫 예측일까지 당김 (히스토리 전체를 앙상블/평가).
+    """
+    with eng.connect() as c:
+        if not c.execute(text("SELECT to_regclass('evaluations') IS NOT NULL")).scalar():
+            return None
+        last = dict(c.execute(text("""
+            SELECT horizon, MAX(date) FROM evaluations WHERE horizon = ANY(:hs) GROUP BY horizon
+        """), {"hs": list(HORIZONS)}).fetchall())
+    if any(h not in last for h in HORIZONS):
+        return None
+    since = min(last.values()) - timedelta(days=EVAL_OVERLAP_DAYS)
+    first = first_unevaluated(eng, "evaluations", since, HORIZONS)
+    return min(since, first) if first else since
+
+def _fetch_base_predictions(eng, since: date | None = None) -> pd.DataFrame:
+    """앙상블의 재료가 될 안전 계열 예측만 가져온다."""
+    sql = "SELECT date, ticker, model_name, horizon, y_pred FROM predictions" + _BASE_FILTER + _since_clause(since)
+    df = read_frame(sql, {"hs": list(HORIZONS), "since": since})
     if not df.empty:
         df["date"] = pd.to_datetime(df["date"])
     return df
 
 def _upsert_predictions(eng, df: pd.DataFrame):
-    """predictions 테이블에 (date, ticker, model_name, horizon) 키로 UPSERT."""
+    """predictions 테이블에 (date, ticker, model_name, horizon) 키로 UPSERT (COPY 경유)."""
     if df.empty:
         return 0
-    df = df.copy()
-    df["date"] = pd.to_datetime(df["date"]).dt.date
-
-    sql = """
-        INSERT INTO predictions (date, ticker, model_name, horizon, y_pred)
-        VALUES (:date, :ticker, :model_name, :horizon, :y_pred)
-        ON CONFLICT (date, ticker, model_name, horizon)
-        DO UPDATE SET y_pred = EXCLUDED.y_pred
-    """
-    total = 0
-    with eng.begin() as c:
-        rows = df.to_dict(orient="records")
-        for i in range(0, len(rows), BATCH_SIZE):
-            c.execute(text(sql), rows[i : i + BATCH_SIZE])
-            total += len(rows[i : i + BATCH_SIZE])
-    return total
+    df = df[["date", "ticker", "model_name", "horizon", "y_pred"]].copy()
+    df["date"] = pd.to_datetime(df["date"]).dt.normalize()
+    return copy_upsert(df, "predictions", ["date", "ticker", "model_name", "horizon"])
 
 def _build_ensembles(base_df: pd.DataFrame) -> pd.DataFrame:
-    """동일 date/ticker에 대해 평균/중앙값 앙상블을 만든다."""
+    """동일 date/ticker/horizon에 대해 평균/중앙값 앙상블을 만든다."""
+    base_df = base_df[~base_df["model_name"].isin(ENSEMBLE_EXCLUDE)]
     if base_df.empty:
         return pd.DataFrame(columns=["date","ticker","model_name","horizon","y_pred"])
 
-    g = base_df.groupby(["date","ticker"], observed=True)["y_pred"]
+    g = base_df.groupby(["date","ticker","horizon"], observed=True)["y_pred"]
     ens_mean = g.mean().rename("y_pred").reset_index()
     ens_mean["model_name"] = "safe_ens_mean"
-    ens_mean["horizon"] = HORIZON
 
     ens_median = g.median().rename("y_pred").reset_index()
     ens_median["model_name"] = "safe_ens_median"
-    ens_median["horizon"] = HORIZON
 
     out = pd.concat([ens_mean, ens_median], ignore_index=True)
     # 컬럼 순서 정리
     return out[["date","ticker","model_name","horizon","y_pred"]]
 
-def _fetch_truth_next_close(eng) -> pd.DataFrame:
+def _fetch_truth(eng, since: date | None = None, tickers: list[str] | None = None) -> pd.DataFrame:
     """
-    H=1 평가용 정답: 다음 영업일 종가.
-    WINDOW 함수로 prices에서 next_close를 바로 구해온다.
+    평가용 정답: horizon마다 h 영업일 뒤 종가 → (ticker, date, horizon, y_true) 긴 프레임.
+    prices를 한 번 읽으며 WINDOW 함수 LEAD(close, h)를 horizon마다 한 열씩. tickers를 주면 그 티커만.
     """
-    sql = """
+    leads = ",\n            ".join(f"LEAD(close, {h}) OVER w AS h{h}" for h in HORIZONS)
+    sql = f"""
         SELECT
             ticker,
             date,
-            LEAD(close) OVER (PARTITION BY ticker ORDER BY date) AS y_true
+            {leads}
         FROM prices
+        WHERE true
+    """ + _since_clause(since) + (" AND ticker = ANY(:tickers)" if tickers is not None else "") + """
+        WINDOW w AS (PARTITION BY ticker ORDER BY date)
     """
-    with eng.connect() as c:
-        df = pd.read_sql(text(sql), c)
-    if not df.empty:
-        df["date"] = pd.to_datetime(df["date"])
-    # 마지막 날짜는 y_true가 NULL이므로 평가에서 자연히 제외됨
-    return df
+    df = read_frame(sql, {"since": since, "tickers": tickers})
+    n = len(df)
+    out = pd.DataFrame({
+        "ticker": np.tile(df["ticker"].to_numpy(), len(HORIZONS)),
+        "date": np.tile(pd.to_datetime(df["date"]).to_numpy(), len(HORIZONS)),
+        "horizon": np.repeat(HORIZONS, n),
+        "y_true": np.concatenate([df[f"h{h}"].to_numpy(float) for h in HORIZONS]) if n else np.zeros(0),
+    })
+    # 마지막 h일은 y_true가 NULL이므로 평가에서 자연히 제외됨
+    return out.dropna(subset=["y_true"]).reset_index(drop=True)
 
 def _compute_metrics_frame(merged: pd.DataFrame) -> pd.DataFrame:
     """
-    merged: [date, ticker, model_name, y_pred, y_true]
-    그룹 키를 apply가 반환하지 않도록 '메트릭만' 반환한다 (중복 열 방지).
+    merged: [date, ticker, model_name, horizon, y_pred, y_true]
+    그룹별 평균을 벡터 연산으로 (행마다 파이썬 함수를 부르는 groupby.apply 없음).
     """
     if merged.empty:
-        return pd.DataFrame(columns=["date","ticker","model_name","mae","mape","rmse"])
+        return pd.DataFrame(columns=["date","ticker","model_name","horizon","mae","mape","rmse"])
 
-    def _metrics(g: pd.DataFrame) -> pd.Series:
-        err = g["y_pred"] - g["y_true"]
-        mae = float(np.mean(np.abs(err)))
-        denom = g["y_true"].replace(0, np.nan)
-        mape = float(np.mean(np.abs(err / denom)) * 100)
-        rmse = float(np.sqrt(np.mean(err * err)))
-        return pd.Series({"mae": mae, "mape": mape, "rmse": rmse})
-
-    # 키는 groupby가 보관하고, 반환은 메트릭만 → reset_index 시 중복 열 문제 없음
+    err = merged["y_pred"].to_numpy(float) - merged["y_true"].to_numpy(float)
+    denom = merged["y_true"].replace(0, np.nan).to_numpy(float)
+    parts = merged[["date","ticker","model_name","horizon"]].assign(
+        mae=np.abs(err), mape=np.abs(err / denom) * 100, rmse=err * err,
+    )
     scored = (
-        merged
-        .groupby(["date","ticker","model_name"], observed=True)
-        .apply(_metrics)
+        parts
+        .groupby(["date","ticker","model_name","horizon"], observed=True, sort=False)[["mae","mape","rmse"]]
+        .mean()
         .reset_index()
     )
+    scored["rmse"] = np.sqrt(scored["rmse"])
     return scored
 
-def run() -> None:
+def run(since: date | None = None, full: bool = False, stream: bool = STREAM,
+        mem_mb: int = STREAM_MEM_MB) -> None:
+    """
+    since: 이 날짜 이후만 앙상블/평가 (기본: 마지막 평가일 - EVAL_OVERLAP_DAYS, 평가 없는 새 티커가 있으면 그 첫 예측일)
+    full: 전체 기간 재계산 (과거 구간 예측을 새로 넣은 경우)
+    stream: 티커 청크 단위로 읽기/처리/저장 (메모리 상한 mem_mb)
+    """
     eng = get_engine()
+    if not full and since is None:
+        since = _eval_since(eng)
+    print(f"[eval] since={since or 'all'}" + (f" stream(mem={mem_mb}MB)" if stream else ""))
+    if stream:
+        _run_stream(eng, since, mem_mb)
+        return
 
     # 1) 안전 계열 예측 로딩 → 앙상블 생성/업서트
-    base = _fetch_base_predictions(eng)
+    base = _fetch_base_predictions(eng, since)
     ens = _build_ensembles(base)
     up_cnt = _upsert_predictions(eng, ens)
     print(f"[eval] ensemble upserted={up_cnt}")
 
-    # 2) 평가용 데이터 조인 (예측 + 다음날 종가)
+    # 2) 평가용 데이터 조인 (예측 + horizon별 h일 뒤 종가)
     #    predictions_clean 뷰가 있으면 우선 사용
     pred_tbl_candidates = ["predictions_clean", "predictions"]
     with eng.connect() as c:
@@ -140,27 +208,27 @@ def run() -> None:
             return
 
     pred_sql = f"""
-        SELECT date, ticker, model_name, y_pred
+        SELECT date, ticker, model_name, horizon, y_pred
         FROM {pred_tbl}
-        WHERE horizon = :h
+        WHERE horizon = ANY(:hs)
+          AND model_name LIKE 'safe_%'   -- 부분 인덱스(safe) 조건과 일치
           AND (
                 model_name LIKE 'safe_ma_%'
              OR model_name LIKE 'safe_ses_%'
              OR model_name LIKE 'safe_dl_%'
              OR model_name IN ('safe_ens_mean','safe_ens_median')
           )
-    """
-    with eng.connect() as c:
-        preds = pd.read_sql(text(pred_sql), c, params={"h": HORIZON})
+    """ + _since_clause(since)
+    preds = read_frame(pred_sql, {"hs": list(HORIZONS), "since": since})
     if preds.empty:
         print("[eval] no predictions to score")
         return
     preds["date"] = pd.to_datetime(preds["date"])
 
-    truth = _fetch_truth_next_close(eng)
-    # 조인: 예측은 t 의 D → 정답은 D+1 close(=truth.y_true)
+    truth = _fetch_truth(eng, since)
+    # 조인: 예측은 t 의 D, horizon h → 정답은 D+h close(=truth.y_true)
     merged = preds.merge(
-        truth, on=["ticker", "date"], how="inner", validate="many_to_one"
+        truth, on=["ticker", "date", "horizon"], how="inner", validate="many_to_one"
     ).dropna(subset=["y_true"])
 
     if merged.empty:
@@ -172,12 +240,33 @@ def run() -> None:
 
     # 4) 일자별/모델별 요약(전종목 평균)도 만들어 저장(선택 사항)
     daily_model = (
-        scored.groupby(["date","model_name"], observed=True)[["mae","mape","rmse"]]
+        scored.groupby(["date","model_name","horizon"], observed=True)[["mae","mape","rmse"]]
         .mean()
         .reset_index()
     )
 
     # 5) 저장: 간단히 evaluations 테이블(없으면 생성)로 업서트
+    _ensure_eval_tables(eng)
+    eval_up = _bulk_upsert_eval(eng, scored)
+    print(f"[eval] evaluations upserted={eval_up}")
+
+    # (옵션) 일자별-모델별 평균 테이블
+    dm_up = _bulk_upsert_daily_model(eng, daily_model)
+    print(f"[eval] daily_model upserted={dm_up}")
+    _dl_report(eng, since)
+
+def _dl_report(eng, since: date | None) -> None:
+    """DL 모델(티커별 / 공용 등) 정확도 나란히 — 이번에 평가한 구간(since 이후) 기준."""
+    rows = read_frame("""
+        SELECT horizon, model_name, COUNT(*) AS n, AVG(mae) AS mae, AVG(mape) AS mape
+        FROM evaluations
+        WHERE horizon = ANY(:hs) AND model_name LIKE 'safe_dl_%'
+    """ + _since_clause(since) + " GROUP BY horizon, model_name ORDER BY horizon, model_name",
+                      {"hs": list(HORIZONS), "since": since})
+    for r in rows.itertuples(index=False):
+        print(f"[eval] H{r.horizon} {r.model_name}: n={r.n} mae={r.mae:.2f} mape={r.mape:.2f}%")
+
+def _ensure_eval_tables(eng) -> None:
     with eng.begin() as c:
         c.execute(text("""
             CREATE TABLE IF NOT EXISTS evaluations (
@@ -191,13 +280,6 @@ def run() -> None:
                 PRIMARY KEY (date, ticker, model_name, horizon)
             )
         """))
-
-    scored["horizon"] = HORIZON
-    eval_up = _bulk_upsert_eval(eng, scored)
-    print(f"[eval] evaluations upserted={eval_up}")
-
-    # (옵션) 일자별-모델별 평균 테이블도 별도로 원하면 아래 사용
-    with eng.begin() as c:
         c.execute(text("""
             CREATE TABLE IF NOT EXISTS evaluations_daily_model (
                 date        date        NOT NULL,
@@ -209,53 +291,98 @@ def run() -> None:
                 PRIMARY KEY (date, model_name, horizon)
             )
         """))
-    daily_model["horizon"] = HORIZON
+
+# ---------------------------------------------------------------- 스트리밍 모드
+
+def _stream_base_chunks(eng, since: date | None, mem_mb: int):
+    """
+    안전 계열 예측을 서버 측 커서(named cursor)로 티커 순서대로 읽어
+    티커 경계에서 자른 DataFrame 청크로 내보낸다. 청크 크기는 mem_mb / _WORK_FACTOR 기준.
+    (한 티커가 상한보다 크면 그 티커 하나가 한 청크)
+    """
+    cols = ["ticker", "date", "model_name", "horizon", "y_pred"]
+    sql = text("SELECT ticker, date, model_name, horizon, y_pred FROM predictions"
+               + _BASE_FILTER + _since_clause(since) + " ORDER BY ticker")
+    budget = mem_mb * 2**20 / _WORK_FACTOR
+    frames: list[pd.DataFrame] = []
+    size = 0
+    with eng.connect().execution_options(stream_results=True, max_row_buffer=STREAM_FETCH_ROWS) as c:
+        res = c.execute(sql, {"hs": list(HORIZONS), "since": since})
+        for part in res.partitions(STREAM_FETCH_ROWS):
+            df = _chunk_frame(part, cols)   # 행 객체는 바로 컬럼형으로
+            frames.append(df)
+            size += df.memory_usage(deep=True).sum()
+            if size < budget:
+                continue
+            buf = pd.concat(frames, ignore_index=True)
+            tail = buf["ticker"] == buf["ticker"].iat[-1]   # 마지막 티커는 다음 배치와 이어질 수 있어 남김
+            frames, size = [buf[tail]], 0
+            if not tail.all():
+                yield buf[~tail].reset_index(drop=True)
+        if frames:
+            yield pd.concat(frames, ignore_index=True)
+
+def _chunk_frame(rows: list, cols: list[str]) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=cols)
+    df["date"] = pd.to_datetime(df["date"])
+    df["y_pred"] = pd.to_numeric(df["y_pred"], errors="coerce").astype(float)   # numeric → Decimal 대비
+    return df
+
+def _run_stream(eng, since: date | None, mem_mb: int) -> None:
+    _ensure_eval_tables(eng)
+    n_chunks = n_ens = n_eval = 0
+    dm_sum = dm_cnt = None   # 일자×모델 평균용 누적 합/개수 (전 티커에 걸쳐야 하므로)
+    for base in _stream_base_chunks(eng, since, mem_mb):
+        tickers = base["ticker"].unique().tolist()
+        ens = _build_ensembles(base)
+        n_ens += _upsert_predictions(eng, ens)
+
+        preds = pd.concat([base, ens[base.columns]], ignore_index=True)
+        truth = _fetch_truth(eng, since, tickers)
+        merged = preds.merge(
+            truth, on=["ticker", "date", "horizon"], how="inner", validate="many_to_one"
+        ).dropna(subset=["y_true"])
+        scored = _compute_metrics_frame(merged)
+        n_eval += _bulk_upsert_eval(eng, scored)
+
+        g = scored.groupby(["date","model_name","horizon"], observed=True)[["mae","mape","rmse"]]
+        s, k = g.sum(), g.count()
+        dm_sum = s if dm_sum is None else dm_sum.add(s, fill_value=0)
+        dm_cnt = k if dm_cnt is None else dm_cnt.add(k, fill_value=0)
+        n_chunks += 1
+        print(f"[eval] chunk {n_chunks}: tickers={len(tickers)} base={len(base)} scored={len(scored)}")
+        del base, ens, preds, truth, merged, scored
+
+    print(f"[eval] ensemble upserted={n_ens}")
+    print(f"[eval] evaluations upserted={n_eval}")
+    if dm_sum is None:
+        print("[eval] no predictions to score")
+        return
+    daily_model = (dm_sum / dm_cnt.where(dm_cnt > 0)).reset_index()
     dm_up = _bulk_upsert_daily_model(eng, daily_model)
-    print(f"[eval] daily_model upserted={dm_up}")
+    print(f"[eval] daily_model upserted={dm_up} (chunks={n_chunks})")
+    _dl_report(eng, since)
 
 def _bulk_upsert_eval(eng, df: pd.DataFrame) -> int:
     if df.empty:
         return 0
     df = df[["date","ticker","model_name","horizon","mae","mape","rmse"]].copy()
-    df["date"] = pd.to_datetime(df["date"]).dt.date
-    sql = """
-        INSERT INTO evaluations (date, ticker, model_name, horizon, mae, mape, rmse)
-        VALUES (:date, :ticker, :model_name, :horizon, :mae, :mape, :rmse)
-        ON CONFLICT (date, ticker, model_name, horizon)
-        DO UPDATE SET
-            mae = EXCLUDED.mae,
-            mape = EXCLUDED.mape,
-            rmse = EXCLUDED.rmse
-    """
-    total = 0
-    with eng.begin() as c:
-        rows = df.to_dict(orient="records")
-        for i in range(0, len(rows), BATCH_SIZE):
-            c.execute(text(sql), rows[i : i + BATCH_SIZE])
-            total += len(rows[i : i + BATCH_SIZE])
-    return total
+    df["date"] = pd.to_datetime(df["date"]).dt.normalize()
+    return copy_upsert(df, "evaluations", ["date", "ticker", "model_name", "horizon"])
 
 def _bulk_upsert_daily_model(eng, df: pd.DataFrame) -> int:
     if df.empty:
         return 0
     df = df[["date","model_name","horizon","mae","mape","rmse"]].copy()
-    df["date"] = pd.to_datetime(df["date"]).dt.date
-    sql = """
-        INSERT INTO evaluations_daily_model (date, model_name, horizon, mae, mape, rmse)
-        VALUES (:date, :model_name, :horizon, :mae, :mape, :rmse)
-        ON CONFLICT (date, model_name, horizon)
-        DO UPDATE SET
-            mae = EXCLUDED.mae,
-            mape = EXCLUDED.mape,
-            rmse = EXCLUDED.rmse
-    """
-    total = 0
-    with eng.begin() as c:
-        rows = df.to_dict(orient="records")
-        for i in range(0, len(rows), BATCH_SIZE):
-            c.execute(text(sql), rows[i : i + BATCH_SIZE])
-            total += len(rows[i : i + BATCH_SIZE])
-    return total
+    df["date"] = pd.to_datetime(df["date"]).dt.normalize()
+    return copy_upsert(df, "evaluations_daily_model", ["date", "model_name", "horizon"])
 
 if __name__ == "__main__":
-    run()
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--since", type=str, default=None, help="YYYY-MM-DD")
+    ap.add_argument("--full", action="store_true", help="recompute all history")
+    ap.add_argument("--stream", action="store_true", default=STREAM, help="ticker-chunked bounded-memory mode")
+    ap.add_argument("--mem-mb", type=int, default=STREAM_MEM_MB, help="memory ceiling for --stream")
+    args = ap.parse_args()
+    run(since=date.fromisoformat(args.since) if args.since else None, full=args.full,
+        stream=args.stream, mem_mb=args.mem_mb)
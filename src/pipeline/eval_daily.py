@@ -1,40 +1,74 @@
 # project/src/pipeline/eval_daily.py
 from __future__ import annotations
+import argparse
+import os
+from datetime import date, timedelta
 import pandas as pd
 from sqlalchemy import text
+from src.db.bulk import copy_upsert
 from src.db.conn import get_engine
+from src.db.fast_read import read_frame
+from src.db import summary
+from src.models.horizons import HORIZONS
+from src.pipeline.ensemble_and_eval import first_unevaluated
 
-def _nextday_truth() -> pd.DataFrame:
+EVAL_OVERLAP_DAYS = int(os.getenv("EVAL_OVERLAP_DAYS", "10"))   # 증분 평가 시 마지막 평가일 이전 여유
+
+def _eval_since(horizons) -> date | None:
+    # horizon별 마지막 평가일 중 가장 이른 날 (평가 이력이 없는 horizon이 있으면 전체)
+    # 평가가 없는 새 티커가 있으면 그 티커의 첫 예측일까지
     eng = get_engine()
-    with eng.connect() as conn:
-        px = pd.read_sql(text("SELECT ticker, date, close FROM prices ORDER BY ticker, date"), conn)
+    with eng.connect() as c:
+        last = dict(c.execute(text(
+            "SELECT horizon, MAX(date) FROM prediction_eval WHERE horizon = ANY(:hs) GROUP BY horizon"
+        ), {"hs": list(horizons)}).fetchall())
+    if any(h not in last for h in horizons):
+        return None
+    since = min(last.values()) - timedelta(days=EVAL_OVERLAP_DAYS)
+    first = first_unevaluated(eng, "prediction_eval", since, horizons)
+    return min(since, first) if first else since
+
+def _truth(since: date | None = None, horizons=HORIZONS) -> pd.DataFrame:
+    """가격을 한 번 읽고 horizon마다 티커별 shift(-h) 한 번 → (ticker, date, horizon, target_date, close_asof, close_target)."""
+    sql = "SELECT ticker, date, close FROM prices"
+    if since:
+        sql += " WHERE date >= :since"   # 날짜 하한 → 파티션 프루닝
+    px = read_frame(sql + " ORDER BY ticker, date", {"since": since})
     px["date"] = pd.to_datetime(px["date"])
     px = px.sort_values(["ticker","date"]).reset_index(drop=True)
-    px["target_date"]  = px.groupby("ticker")["date"].shift(-1)
-    px["close_asof"]   = px["close"]
-    px["close_target"] = px.groupby("ticker")["close"].shift(-1)
-    seq = px.dropna(subset=["target_date","close_target"]).copy()
-    seq["date"]        = pd.to_datetime(seq["date"]).dt.date
-    seq["target_date"] = pd.to_datetime(seq["target_date"]).dt.date
-    return seq[["ticker","date","target_date","close_asof","close_target"]]
+    g = px.groupby("ticker")
+    seq = pd.concat([
+        pd.DataFrame({
+            "ticker": px["ticker"], "date": px["date"], "horizon": h,
+            "target_date": g["date"].shift(-h), "close_asof": px["close"], "close_target": g["close"].shift(-h),
+        })
+        for h in horizons
+    ], ignore_index=True)
+    return seq.dropna(subset=["target_date","close_target"])
 
-def run(h=1):
-    eng = get_engine()
+def run(horizons=HORIZONS, since: date | None = None, full: bool = False):
+    horizons = [int(h) for h in horizons]
+    # 기본은 증분: 마지막 평가일 - EVAL_OVERLAP_DAYS 이후만
+    if not full and since is None:
+        since = _eval_since(horizons)
+    print(f"[INFO] since={since or 'all'} horizons={horizons}")
     # (1) 예측 로드 (safe_* + safe_ens_*)
-    with eng.connect() as conn:
-        preds = pd.read_sql(text("""
-            SELECT date, ticker, model_name, horizon, y_pred
-            FROM predictions
-            WHERE horizon=:h
-              AND (model_name LIKE 'safe_%' OR model_name LIKE 'safe_ens_%')
-        """), conn, params={"h": h})
+    sql = """
+        SELECT date, ticker, model_name, horizon, y_pred
+        FROM predictions
+        WHERE horizon = ANY(:hs)
+          AND (model_name LIKE 'safe_%' OR model_name LIKE 'safe_ens_%')
+    """
+    if since:
+        sql += " AND date >= :since"
+    preds = read_frame(sql, {"hs": horizons, "since": since})
     if preds.empty:
         print("[INFO] predictions empty"); return
-    preds["date"] = pd.to_datetime(preds["date"]).dt.date
+    preds["date"] = pd.to_datetime(preds["date"])
 
     # (2) 정답 시퀀스 매핑
-    seq = _nextday_truth()
-    df = preds.merge(seq, on=["ticker","date"], how="inner")
+    seq = _truth(since, horizons)
+    df = preds.merge(seq, on=["ticker","date","horizon"], how="inner")
     if df.empty:
         print("[INFO] no matches"); return
     df["y_true"] = df["close_target"]
@@ -46,22 +80,24 @@ def run(h=1):
     )
     df = df.dropna(subset=["y_pred","y_true","close_asof"])
 
-    # (3) prediction_eval UPSERT
-    sql = text("""
-      INSERT INTO prediction_eval (date,ticker,model_name,horizon,y_pred,y_true,abs_err,dir_correct)
-      VALUES (:date,:ticker,:model_name,:horizon,:y_pred,:y_true,:abs_err,:dir_correct)
-      ON CONFLICT (date, ticker, model_name, horizon)
-      DO UPDATE SET
-        y_pred=EXCLUDED.y_pred,
-        y_true=EXCLUDED.y_true,
-        abs_err=EXCLUDED.abs_err,
-        dir_correct=EXCLUDED.dir_correct
-    """)
-    recs = df[["date","ticker","model_name","horizon","y_pred","y_true","abs_err","dir_correct"]].to_dict("records")
-    with eng.begin() as conn:
-        for r in recs:
-            conn.execute(sql, r)
-    print(f"[INFO] eval upserted: {len(recs)} rows")
+    # (3) prediction_eval UPSERT (COPY → 스테이징 → 한 번에 병합) + 요약 테이블 증분 갱신(같은 트랜잭션)
+    summary.ensure_summary()
+    cols = ["date","ticker","model_name","horizon","y_pred","y_true","abs_err","dir_correct"]
+    with get_engine().begin() as c:
+        summary.stage_old(c, horizons, since)
+        n = copy_upsert(df[cols], "prediction_eval", ["date","ticker","model_name","horizon"], conn=c)
+        k = summary.apply_delta(c, horizons, since)
+    print(f"[INFO] eval upserted: {n} rows, summary keys updated: {k}")
+    # DL 모델(티커별 / 공용 등) 정확도 나란히
+    for h in horizons:
+        for r in summary.report(h, "safe_dl_%"):
+            print(f"[INFO] H{h} {r.model_name}: n={r.n_rows} mae={r.mae or float('nan'):.2f} acc={r.acc or float('nan'):.3f}"
+                  f" | 250d mae={r.mae_250d or float('nan'):.2f} acc={r.acc_250d or float('nan'):.3f}")
 
 if __name__ == "__main__":
-    run(h=1)
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--since", type=str, default=None, help="YYYY-MM-DD")
+    ap.add_argument("--full", action="store_true", help="re-evaluate all history")
+    ap.add_argument("--horizons", type=str, default=None, help="comma separated (default: env HORIZONS, 1,5,20)")
+    args = ap.parse_args()
+    run(horizons=[int(h) for h in args.horizons.split(",")] if args.horizons else HORIZONS, since=date.fromisoformat(args.since) if args.since else None, full=args.full)
@@ -8,6 +8,9 @@ from src.ingest.get_kospi100 import get_kospi100_tickers
 from src.ingest.download_prices import fetch_ohlcv_fdr, fetch_ohlcv_pykrx
 from src.clean.clean_prices import clean_one
 from src.db.load_prices import upsert_prices
+from src.ingest.incremental_prices import _carry_prev_close, _prev_close_map, _with_change
+from src.ingest.snapshot import collect_snapshots, snapshot_dates
+from src.ingest.trading_calendar import last_closed_session, sessions
 
 def _load_targets() -> list[str]:
     # 정책: watchlist 있으면 우선, 없으면 KOSPI100
@@ -45,15 +48,48 @@ def _fetch_incremental(ticker: str, start: str, end: str) -> pd.DataFrame:
         df = fetch_ohlcv_pykrx(ticker, start=s_krx, end=e_krx)
     return df if df is not None else pd.DataFrame()
 
-def main(since: str | None, dry_run: bool, only: list[str] | None):
+def _main_snapshot(targets: list[str], last_map: dict, since: str | None, until, dry_run: bool):
+    """날짜별 전종목 스냅샷 1회 호출 → 대상 티커만 필터해 적재."""
+    if since:
+        start = pd.to_datetime(since).date()
+        last_map = {}
+    else:
+        starts = [d + timedelta(days=1) if d else until for d in last_map.values()]
+        start = min(starts) if starts else until
+    dates = snapshot_dates(start, until)
+    if not dates:
+        print("[SKIP] no new trading day")
+        print("[END] ingest_daily done")
+        return
+
+    total_rows = 0
+    # change = 전일 유효 종가 대비 (등락률은 기준가 대비라 쓰지 않음) → 날짜 순서대로 이어 계산
+    prev_close = _prev_close_map([t for t, d in last_map.items() if d])
+    for df in collect_snapshots(dates, targets, last_map, ordered=True):
+        d = df["date"].iloc[0]
+        if dry_run:
+            print(f"[DATE] {d} fetched={len(df)} dry-run")
+            continue
+        df = _with_change([df], prev_close)
+        _carry_prev_close(prev_close, df)
+        upsert_prices(df)
+        total_rows += len(df)
+        print(f"[DATE] {d} upserted≈{len(df)}")
+
+    print(f"[SUMMARY] tickers={len(targets)} dates={len(dates)} rows≈{total_rows}")
+    print("[END] ingest_daily done")
+
+def main(since: str | None, dry_run: bool, only: list[str] | None, snapshot: bool = False):
     targets = only or _load_targets()
     if not targets:
         print("[END] no target tickers")
         return
 
-    # 각 티커의 마지막 적재일 + 1일부터 오늘까지
+    # 각 티커의 마지막 적재일 + 1일부터 마지막 확정 거래일까지 (주말/휴일/장중 호출 없음)
     last_map = _load_last_date_map(targets)
-    today = pd.Timestamp.today(tz="Asia/Seoul").date()
+    until = last_closed_session()
+    if snapshot:
+        return _main_snapshot(targets, last_map, since, until, dry_run)
     total_rows = 0; ok = skip = fail = 0
 
     for t in targets:
@@ -61,16 +97,16 @@ def main(since: str | None, dry_run: bool, only: list[str] | None):
         if since:
             start = pd.to_datetime(since).date()
         elif last_map[t] is None:
-            # 최초 실행 시 오늘 하루만 (원하면 과거부터 수집하도록 옵션 확장 가능)
-            start = today
+            # 최초 실행 시 마지막 거래일 하루만 (원하면 과거부터 수집하도록 옵션 확장 가능)
+            start = until
         else:
             start = last_map[t] + timedelta(days=1)
 
-        if start > today:
+        if not sessions(start, until):
             print(f"[SKIP] {t} no new trading day")
             skip += 1; continue
 
-        s = start.strftime("%Y-%m-%d"); e = today.strftime("%Y-%m-%d")
+        s = start.strftime("%Y-%m-%d"); e = until.strftime("%Y-%m-%d")
         try:
             raw = _fetch_incremental(t, s, e)
             if raw.empty:
@@ -104,6 +140,7 @@ if __name__ == "__main__":
     ap.add_argument("--since", type=str, default=None, help="YYYY-MM-DD (override start date)")
     ap.add_argument("--tickers", type=str, default=None, help="comma separated tickers")
     ap.add_argument("--dry-run", action="store_true")
+    ap.add_argument("--snapshot", action="store_true", help="date-major: 1 market-wide call per trading day")
     args = ap.parse_args()
     only = [x.strip() for x in args.tickers.split(",")] if args.tickers else None
-    main(args.since, args.dry_run, only)
+    main(args.since, args.dry_run, only, snapshot=args.snapshot)
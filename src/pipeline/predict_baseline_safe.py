@@ -2,9 +2,9 @@ import pandas as pd
 from sqlalchemy import text
 from src.db.conn import get_engine
 from src.db.load_predictions import upsert_predictions
-from src.models.baseline_safe import ma_next_day_series, ses_next_day_series
+from src.models.baseline_safe import ma_next_day_series, ses_next_day_multi
+from src.models.horizons import HORIZONS
 
-HORIZON = 1
 MIN_HISTORY = 20  # 최소 이 정도 지난 뒤부터 예측 생성
 pd.options.mode.copy_on_write = True
 
@@ -30,7 +30,7 @@ def build_no_leak_predictions(ticker: str) -> pd.DataFrame:
     if len(df) < MIN_HISTORY:
         return pd.DataFrame(columns=["date","ticker","model_name","horizon","y_pred"])
 
-    # 이동평균들
+    # 이동평균들 (H=1로 한 번 계산 → 평탄 예측이라 horizon별로는 asof 칸만 자름)
     frames = []
     for w in [5, 10, 20]:
         res = ma_next_day_series(df["close"], window=w)
@@ -39,32 +39,35 @@ def build_no_leak_predictions(ticker: str) -> pd.DataFrame:
             # target_date는 저장 안 하지만, 디버깅/시각화용으로 쓰고 싶다면 이렇게 꺼내두세요
             # target_dates = df.loc[res["target_idx"], "date"].to_numpy()
 
-            out = pd.DataFrame({
-                "date":      asof_dates,                 # 배열 길이 == len(res)
-                "ticker":    ticker,                     # 스칼라는 브로드캐스트 됨
-                "model_name": f"safe_ma_w{w}",
-                "horizon":   HORIZON,
-                "y_pred":    res["y_pred"].to_numpy(),   # 배열로 통일
-            })
-            # 필요하면 날짜를 date 타입으로:
-            out["date"] = pd.to_datetime(out["date"]).dt.date
-            frames.append(out)
-
-    # SES들
-    for a in [0.3, 0.5]:
-        res = ses_next_day_series(df["close"], alpha=a)
-        if not res.empty:
-            asof_dates = df.loc[res["asof_idx"], "date"].to_numpy()
-
-            out = pd.DataFrame({
-                "date":       asof_dates,
-                "ticker":     ticker,
-                "model_name": f"safe_ses_a{a}",
-                "horizon":    HORIZON,
-                "y_pred":     res["y_pred"].to_numpy(),
-            })
-            out["date"] = pd.to_datetime(out["date"]).dt.date
-            frames.append(out)
+            for h in HORIZONS:
+                k = res["asof_idx"].to_numpy() < len(df) - h   # asof 뒤 h일 종가가 있는 칸만
+                out = pd.DataFrame({
+                    "date":      asof_dates[k],
+                    "ticker":    ticker,                     # 스칼라는 브로드캐스트 됨
+                    "model_name": f"safe_ma_w{w}",
+                    "horizon":   h,
+                    "y_pred":    res["y_pred"].to_numpy()[k],   # 배열로 통일
+                })
+                # 필요하면 날짜를 date 타입으로:
+                out["date"] = pd.to_datetime(out["date"]).dt.date
+                frames.append(out)
+
+    # SES들 (alpha 전부 한 번에)
+    res = ses_next_day_multi(df["close"], [0.3, 0.5])
+    if not res.empty:
+        asof_dates = df.loc[res["asof_idx"], "date"].to_numpy()
+        for h in HORIZONS:
+            k = res["asof_idx"].to_numpy() < len(df) - h
+            for a in [0.3, 0.5]:
+                out = pd.DataFrame({
+                    "date":       asof_dates[k],
+                    "ticker":     ticker,
+                    "model_name": f"safe_ses_a{a}",
+                    "horizon":    h,
+                    "y_pred":     res[a].to_numpy()[k],
+                })
+                out["date"] = pd.to_datetime(out["date"]).dt.date
+                frames.append(out)
 
     if not frames:
         return pd.DataFrame(columns=["date","ticker","model_name","horizon","y_pred"])
@@ -1,23 +1,42 @@
 from __future__ import annotations
 import argparse
+import os
+import sys
 from datetime import date
 from typing import Optional, Tuple
+import numpy as np
 import pandas as pd
 from sqlalchemy import text
+from src.db import model_state
 from src.db.conn import get_engine
+from src.db.fast_read import read_frame
 from src.db.io import upsert_predictions
-from src.models.baseline_safe import ma_next_day_series, ses_next_day_series
+from src.models import dl_store, lstm_numpy, registry
+from src.models.dl_pool import DL_WORKERS, dl_map
+from src.models.horizons import HORIZONS
+from src.models.baseline_safe import (
+    ma_advance, ma_next_day_series, ma_panel, ses_advance, ses_next_day_multi, ses_panel, steps_ahead,
+)
 
-try:
-    from src.models.dl_lstm import predict_next_day_close, DLNotAvailable  # type: ignore
-    _DL_OK = True
-except Exception:
-    _DL_OK = False
 
-H = 1
+# 예측 horizon(HORIZONS) — 베이스라인은 한 번 계산해 horizon별 칸만 고르고, LSTM은 출력 헤드 하나에 horizon 전부
+MA_WINDOWS = (5, 10, 20)
+SES_ALPHAS = (0.3, 0.5)
 MIN_SAFE = 20
 MIN_DL = 120
 DL_PARAMS = {"window": 20, "epochs": 12, "batch_size": 32, "patience": 3}
+DL_VERSION = "v1"
+DL_MODEL = f"safe_dl_lstm_{DL_VERSION}"
+DL_WARM = os.getenv("DL_WARM", "1") != "0"   # 저장된 모델 불러 미세조정 (0이면 매번 처음부터)
+DL_INFER = os.getenv("DL_INFER", "0") == "1"  # 학습 없이 저장된 model.npz로 NumPy 추론만 (TF 불필요)
+DL_GLOBAL = os.getenv("DL_GLOBAL", "0") == "1"   # 전 종목 공용 LSTM도 함께 (티커별 모델과 비교용)
+DL_GLOBAL_MODEL = "safe_dl_lstm_global"
+# DL 백엔드(TensorFlow)는 설치 여부만 확인, import는 처음 학습할 때 (registry)
+_DL_OK = registry.available(DL_MODEL)
+_DLG_OK = registry.available(DL_GLOBAL_MODEL)
+DL_GLOBAL_PARAMS = {"window": 20, "epochs": 8, "batch_size": 1024, "patience": 2, "max_per_ticker": 1000, "embed_dim": 4}
+COLS = ["date","ticker","model_name","horizon","y_pred"]
+STATE_RTOL = 1e-9   # --check-state: MA 합/SES 수준 허용 상대 오차 (누적 덧셈 순서 차이)
 pd.options.mode.copy_on_write = True
 
 def _all_tickers() -> list[str]:
@@ -27,60 +46,69 @@ def _all_tickers() -> list[str]:
     return df["ticker"].tolist()
 
 def _prices(ticker: str) -> pd.DataFrame:
-    eng = get_engine()
-    with eng.connect() as c:
-        df = pd.read_sql(text("SELECT date, close FROM prices WHERE ticker=:t ORDER BY date"),
-                         c, params={"t": ticker})
+    df = read_frame("SELECT date, close FROM prices WHERE ticker=:t ORDER BY date", {"t": ticker})
     if df.empty: return df
     df["date"] = pd.to_datetime(df["date"])
     return df.dropna().reset_index(drop=True)
 
-def _last_map(ticker: str) -> dict[str, date]:
+def _last_map(ticker: str) -> pd.DataFrame:
+    """(model_name, horizon)별 마지막 예측일."""
     eng = get_engine()
     with eng.connect() as c:
         df = pd.read_sql(text("""
-            SELECT model_name, MAX(date) AS last_date
+            SELECT model_name, horizon, MAX(date) AS last_date
             FROM predictions
-            WHERE ticker=:t AND horizon=:h
-            GROUP BY model_name
-        """), c, params={"t": ticker, "h": H})
-    if df.empty: return {}
+            WHERE ticker=:t AND horizon = ANY(:hs)
+            GROUP BY model_name, horizon
+        """), c, params={"t": ticker, "hs": list(HORIZONS)})
     df["last_date"] = pd.to_datetime(df["last_date"]).dt.date
-    return dict(zip(df["model_name"], df["last_date"]))
+    return df
 
-def _safe_frames(df: pd.DataFrame, ticker: str) -> list[pd.DataFrame]:
+def _h_frames(df: pd.DataFrame, ticker: str, model: str, asof_idx: np.ndarray, y_pred: np.ndarray) -> list[pd.DataFrame]:
+    """H=1 asof 예측 하나 → horizon별 (asof 뒤 h일 종가가 있는 칸만)."""
+    asof_dates = df["date"].dt.date.to_numpy()[asof_idx]
     frames = []
-    for w in (5, 10, 20):
-        res = ma_next_day_series(df["close"], window=w)
-        if res.empty: continue
-        asof_dates = df.loc[res["asof_idx"], "date"].dt.date.to_numpy()
+    for h in HORIZONS:
+        k = asof_idx < len(df) - h
         frames.append(pd.DataFrame({
-            "date": asof_dates, "ticker": ticker,
-            "model_name": f"safe_ma_w{w}", "horizon": H,
-            "y_pred": res["y_pred"].to_numpy()
+            "date": asof_dates[k], "ticker": ticker,
+            "model_name": model, "horizon": h,
+            "y_pred": y_pred[k]
         }))
-    for a in (0.3, 0.5):
-        res = ses_next_day_series(df["close"], alpha=a)
+    return frames
+
+def _safe_frames(df: pd.DataFrame, ticker: str) -> list[pd.DataFrame]:
+    frames = []
+    for w in MA_WINDOWS:
+        res = ma_next_day_series(df["close"], window=w)
         if res.empty: continue
-        asof_dates = df.loc[res["asof_idx"], "date"].dt.date.to_numpy()
-        frames.append(pd.DataFrame({
-            "date": asof_dates, "ticker": ticker,
-            "model_name": f"safe_ses_a{a}", "horizon": H,
-            "y_pred": res["y_pred"].to_numpy()
-        }))
+        frames += _h_frames(df, ticker, f"safe_ma_w{w}", res["asof_idx"].to_numpy(), res["y_pred"].to_numpy())
+    res = ses_next_day_multi(df["close"], SES_ALPHAS)   # alpha 전부 한 번에 (선형 필터)
+    if not res.empty:
+        for a in SES_ALPHAS:
+            frames += _h_frames(df, ticker, f"safe_ses_a{a}", res["asof_idx"].to_numpy(), res[a].to_numpy())
     return frames
 
+def _dl_rows(dates, tickers, model: str, yhat) -> pd.DataFrame:
+    """티커마다 asof 하나에 horizon별 예측. yhat: (티커 수, len(HORIZONS)) — 다중 출력 헤드의 결과."""
+    n, k = len(tickers), len(HORIZONS)
+    yhat = np.asarray(yhat, dtype=float).reshape(n, k)
+    return pd.DataFrame({
+        "date": np.repeat(np.asarray(dates, dtype=object), k), "ticker": np.repeat(np.asarray(tickers, dtype=object), k),
+        "model_name": model, "horizon": np.tile(HORIZONS, n), "y_pred": yhat.reshape(-1),
+    }, columns=COLS)
+
 def _dl_frame(df: pd.DataFrame, ticker: str) -> Optional[pd.DataFrame]:
     if not _DL_OK or len(df) < MIN_DL:
         return None
     try:
-        yhat = predict_next_day_close(df["close"].to_numpy(), **DL_PARAMS)
-        asof = df["date"].iloc[-1].date()
-        return pd.DataFrame([{
-            "date": asof, "ticker": ticker,
-            "model_name": "safe_dl_lstm_v1", "horizon": H,
-            "y_pred": float(yhat)
-        }])
+        lstm = registry.load(DL_MODEL)
+        if DL_WARM:
+            yhat = lstm.predict_next_day_close_warm(ticker, df["date"].to_numpy(), df["close"].to_numpy(),
+                                                    version=DL_VERSION, horizons=HORIZONS, **DL_PARAMS)
+        else:
+            yhat = lstm.predict_next_day_close(df["close"].to_numpy(), horizons=HORIZONS, **DL_PARAMS)
+        return _dl_rows([df["date"].iloc[-1].date()], [ticker], DL_MODEL, [yhat])
     except Exception as e:
         print(f"[DL warn] {ticker}: {e}")
         return None
@@ -97,37 +125,355 @@ def build_no_leak(ticker: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
         return (pd.DataFrame(columns=["date","ticker","model_name","horizon","y_pred"]), pd.DataFrame())
     full = pd.concat(frames, ignore_index=True)
     last = _last_map(ticker)
-    if last:
-        mask = []
-        for _, r in full.iterrows():
-            d0 = last.get(r["model_name"])
-            mask.append(True if d0 is None else (r["date"] > d0))
-        full = full[pd.Series(mask, index=full.index)]
-    return full[["date","ticker","model_name","horizon","y_pred"]], full
-
-def run(limit: Optional[int] = None, no_dl: bool = False):
-    global _DL_OK
+    if not last.empty:
+        full = full.merge(last, on=["model_name", "horizon"], how="left")
+        full = full[full["date"] > full["last_date"].fillna(date.min)]
+    return full[COLS], full
+
+# ---------------------------------------------------------------- panel 엔진
+# 전 종목 종가를 한 번에 (date × ticker) 행렬로 읽고, safe_ma_w* / safe_ses_a*를
+# 패널 연산 몇 번으로 계산 → 긴 프레임 하나로 업서트 (종목별 쿼리/작은 프레임 concat 없음)
+
+def _price_panel(tickers: list[str], since: Optional[list] = None) -> pd.DataFrame:
+    """since: 티커별 하한 날짜 목록 (None 원소 = 전체 히스토리, since=None이면 전부 전체)."""
+    if since is None:
+        df = read_frame("""
+            SELECT date, ticker, close FROM prices
+            WHERE ticker = ANY(:t) AND close IS NOT NULL
+        """, {"t": list(tickers)})
+    else:
+        df = read_frame("""
+            SELECT p.date, p.ticker, p.close
+            FROM unnest(CAST(:arr AS text[]), CAST(:since AS date[])) AS s(ticker, since)
+            JOIN prices p ON p.ticker = s.ticker AND p.date >= COALESCE(s.since, '-infinity'::date)
+            WHERE p.close IS NOT NULL
+        """, {"arr": list(tickers), "since": list(since)})
+    if df.empty: return pd.DataFrame()
+    df["date"] = pd.to_datetime(df["date"])
+    return df.pivot(index="date", columns="ticker", values="close").sort_index()
+
+def _long(wide: pd.DataFrame, model: str, h: int = 1, keep: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """NaN 아닌 칸만 (keep이 있으면 그중 keep인 칸만) (date, ticker, model_name, horizon, y_pred) 행으로."""
+    vals = wide.to_numpy()
+    ok = ~np.isnan(vals)
+    if keep is not None:
+        ok &= keep
+    r, c = np.nonzero(ok)
+    return pd.DataFrame({
+        "date": wide.index.to_numpy()[r], "ticker": wide.columns.to_numpy()[c],
+        "model_name": model, "horizon": h, "y_pred": vals[r, c],
+    })
+
+def _panel_safe_frame(panel: pd.DataFrame) -> pd.DataFrame:
+    # 패널 연산은 한 번, horizon은 'asof 뒤 h일 종가가 있는 칸' 마스크만 다름
+    preds = [(f"safe_ma_w{k}", w) for k, w in ma_panel(panel, MA_WINDOWS).items()]
+    preds += [(f"safe_ses_a{a}", w) for a, w in ses_panel(panel, SES_ALPHAS).items()]
+    ahead = steps_ahead(panel.to_numpy(dtype=float))
+    return pd.concat([_long(w, m, h, ahead >= h) for h in HORIZONS for m, w in preds], ignore_index=True)
+
+def _dl_panel_frame(panel: pd.DataFrame, tickers) -> pd.DataFrame:
+    """티커별 LSTM을 프로세스 풀(dl_pool)로 병렬 학습/예측, 실패는 티커 단위로 건너뜀."""
+    series = {t: panel[t].dropna() for t in tickers}
+    series = {t: s for t, s in series.items() if len(s) >= MIN_DL}
+    frames = []
+    if DL_INFER:
+        frames.append(_dl_infer_frame(panel, tickers))
+    elif _DL_OK and series:
+        done, yhats = [], []
+        if DL_WARM:
+            fn = registry.entry(DL_MODEL, "predict_next_day_close_warm")
+            jobs = [(t, (t, s.index.to_numpy(), s.to_numpy()), {"version": DL_VERSION, "horizons": HORIZONS, **DL_PARAMS})
+                    for t, s in series.items()]
+        else:
+            fn = registry.entry(DL_MODEL, "predict_next_day_close")
+            jobs = [(t, (s.to_numpy(),), {"horizons": HORIZONS, **DL_PARAMS}) for t, s in series.items()]
+        for t, yhat, err in dl_map(fn, jobs, DL_WORKERS):
+            if err is not None:
+                print(f"[DL warn] {t}: {err}")
+                continue
+            done.append(t)
+            yhats.append(yhat)
+        frames.append(_dl_rows([series[t].index[-1] for t in done], done, DL_MODEL, yhats))
+    if DL_GLOBAL and _DL_OK:
+        frames.append(_dl_global_frame(panel, tickers))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLS)
+
+def _dl_infer_frame(panel: pd.DataFrame, tickers) -> pd.DataFrame:
+    """저장된 model.npz(티커별 가중치)를 쌓아 전 티커 마지막 윈도우를 NumPy forward 한 번으로."""
+    w = DL_PARAMS["window"]
+    series, params, skipped = {}, [], 0
+    for t in tickers:
+        s = panel[t].dropna()
+        path = dl_store.npz_path(t, DL_VERSION, w)
+        if len(s) < MIN_DL or not os.path.exists(path):
+            continue
+        p = lstm_numpy.load_npz(path)
+        if lstm_numpy.n_outputs(p) != len(HORIZONS):
+            skipped += 1   # 다른 HORIZONS로 학습된 모델 (다음 학습 때 전체 재학습)
+            continue
+        series[t] = s
+        params.append(p)
+    if skipped:
+        print(f"[DL warn] {skipped} models trained for other horizons skipped")
+    if not series:
+        print("[DL warn] no exported models (python -m src.models.lstm_numpy export)")
+        return pd.DataFrame(columns=COLS)
+    yhat = lstm_numpy.predict_next_close(lstm_numpy.stack(params), np.stack([s.to_numpy()[-w:] for s in series.values()]))
+    return _dl_rows([s.index[-1] for s in series.values()], list(series), DL_MODEL, yhat)
+
+def _dl_global_frame(panel: pd.DataFrame, tickers) -> pd.DataFrame:
+    """공용 LSTM 한 번 학습 + 전 티커 한 번에 예측 (asof = 티커별 마지막 종가일)."""
+    series = {t: panel[t].dropna() for t in tickers}
+    series = {t: s for t, s in series.items() if len(s) >= MIN_DL}
+    if not _DLG_OK or not series:
+        return pd.DataFrame(columns=COLS)
+    try:
+        yhat = registry.resolve(DL_GLOBAL_MODEL, "predict_next_day_close_global")(
+            {t: s.to_numpy() for t, s in series.items()}, horizons=HORIZONS, **DL_GLOBAL_PARAMS)
+    except Exception as e:
+        print(f"[DL warn] global: {e}")
+        return pd.DataFrame(columns=COLS)
+    return _dl_rows([series[t].index[-1] for t in yhat], list(yhat), DL_GLOBAL_MODEL, list(yhat.values()))
+
+def _last_frame(tickers: list[str], models: list[str], horizons=HORIZONS) -> pd.DataFrame:
+    """(ticker, model_name, horizon) 조합별 마지막 예측일 — 쿼리 한 번 (인덱스 역방향 1행씩)."""
+    df = read_frame("""
+        SELECT t.ticker, m.model_name, h.horizon,
+               (SELECT MAX(p.date) FROM predictions p
+                WHERE p.ticker = t.ticker AND p.horizon = h.horizon AND p.model_name = m.model_name) AS last_date
+        FROM unnest(CAST(:arr AS text[])) AS t(ticker)
+        CROSS JOIN unnest(CAST(:models AS text[])) AS m(model_name)
+        CROSS JOIN unnest(CAST(:hs AS int[])) AS h(horizon)
+    """, {"arr": list(tickers), "models": list(models), "hs": [int(h) for h in horizons]})
+    df = df.dropna(subset=["last_date"])
+    df["last_date"] = pd.to_datetime(df["last_date"])
+    return df
+
+def _obs_counts(tickers, watermarks) -> np.ndarray:
+    """(티커, watermark) 쌍마다 그날까지의 종가 수 — 상태의 n_obs와 같아야 함."""
+    df = read_frame("""
+        SELECT s.i, (SELECT count(p.close) FROM prices p WHERE p.ticker = s.ticker AND p.date <= s.wm) AS n
+        FROM unnest(CAST(:arr AS text[]), CAST(:wm AS date[])) WITH ORDINALITY AS s(ticker, wm, i)
+    """, {"arr": list(tickers), "wm": [d.date() for d in pd.to_datetime(watermarks)]})
+    out = np.zeros(len(tickers), dtype=np.int64)
+    out[df["i"].to_numpy(dtype=np.int64) - 1] = df["n"].to_numpy(dtype=np.int64)
+    return out
+
+def _stale(states: dict, tickers: list[str]) -> np.ndarray:
+    """
+    watermark 이전 종가가 나중에 들어온 티커 (backfill_gaps 등) — 상태의 n이 prices와 어긋남.
+    watermark 뒤만 읽는 증분으로는 반영되지 않으므로 전체 히스토리로 다시 초기화해야 함.
+    """
+    tk = np.asarray(tickers, dtype=object)
+    pairs = {}
+    for hs in states.values():
+        for st in hs.values():
+            has = ~np.isnat(st["watermark"])
+            pairs.update(((t, w), None) for t, w in zip(tk[has], st["watermark"][has]))
+    if not pairs:
+        return np.zeros(len(tickers), dtype=bool)
+    keys = list(pairs)
+    cnt = dict(zip(keys, _obs_counts([t for t, _ in keys], [w for _, w in keys])))
+    bad = np.zeros(len(tickers), dtype=bool)
+    for hs in states.values():
+        for st in hs.values():
+            has = ~np.isnat(st["watermark"])
+            exp = np.array([cnt[(t, w)] for t, w in zip(tk[has], st["watermark"][has])], dtype=np.int64)
+            bad[np.flatnonzero(has)[st["n"][has] != exp]] = True
+    return bad
+
+def _reset(states: dict, mask: np.ndarray) -> None:
+    """mask 티커의 상태를 비움 (다음 _advance가 전체 히스토리로 초기화)."""
+    for hs in states.values():
+        for m, st in hs.items():
+            blank = model_state.empty(m, int(mask.sum()))
+            for k, v in blank.items():
+                st[k][mask] = v
+
+def build_panel(tickers: list[str]) -> pd.DataFrame:
+    """전 종목 safe_* (+DL) 예측 중 아직 저장 안 된 날짜만, 긴 프레임 하나로."""
+    panel = _price_panel(tickers)
+    if panel.empty: return pd.DataFrame(columns=COLS)
+    panel = panel.loc[:, panel.notna().sum() >= MIN_SAFE]
+    full = _panel_safe_frame(panel)
+    if _DL_OK or DL_INFER:
+        full = pd.concat([full, _dl_panel_frame(panel, panel.columns)], ignore_index=True)
+    return _finish(_drop_saved(full, list(panel.columns)))
+
+def _drop_saved(full: pd.DataFrame, tickers: list[str]) -> pd.DataFrame:
+    """tickers의 행 중 이미 저장된 마지막 예측일 이하인 것 제거 (다른 티커 행은 그대로)."""
+    if full.empty or not tickers: return full
+    last = _last_frame(tickers, full["model_name"].unique().tolist(), full["horizon"].unique().tolist())
+    if last.empty: return full
+    full = full.merge(last, on=["ticker", "model_name", "horizon"], how="left")
+    return full[full["last_date"].isna() | (full["date"] > full["last_date"])]
+
+def _finish(full: pd.DataFrame) -> pd.DataFrame:
+    full = full[COLS]
+    full["date"] = pd.to_datetime(full["date"]).dt.date
+    return full.reset_index(drop=True)
+
+# ---------------------------------------------------------------- 상태 기반 증분 (기본)
+# model_state에 (티커, 모델, horizon)별 링 버퍼/합/수준 + watermark를 두고 새 거래일만 읽어 진행
+# → 매일 작업량이 히스토리가 아니라 새 거래일 수에 비례. 상태 없는 티커만 전체 히스토리로 초기화
+# H=h 상태는 같은 점화식을 h-1 거래일 늦게 진행 (asof 뒤 h일 종가가 생겨야 그 asof 예측을 내보냄)
+
+def _safe_models() -> list[str]:
+    return [f"safe_ma_w{w}" for w in MA_WINDOWS] + [f"safe_ses_a{a}" for a in SES_ALPHAS]
+
+def _advance(states: dict, panel: pd.DataFrame, upto: Optional[np.ndarray] = None, h: int = 1) -> pd.DataFrame:
+    """
+    H=h 상태를 panel에서 watermark 이후 종가만큼 진행 (states 제자리 갱신) → 새 asof 예측 긴 프레임.
+    upto: 열별 상한 날짜 (검증용, 그날까지만 반영)
+    """
+    vals = panel.to_numpy(dtype=float)
+    dates = panel.index.to_numpy()
+    valid = ~np.isnan(vals)
+    if h > 1:
+        valid &= steps_ahead(vals) >= h - 1   # 열마다 마지막 h-1일은 아직 반영하지 않음
+    if upto is not None:
+        valid &= dates[:, None] <= upto[None, :]
+    frames = []
+    for m, st in states.items():
+        wm = st["watermark"]
+        fresh = valid & (np.isnat(wm)[None, :] | (dates[:, None] > wm[None, :]))
+        prev = panel.index.get_indexer(pd.DatetimeIndex(wm))   # watermark 행 (없으면 -1)
+        kind, p = model_state.spec(m)
+        out = (ma_advance if kind == "ma" else ses_advance)(st, vals, fresh, prev, p)
+        got = fresh.any(axis=0)
+        last = len(vals) - 1 - fresh[::-1].argmax(axis=0)
+        st["watermark"][got] = dates[last[got]]
+        frames.append(_long(pd.DataFrame(out, index=panel.index, columns=panel.columns, copy=False), m, h))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLS)
+
+def _run_state(tickers: list[str], rebuild: bool = False) -> int:
+    """
+    잠금 트랜잭션(상태 진행 → safe 예측 upsert → 상태 저장)은 짧게 끝내고,
+    DL 학습/예측은 잠금을 푼 뒤 상태가 움직인 티커만 별도 트랜잭션으로 저장.
+    """
+    model_state.ensure_state()
+    models = _safe_models()
+    with get_engine().begin() as c:
+        model_state.lock(c)
+        if rebuild:
+            print(f"[predict] state cleared rows={sum(model_state.clear(c, h, models) for h in HORIZONS)}")
+        states = {h: model_state.load(c, tickers, models, h) for h in HORIZONS}
+        stale = _stale(states, tickers)
+        if stale.any():
+            print(f"[predict] state behind back-filled prices, re-initialising tickers={int(stale.sum())}")
+            _reset(states, stale)
+        flat = [st for hs in states.values() for st in hs.values()]
+        new = np.zeros(len(tickers), dtype=bool)
+        for st in flat:
+            new |= np.isnat(st["watermark"])
+        wm = np.min(np.stack([st["watermark"] for st in flat]), axis=0)
+        since = [None if n else d.date() for n, d in zip(new, pd.to_datetime(wm))]
+        panel = _price_panel(tickers, since)
+        if panel.empty:
+            print("[predict] no prices")
+            return 0
+        panel = panel.reindex(columns=tickers)
+        short = new & (panel.notna().sum().to_numpy() < MIN_SAFE)
+        panel.loc[:, short] = np.nan   # 히스토리가 짧은 새 티커는 상태도 만들지 않음
+        before = {h: {m: st["n"].copy() for m, st in hs.items()} for h, hs in states.items()}
+        full = pd.concat([_advance(states[h], panel, h=h) for h in HORIZONS], ignore_index=True)
+        changed = {h: {m: st["n"] > before[h][m] for m, st in hs.items()} for h, hs in states.items()}
+        # 새로 초기화한 티커는 전체 히스토리를 냈으므로 이미 저장된 날짜 제외
+        # (다시 초기화한 티커는 채워진 날짜와 그 뒤 예측이 바뀌므로 전부 덮어씀)
+        full = _finish(_drop_saved(full, [t for t, f in zip(tickers, new & ~stale) if f]))
+        n = upsert_predictions(full, conn=c)
+        s = sum(model_state.save(c, states[h], tickers, h, changed[h]) for h in HORIZONS)
+    print(f"[predict] upserted rows={n} (state, tickers={len(tickers)}, new={int(new.sum())}, states={s})")
+
+    # DL: 잠금 밖에서 (학습이 길어도 다음 실행/상태 저장을 막지 않음)
+    if _DL_OK or DL_INFER:
+        moved = np.logical_or.reduce([f for ch in changed.values() for f in ch.values()])
+        dl_tk = [t for t, f in zip(tickers, moved) if f]
+        if dl_tk:
+            dl = _finish(_drop_saved(_dl_panel_frame(_price_panel(dl_tk), dl_tk), dl_tk))
+            m = upsert_predictions(dl)
+            print(f"[predict] upserted DL rows={m} (tickers={len(dl_tk)})")
+            n += m
+    return n
+
+def check_state(tickers: list[str], rtol: float = STATE_RTOL) -> list[str]:
+    """저장된 상태를 같은 watermark까지의 전체 히스토리 재계산과 비교 → 어긋난 'ticker/model/H' 목록."""
+    models = _safe_models()
+    with get_engine().connect() as c:
+        stored = {h: model_state.load(c, tickers, models, h) for h in HORIZONS}
+    panel = _price_panel(tickers).reindex(columns=tickers)
+    bad, worst = [], 0.0
+    for h, m in [(h, m) for h in HORIZONS for m in models]:
+        got = stored[h][m]
+        ref = {m: model_state.empty(m, len(tickers))}
+        _advance(ref, panel, upto=got["watermark"], h=h)
+        ref = ref[m]
+        num = ref["sum"] if model_state.spec(m)[0] == "ma" else ref["level"]
+        val = got["sum"] if model_state.spec(m)[0] == "ma" else got["level"]
+        rel = np.abs(val - num) / np.maximum(np.abs(num), 1e-12)
+        worst = max(worst, float(rel.max(initial=0.0)))
+        ok = ((got["n"] == ref["n"]) & (got["pos"] == ref["pos"]) & (rel <= rtol)
+              & (got["buf"] == ref["buf"]).all(axis=1)
+              & ((got["watermark"] == ref["watermark"]) | np.isnat(got["watermark"]) & np.isnat(ref["watermark"])))
+        bad += [f"{t}/{m}/H{h}" for t in np.asarray(tickers, dtype=object)[~ok]]
+    total = len(tickers) * len(models) * len(HORIZONS)
+    print(f"[predict] state check: {total - len(bad)}/{total} ok, "
+          f"max rel diff={worst:.2e}")
+    for b in bad[:20]:
+        print(f"[predict] state mismatch {b}")
+    return bad
+
+def run(limit: Optional[int] = None, no_dl: bool = False, mode: str = "state", rebuild_state: bool = False,
+        dl_global: bool = False, dl_workers: Optional[int] = None, dl_infer: bool = False):
+    """mode: state(기본, 증분) / panel(전체 재계산) / per_ticker(이전 방식, 비교용)."""
+    global _DL_OK, DL_GLOBAL, DL_WORKERS, DL_INFER
+    if dl_workers:
+        DL_WORKERS = dl_workers
+    if dl_infer:
+        DL_INFER = True
     if no_dl:
-        _DL_OK = False
+        _DL_OK = DL_INFER = False
+    if dl_global:
+        DL_GLOBAL = True
 
     tickers = _all_tickers()
     if limit: tickers = tickers[:int(limit)]
 
+    if mode == "state":
+        _run_state(tickers, rebuild=rebuild_state)
+        return
+    if mode == "panel":
+        n = upsert_predictions(build_panel(tickers))
+        print(f"[predict] upserted rows={n} (panel, tickers={len(tickers)})")
+        return
+
     to_save = []
     for t in tickers:
         try:
             s, _ = build_no_leak(t)
             if not s.empty:
-                to_save.extend(s.to_dict("records"))
+                to_save.append(s)
         except Exception as e:
             print(f"[predict warn] {t}: {e}")
 
-    n = upsert_predictions(to_save)
+    n = upsert_predictions(pd.concat(to_save, ignore_index=True) if to_save else [])
     print(f"[predict] upserted rows={n}")
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--limit", type=int, default=None)
     ap.add_argument("--no-dl", action="store_true")
+    ap.add_argument("--dl-global", action="store_true", help=f"{DL_GLOBAL_MODEL}도 생성 (DL_GLOBAL=1과 같음)")
+    ap.add_argument("--dl-workers", type=int, default=None, help="DL 프로세스 수 (env DL_WORKERS, 0=자동)")
+    ap.add_argument("--dl-infer", action="store_true", help="학습 없이 model.npz NumPy 추론만 (DL_INFER=1과 같음)")
+    ap.add_argument("--panel", action="store_true", help="상태 없이 전체 히스토리 패널 재계산")
+    ap.add_argument("--per-ticker", action="store_true", help="종목별 조회/계산 (이전 방식, 비교용)")
+    ap.add_argument("--rebuild-state", action="store_true", help="model_state를 전체 히스토리로 다시 만든 뒤 진행")
+    ap.add_argument("--check-state", action="store_true", help="model_state를 전체 재계산과 비교 (불일치 시 exit 1)")
     args = ap.parse_args()
-    run(limit=args.limit, no_dl=args.no_dl)
+    if args.check_state:
+        tk = _all_tickers()[:args.limit] if args.limit else _all_tickers()
+        sys.exit(1 if check_state(tk) else 0)
+    mode = "per_ticker" if args.per_ticker else "panel" if args.panel else "state"
+    run(limit=args.limit, no_dl=args.no_dl, mode=mode, rebuild_state=args.rebuild_state, dl_global=args.dl_global,
+        dl_workers=args.dl_workers, dl_infer=args.dl_infer)
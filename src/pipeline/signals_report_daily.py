@@ -11,7 +11,7 @@ os.makedirs(REPORT_DIR, exist_ok=True)
 def _latest_pred_date() -> date | None:
     eng = get_engine()
     with eng.connect() as c:
-        r = c.execute(text("SELECT MAX(date) FROM predictions_clean")).scalar()
+        r = c.execute(text("SELECT MAX(date) FROM predictions_clean WHERE horizon = 1")).scalar()
     return pd.to_datetime(r).date() if r else None
 
 def run():
@@ -26,7 +26,7 @@ def run():
           SELECT p.date, p.ticker, p.model_name, p.y_pred,
                  RANK() OVER (PARTITION BY p.date, p.ticker ORDER BY p.y_pred DESC) AS rk
           FROM predictions_clean p
-          WHERE p.date = :d
+          WHERE p.date = :d AND p.horizon = 1   -- 다음날 신호
         )
         SELECT b.date, b.ticker, t.name, b.model_name, b.y_pred
         FROM best b
@@ -9,6 +9,9 @@ from datetime import date, timedelta
 from sqlalchemy import text
 
 from src.db.conn import get_engine  # DB_* 환경변수 사용
+from src.db.fast_read import read_frame
+from src.models.horizons import HORIZONS
+from src.models.registry import is_dl, is_ml   # 이름 분류만 (모델 백엔드 import 없음)
 
 pd.options.mode.copy_on_write = True
 alt.data_transformers.disable_max_rows()
@@ -66,10 +69,18 @@ def fetch_model_catalog(horizon: int, include_dl: bool, include_ml: bool) -> lis
         for table in ("predictions_clean", "predictions"):
             try:
                 df = pd.read_sql(
+                    # DISTINCT 대신 loose index scan (모델 수만큼 인덱스 탐색)
                     text(f"""
-                        SELECT DISTINCT model_name
-                        FROM {table}
-                        WHERE horizon = :h
+                        WITH RECURSIVE m AS (
+                            (SELECT model_name FROM {table} WHERE horizon = :h
+                             ORDER BY model_name LIMIT 1)
+                            UNION ALL
+                            SELECT (SELECT p.model_name FROM {table} p
+                                    WHERE p.horizon = :h AND p.model_name > m.model_name
+                                    ORDER BY p.model_name LIMIT 1)
+                            FROM m WHERE m.model_name IS NOT NULL
+                        )
+                        SELECT model_name FROM m WHERE model_name IS NOT NULL
                     """),
                     c,
                     params={"h": horizon},
@@ -84,13 +95,6 @@ def fetch_model_catalog(horizon: int, include_dl: bool, include_ml: bool) -> lis
 
     m = df["model_name"].astype(str)
 
-    def is_dl(x: str) -> bool:
-        return x.startswith("safe_dl_") or x.startswith("dl_")
-
-    def is_ml(x: str) -> bool:
-        return (x.startswith("safe_") and not is_dl(x)) or \
-               any(x.startswith(p) for p in ("ma_", "ses_", "ens_"))
-
     mask = pd.Series(True, index=m.index)
     if not include_dl:
         mask &= ~m.map(is_dl)
@@ -109,15 +113,15 @@ def fetch_data(
     """선택된 티커의 가격과 예측을 기간/모델 필터와 함께 반환."""
     eng = get_engine()
     with eng.connect() as c:
-        price_df = pd.read_sql(
-            text("""
+        price_df = read_frame(
+            """
                 SELECT date, open, high, low, close, volume
                 FROM prices
                 WHERE ticker = :t
                 ORDER BY date
-            """),
-            c,
-            params={"t": ticker},
+            """,
+            {"t": ticker},
+            conn=c,
         )
 
         pred_df = pd.DataFrame(columns=["date", "ticker", "model_name", "horizon", "y_pred"])
@@ -133,7 +137,7 @@ def fetch_data(
                     # psycopg2의 list -> ARRAY 바인딩 사용
                     sql += " AND model_name = ANY(:models)"
                     params["models"] = models
-                pred_df = pd.read_sql(text(sql), c, params=params)
+                pred_df = read_frame(sql, params, conn=c)
                 break
             except Exception:
                 continue
@@ -244,7 +248,7 @@ name_map = load_ticker_name_map()
 with st.sidebar:
     st.header("Controls")
 
-    horizon = st.selectbox("Horizon", [1, 5], index=0)
+    horizon = st.selectbox("Horizon", list(HORIZONS), index=0)
 
     include_ml = st.checkbox("ML 포함 (safe_, ens_, ma_, ses_)", value=True)
     include_dl = st.checkbox("DL 포함 (safe_dl_* 등)", value=True)